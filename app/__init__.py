@@ -3,6 +3,7 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from .database import init_db, db
 from .smtp_config import init_smtp
+from .commands import register_commands
 import os
 from datetime import timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -46,7 +47,8 @@ def create_app():
                     "https://frontend-tesis-dusky.vercel.app"
                 ],         
                 "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-                "allow_headers": ["Content-Type", "Authorization"],
+                "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match"],
+                "expose_headers": ["ETag"],
                 "supports_credentials": True
             }
         }
@@ -72,6 +74,8 @@ def create_app():
     app.register_blueprint(log_bp)
     app.register_blueprint(user_logins_bp)
 
+    register_commands(app)
+
     with app.app_context():
         db.create_all()
 
@@ -80,6 +84,11 @@ def create_app():
 
     # Importar TokenService dentro de app_context
     from .services.token.token_service import TokenService
+    from .services.report_job.report_job_service import ReportJobService
+    from .services.idempotency.idempotency_service import IdempotencyService
+    from .services.inventory_snapshot.inventory_snapshot_service import InventorySnapshotService
+    from .services.inventory_change.inventory_change_service import InventoryChangeService
+    from .services.reconciliation.reconciliation_service import ReconciliationService
 
     # Tarea para eliminar tokens expirados cada 24 horas a las 3:00 AM
     scheduler.add_job(
@@ -90,6 +99,51 @@ def create_app():
         replace_existing=True
     )
 
+    # Tarea para eliminar reportes expirados y sus archivos cada hora
+    scheduler.add_job(
+        func=lambda: app.app_context().push() or ReportJobService.delete_expired_reports(),
+        trigger=CronTrigger(minute=30),
+        id="delete_expired_reports",
+        name="Eliminar reportes expirados cada hora",
+        replace_existing=True
+    )
+
+    # Tarea para eliminar claves de idempotencia expiradas cada 24 horas a las 3:15 AM
+    scheduler.add_job(
+        func=lambda: app.app_context().push() or IdempotencyService.delete_expired_keys(),
+        trigger=CronTrigger(hour=3, minute=15),
+        id="delete_expired_idempotency_keys",
+        name="Eliminar claves de idempotencia expiradas diariamente",
+        replace_existing=True
+    )
+
+    # Tarea para guardar el snapshot nocturno de inventario a las 0:05 AM
+    scheduler.add_job(
+        func=lambda: app.app_context().push() or InventorySnapshotService.take_snapshot(),
+        trigger=CronTrigger(hour=0, minute=5),
+        id="take_inventory_snapshot",
+        name="Guardar snapshot de inventario diariamente",
+        replace_existing=True
+    )
+
+    # Tarea para eliminar los cambios de inventario ya transmitidos cada hora
+    scheduler.add_job(
+        func=lambda: app.app_context().push() or InventoryChangeService.delete_old_changes(),
+        trigger=CronTrigger(minute=45),
+        id="delete_old_inventory_changes",
+        name="Eliminar cambios de inventario antiguos cada hora",
+        replace_existing=True
+    )
+
+    # Tarea para conciliar el inventario contra el ledger cada noche a la 1:30 AM (solo reporta)
+    scheduler.add_job(
+        func=lambda: app.app_context().push() or ReconciliationService.reconcile_inventory(),
+        trigger=CronTrigger(hour=1, minute=30),
+        id="reconcile_inventory",
+        name="Conciliar inventario contra el ledger diariamente",
+        replace_existing=True
+    )
+
     # Iniciar el scheduler
     scheduler.start()
     print("[APScheduler] Scheduler iniciado - Limpieza de tokens programada para las 3:00 AM diariamente")
@@ -0,0 +1,83 @@
+import click
+from .utils.date_conversor import parse_transaction_date
+
+
+def register_commands(app):
+    """Registra los comandos de mantenimiento disponibles con 'flask <comando>'"""
+
+    @app.cli.command("rebuild-daily-movements")
+    @click.option("--from", "from_date", default=None, help="Fecha inicial (YYYY-MM-DD)")
+    @click.option("--to", "to_date", default=None, help="Fecha final inclusiva (YYYY-MM-DD)")
+    def rebuild_daily_movements_command(from_date, to_date):
+        """Reconstruye el acumulado diario de movimientos desde el ledger."""
+        from .services.daily_movement.daily_movement_service import (
+            DailyMovementService,
+        )
+
+        windows = DailyMovementService.rebuild_daily_movements(
+            parse_transaction_date(from_date).date() if from_date else None,
+            parse_transaction_date(to_date).date() if to_date else None,
+        )
+        click.echo(f"Acumulado diario reconstruido ({windows} ventanas)")
+
+    @app.cli.command("take-inventory-snapshot")
+    @click.option("--date", "snapshot_date", default=None, help="Día del cierre (YYYY-MM-DD); por defecto ayer")
+    def take_inventory_snapshot_command(snapshot_date):
+        """Guarda el cierre de stock de un día a partir del inventario actual."""
+        from .services.inventory_snapshot.inventory_snapshot_service import (
+            InventorySnapshotService,
+        )
+
+        try:
+            written = InventorySnapshotService.take_snapshot(
+                parse_transaction_date(snapshot_date).date() if snapshot_date else None
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        click.echo("Snapshot guardado" if written else "El snapshot de ese día ya existía o falló; revisar los logs")
+
+    @app.cli.command("backfill-price-history")
+    def backfill_price_history_command():
+        """Registra el precio actual de los productos que aún no tienen historial."""
+        from .services.product_price_history.product_price_history_service import (
+            ProductPriceHistoryService,
+        )
+
+        products = ProductPriceHistoryService.backfill_missing_history()
+        click.echo(f"Historial de precios iniciado para {products} productos")
+
+    @app.cli.command("bump-table-version")
+    @click.argument("table_names", nargs=-1, required=True)
+    def bump_table_version_command(table_names):
+        """Invalida el ETag de los listados tras editar tablas directamente en la base."""
+        from .database import db
+        from .services.table_version.table_version_service import TableVersionService
+
+        TableVersionService.bump(*table_names)
+        db.session.commit()
+        click.echo(f"Versión incrementada: {', '.join(table_names)}")
+
+    @app.cli.command("reconcile-inventory")
+    @click.option("--repair", is_flag=True, help="Corrige las diferencias encontradas")
+    @click.option("--max-repairs", type=int, default=None, help="Máximo de inventarios a corregir")
+    def reconcile_inventory_command(repair, max_repairs):
+        """Compara el inventario con el ledger y opcionalmente corrige las diferencias."""
+        from .services.reconciliation.reconciliation_service import (
+            ReconciliationService,
+        )
+
+        result = ReconciliationService.reconcile_inventory()
+        click.echo(
+            f"Conciliación {result['run_id']}: {result['drift']} inventarios con diferencias"
+        )
+
+        for drift in ReconciliationService.get_pending_drift():
+            click.echo(
+                f"  producto {drift['product_id']} sede {drift['branch_id']}: "
+                f"inventario {drift['inventory_quantity']}, ledger {drift['ledger_quantity']}"
+            )
+
+        if repair:
+            repaired = ReconciliationService.repair_drift(max_repairs)
+            click.echo(f"Inventarios corregidos: {repaired}")
@@ -11,6 +11,15 @@ from .token.token import Token
 from .login_logs.user_logins import UserLogins
 from .log.log import Log
 from .rate_limit.rate_limit import RateLimit
+from .report_job.report_job import ReportJob
+from .idempotency_key.idempotency_key import IdempotencyKey
+from .daily_movement.daily_movement import DailyMovement
+from .inventory_snapshot.inventory_snapshot import InventorySnapshot
+from .backdated_movement.backdated_movement import BackdatedMovement
+from .inventory_change.inventory_change import InventoryChange
+from .table_version.table_version import TableVersion
+from .inventory_drift.inventory_drift import InventoryDrift
+from .product_price_history.product_price_history import ProductPriceHistory
 
 # Exportar todos los modelos para facilitar las importaciones
 __all__ = [
@@ -25,5 +34,14 @@ __all__ = [
     'Token',
     'UserLogins',
     'Log',
-    'RateLimit'
+    'RateLimit',
+    'ReportJob',
+    'IdempotencyKey',
+    'DailyMovement',
+    'InventorySnapshot',
+    'BackdatedMovement',
+    'InventoryChange',
+    'TableVersion',
+    'InventoryDrift',
+    'ProductPriceHistory'
 ]
@@ -0,0 +1,33 @@
+from ...database import db
+from datetime import datetime, timezone
+
+
+class BackdatedMovement(db.Model):
+    __tablename__ = "backdated_movement"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Día de negocio del movimiento: los cierres de ese día en adelante quedan viejos
+    movement_date = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"), nullable=False)
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        db.Index(
+            "ix_backdated_movement_date_product_branch",
+            "movement_date",
+            "product_id",
+            "branch_id",
+        ),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "movement_date": self.movement_date.isoformat(),
+            "product_id": self.product_id,
+            "branch_id": self.branch_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
@@ -0,0 +1,34 @@
+from ...database import db
+
+
+class DailyMovement(db.Model):
+    __tablename__ = "daily_movement"
+
+    id = db.Column(db.Integer, primary_key=True)
+    movement_date = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"), nullable=False)
+    units_in = db.Column(db.Integer, nullable=False, default=0)
+    units_out = db.Column(db.Integer, nullable=False, default=0)
+    transactions_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "movement_date",
+            "product_id",
+            "branch_id",
+            name="uq_daily_movement_date_product_branch",
+        ),
+        db.Index("ix_daily_movement_branch_date", "branch_id", "movement_date"),
+        db.Index("ix_daily_movement_product_date", "product_id", "movement_date"),
+    )
+
+    def to_dict(self):
+        return {
+            "movement_date": self.movement_date.isoformat(),
+            "product_id": self.product_id,
+            "branch_id": self.branch_id,
+            "units_in": self.units_in,
+            "units_out": self.units_out,
+            "transactions_count": self.transactions_count,
+        }
@@ -0,0 +1,26 @@
+from ...database import db
+from datetime import datetime, timezone
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_key"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Las claves son de cada usuario: dos usuarios pueden generar el mismo valor
+    app_user_id = db.Column(db.Integer, db.ForeignKey("app_user.id"), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "app_user_id", "key", "endpoint", name="uq_idempotency_user_key_endpoint"
+        ),
+        db.Index("ix_idempotency_key_expires_at", "expires_at"),
+    )
@@ -24,6 +24,16 @@ class Inventory(db.Model):
     product = db.relationship("Product", backref="inventories")
     branch = db.relationship("Branch", backref="inventories")
 
+    __table_args__ = (
+        # Una sola fila por producto y sede: las entradas concurrentes que crean el
+        # inventario chocan aquí y se resuelven con un upsert
+        db.UniqueConstraint("product_id", "branch_id", name="uq_inventory_product_branch"),
+        # Máximo por producto de los inventarios activos leyendo solo el índice
+        db.Index(
+            "ix_inventory_product_deleted_quantity", "product_id", "deleted_at", "quantity"
+        ),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
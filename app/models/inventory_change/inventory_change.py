@@ -0,0 +1,26 @@
+from ...database import db
+
+
+class InventoryChange(db.Model):
+    __tablename__ = "inventory_change"
+
+    # El id autoincremental es el cursor que siguen todos los workers
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"), nullable=False)
+    # Cantidad del inventario después del cambio
+    quantity = db.Column(db.Integer, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index("ix_inventory_change_branch_id", "branch_id", "id"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "product_id": self.product_id,
+            "branch_id": self.branch_id,
+            "quantity": float(self.quantity) if self.quantity is not None else None,
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None,
+        }
@@ -0,0 +1,32 @@
+from ...database import db
+from datetime import datetime, timezone
+
+
+class InventoryDrift(db.Model):
+    __tablename__ = "inventory_drift"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Identifica la ejecución de la conciliación que detectó la diferencia
+    run_id = db.Column(db.String(36), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"), nullable=False)
+    # None si el ledger tiene movimientos pero no existe la fila de inventario
+    inventory_quantity = db.Column(db.Integer, nullable=True)
+    ledger_quantity = db.Column(db.Integer, nullable=False)
+    detected_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    repaired_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "run_id": self.run_id,
+            "product_id": self.product_id,
+            "branch_id": self.branch_id,
+            "inventory_quantity": self.inventory_quantity,
+            "ledger_quantity": self.ledger_quantity,
+            "difference": (self.inventory_quantity or 0) - self.ledger_quantity,
+            "detected_at": self.detected_at.isoformat() if self.detected_at else None,
+            "repaired_at": self.repaired_at.isoformat() if self.repaired_at else None,
+        }
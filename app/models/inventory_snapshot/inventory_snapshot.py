@@ -0,0 +1,36 @@
+from ...database import db
+from datetime import datetime, timezone
+
+
+class InventorySnapshot(db.Model):
+    __tablename__ = "inventory_snapshot"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Día de negocio (transaction_date) cuyo cierre guarda la fila
+    snapshot_date = db.Column(db.Date, nullable=False)
+    taken_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    branch_id = db.Column(db.Integer, db.ForeignKey("branch.id"), nullable=False)
+    # Stock al final de snapshot_date: suma de los movimientos con fecha hasta ese día
+    quantity = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        # Un cierre por día: si varios workers ejecutan el job, solo uno lo escribe
+        db.UniqueConstraint(
+            "snapshot_date",
+            "product_id",
+            "branch_id",
+            name="uq_inventory_snapshot_date_product_branch",
+        ),
+    )
+
+    def to_dict(self):
+        return {
+            "snapshot_date": self.snapshot_date.isoformat(),
+            "taken_at": self.taken_at,
+            "product_id": self.product_id,
+            "branch_id": self.branch_id,
+            "quantity": self.quantity,
+        }
@@ -22,6 +22,13 @@ class Product(db.Model):
         onupdate=lambda: datetime.now(timezone.utc),
     )
     deleted_at = db.Column(db.DateTime, nullable=True)
+    # Versión de table_version con la que se escribió la fila por última vez
+    change_version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        # Sincronización incremental por (change_version, id)
+        db.Index("ix_product_change_version_id", "change_version", "id"),
+    )
 
     def to_dict(self):
         return {
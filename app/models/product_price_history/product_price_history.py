@@ -0,0 +1,27 @@
+from ...database import db
+from datetime import datetime, timezone
+
+
+class ProductPriceHistory(db.Model):
+    __tablename__ = "product_price_history"
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
+    price = db.Column(db.Numeric(15, 2), nullable=False)
+    # Momento desde el que rige el precio; sigue vigente hasta la siguiente fila del producto
+    valid_from = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        # Precio vigente a una fecha: última fila del producto con valid_from anterior
+        db.Index("ix_product_price_history_product_valid_from", "product_id", "valid_from"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "product_id": self.product_id,
+            "price": float(self.price) if self.price is not None else None,
+            "valid_from": self.valid_from.isoformat() if self.valid_from else None,
+        }
@@ -33,6 +33,26 @@ class ProductTransaction(db.Model):
     )
     app_user = db.relationship("AppUser", backref="product_transactions")
 
+    __table_args__ = (
+        # Soporta la paginación por keyset sobre (transaction_date, id)
+        db.Index("ix_product_transaction_date_id", "transaction_date", "id"),
+        # Soportan los filtros de reportes por rango de fechas
+        db.Index(
+            "ix_product_transaction_branch_date", "branch_id", "transaction_date"
+        ),
+        db.Index(
+            "ix_product_transaction_product_date", "product_id", "transaction_date"
+        ),
+        db.Index(
+            "ix_product_transaction_type_date",
+            "transaction_type_id",
+            "transaction_date",
+        ),
+        db.Index(
+            "ix_product_transaction_supplier_date", "supplier_id", "transaction_date"
+        ),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
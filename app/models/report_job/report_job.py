@@ -0,0 +1,51 @@
+from ...database import db
+from datetime import datetime, timezone
+import json
+
+
+class ReportJob(db.Model):
+    __tablename__ = "report_job"
+
+    id = db.Column(db.String(36), primary_key=True)
+    format = db.Column(db.String(10), nullable=False)
+    parameters = db.Column(db.Text, nullable=False)
+    params_hash = db.Column(db.String(64), nullable=False)
+    # Versiones de las tablas que lee el reporte al encolar (TableVersionService.get_etag)
+    data_version = db.Column(db.String(255), nullable=False)
+    status = db.Column(
+        db.Enum("PENDING", "RUNNING", "DONE", "FAILED", name="report_job_status"),
+        nullable=False,
+        default="PENDING",
+    )
+    file_path = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (
+        db.Index("ix_report_job_cache", "params_hash", "data_version"),
+        db.Index("ix_report_job_expires_at", "expires_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "format": self.format,
+            "parameters": json.loads(self.parameters),
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at,
+            "expires_at": self.expires_at,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
@@ -0,0 +1,23 @@
+from ...database import db
+from datetime import datetime, timezone
+
+
+class TableVersion(db.Model):
+    __tablename__ = "table_version"
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    # Aumenta en cada escritura de la tabla; forma parte del ETag de sus listados
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    def to_dict(self):
+        return {
+            "table_name": self.table_name,
+            "version": self.version,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -1,12 +1,14 @@
 from flask import Blueprint, jsonify
 from ...services.branch.branch_service import BranchService
 from ...services.log.log_service import LogService
+from ...utils.conditional_get import conditional_get
 from utils.decorators import jwt_required_custom
 
 branch_bp = Blueprint("branch", __name__, url_prefix="/branches")
 
 
 @branch_bp.route("/", methods=["GET"])
+@conditional_get("branch")
 def get_branches():
 
     try:
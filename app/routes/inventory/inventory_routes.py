@@ -1,7 +1,19 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context, current_app
 from ...services.inventory.inventory_service import InventoryService
+from ...services.inventory_snapshot.inventory_snapshot_service import (
+    InventorySnapshotService,
+)
+from ...services.inventory_change.inventory_change_service import (
+    InventoryChangeService,
+)
+from ...services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+    BulkTransactionError,
+)
 from ...services.log.log_service import LogService
+from ...utils.date_conversor import parse_transaction_date
 from flask_cors import CORS
+from ...utils.conditional_get import conditional_get
 from utils.decorators import jwt_required_custom
 
 inventory_bp = Blueprint("inventory", __name__, url_prefix="/inventories")
@@ -10,6 +22,7 @@ CORS(inventory_bp)
 
 
 @inventory_bp.route("/", methods=["GET"])
+@conditional_get("inventory", "product")
 def get_inventories():
     try:
         branch_id = request.args.get("branch_id", type=int)
@@ -33,6 +46,7 @@ def get_inventories():
 
 @inventory_bp.route("/levels", methods=["GET"])
 @jwt_required_custom
+@conditional_get("inventory", "product")
 def get_inventories_with_levels():
     try:
         branch_id = request.args.get("branch_id", type=int)
@@ -54,6 +68,135 @@ def get_inventories_with_levels():
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+@inventory_bp.route("/as-of", methods=["GET"])
+@jwt_required_custom
+def get_inventories_as_of():
+    """
+    Stock por producto y sede al final del día indicado en 'date'.
+    Acepta los filtros opcionales branch_id y product_id.
+    """
+    try:
+        if not request.args.get("date"):
+            return jsonify({"ok": False, "error": "El parámetro 'date' es obligatorio"}), 400
+
+        as_of = parse_transaction_date(request.args.get("date")).date()
+        branch_id = request.args.get("branch_id", type=int)
+        product_id = request.args.get("product_id", type=int)
+
+        inventories = InventorySnapshotService.get_inventories_as_of(
+            as_of, branch_id=branch_id, product_id=product_id
+        )
+
+        return jsonify({"ok": True, "date": as_of.isoformat(), "inventories": inventories}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{get_inventories_as_of.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@inventory_bp.route("/changes", methods=["GET"])
+@jwt_required_custom
+def get_inventory_changes():
+    """
+    Inventarios modificados después del cursor 'since'. Acepta el filtro opcional
+    branch_id; sin 'since' entrega todo por páginas y luego los cambios.
+    """
+    try:
+        since = request.args.get("since")
+        limit = request.args.get("limit", type=int)
+        branch_id = request.args.get("branch_id", type=int)
+
+        changes = InventoryService.get_inventory_changes(
+            since=since, limit=limit, branch_id=branch_id
+        )
+
+        return jsonify({"ok": True, **changes}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{get_inventory_changes.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@inventory_bp.route("/stream", methods=["GET"])
+@jwt_required_custom
+def stream_inventory_changes():
+    """
+    Server-Sent Events con la cantidad y el nivel de stock de cada inventario
+    que cambia en la sede 'branch_id' (todas si no se indica). Al reconectar,
+    el encabezado Last-Event-ID repone los eventos perdidos.
+    """
+    try:
+        branch_id = request.args.get("branch_id", type=int)
+        last_event_id = request.headers.get("Last-Event-ID", type=int)
+
+        return Response(
+            stream_with_context(
+                InventoryChangeService.stream_events(
+                    current_app._get_current_object(), branch_id, last_event_id
+                )
+            ),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{stream_inventory_changes.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@inventory_bp.route("/transfer", methods=["POST"])
+@jwt_required_custom
+def create_inventory_transfer():
+    """
+    Traslada stock entre sedes en una sola operación (todo o nada).
+    Body: {"from_branch_id", "to_branch_id", "out_transaction_type_id",
+    "in_transaction_type_id", "app_user_id", "description", "transaction_date",
+    "lines": [{"product_id", "quantity", "unit_price"}, ...]}
+    """
+    try:
+        transfer = ProductTransactionService.create_inventory_transfer(
+            request.json or {}
+        )
+
+        return jsonify({"ok": True, "transfer": transfer}), 201
+
+    except BulkTransactionError as e:
+        return jsonify({"ok": False, "error": str(e), "errors": e.errors}), 400
+
+    except (ValueError, TypeError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{create_inventory_transfer.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @inventory_bp.route("/<id_inventory>", methods=["GET"])
 @jwt_required_custom
 def get_inventory_by_id(id_inventory):
@@ -1,6 +1,13 @@
 from flask import Blueprint, jsonify, request
 from ...services.product.product_service import ProductService
+from ...services.product_search.product_search_service import ProductSearchService
+from ...services.product_import.product_import_service import ProductImportService
+from ...services.product_price_history.product_price_history_service import (
+    ProductPriceHistoryService,
+)
 from ...services.log.log_service import LogService
+from ...utils.date_conversor import parse_transaction_date
+from ...utils.conditional_get import conditional_get
 from utils.decorators import jwt_required_custom, role_required
 
 product_bp = Blueprint("product", __name__, url_prefix="/products")
@@ -8,6 +15,7 @@ product_bp = Blueprint("product", __name__, url_prefix="/products")
 
 @product_bp.route("/", methods=["GET"])
 @jwt_required_custom
+@conditional_get("product")
 def get_products():
     try:
         products = ProductService.get_all_products()
@@ -42,6 +50,42 @@ def create_product():
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+@product_bp.route("/import", methods=["POST"])
+@role_required([1])
+def import_products():
+    """
+    Carga masiva de productos desde un archivo .xlsx o .csv enviado en el campo
+    'file' con columnas name, size, price, description e is_active (opcional).
+    Devuelve el resultado de cada fila: created, restored o error.
+    """
+    try:
+        file = request.files.get("file")
+
+        if file is None or not file.filename:
+            return (
+                jsonify(
+                    {"ok": False, "error": "Se debe enviar el archivo en el campo 'file'"}
+                ),
+                400,
+            )
+
+        report = ProductImportService.import_products(file.stream, file.filename)
+
+        return jsonify({"ok": True, **report}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{import_products.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @product_bp.route("/<id_product>", methods=["DELETE"])
 @role_required([1])
 def delete_product(id_product):
@@ -71,6 +115,106 @@ def delete_product(id_product):
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+@product_bp.route("/search", methods=["GET"])
+@jwt_required_custom
+def search_products():
+    """
+    Busca productos activos por prefijo o subcadena en nombre, tamaño y descripción.
+    Devuelve los 'limit' mejores resultados (20 por defecto) ordenados por relevancia.
+    """
+    try:
+        query = request.args.get("q", "")
+        limit = request.args.get("limit", type=int)
+
+        products = ProductSearchService.search_products(query, limit)
+
+        return jsonify({"ok": True, "products": products}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{search_products.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@product_bp.route("/changes", methods=["GET"])
+@jwt_required_custom
+def get_product_changes():
+    """
+    Productos creados, modificados o eliminados después del cursor 'since'.
+    Sin 'since' entrega todo el catálogo por páginas de 'limit'.
+    """
+    try:
+        since = request.args.get("since")
+        limit = request.args.get("limit", type=int)
+
+        changes = ProductService.get_product_changes(since=since, limit=limit)
+
+        return jsonify({"ok": True, **changes}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{get_product_changes.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@product_bp.route("/prices/as-of", methods=["GET"])
+@jwt_required_custom
+def get_prices_as_of():
+    """
+    Precio vigente de cada producto al final del día indicado en 'date'.
+    Acepta 'product_ids' separados por coma; sin él devuelve todo el catálogo.
+    """
+    try:
+        if not request.args.get("date"):
+            return jsonify({"ok": False, "error": "El parámetro 'date' es obligatorio"}), 400
+
+        as_of = parse_transaction_date(request.args.get("date")).date()
+        product_ids = None
+
+        if request.args.get("product_ids"):
+            try:
+                product_ids = sorted(
+                    {int(value) for value in request.args["product_ids"].split(",")}
+                )
+            except ValueError:
+                raise ValueError("'product_ids' debe ser una lista de ids separados por coma")
+
+            if len(product_ids) > ProductPriceHistoryService.MAX_PRODUCT_IDS:
+                raise ValueError(
+                    f"No se pueden consultar más de {ProductPriceHistoryService.MAX_PRODUCT_IDS} productos"
+                )
+
+        prices = ProductPriceHistoryService.get_prices_as_of(as_of, product_ids)
+
+        return jsonify({"ok": True, "date": as_of.isoformat(), "prices": prices}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{get_prices_as_of.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @product_bp.route("/<id_product>", methods=["GET"])
 @jwt_required_custom
 def get_product(id_product):
@@ -83,9 +227,9 @@ def get_product(id_product):
                 400,
             )
 
-        product = ProductService.get_product_by_id(id_product)
+        product = ProductService.get_product_data_by_id(id_product)
 
-        return jsonify({"ok": True, "product": product.to_dict()}), 200
+        return jsonify({"ok": True, "product": product}), 200
 
     except ValueError as e:
         return jsonify({"ok": False, "error": str(e)}), 404
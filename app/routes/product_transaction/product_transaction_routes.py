@@ -1,8 +1,22 @@
-from flask import Blueprint, jsonify, request, send_file
+from flask import (
+    Blueprint,
+    jsonify,
+    request,
+    send_file,
+    Response,
+    stream_with_context,
+    current_app,
+)
+from flask_jwt_extended import get_jwt
+from sqlalchemy.exc import IntegrityError
 from ...services.log.log_service import LogService
 from ...services.product_transaction.product_transaction_service import (
     ProductTransactionService,
+    BulkTransactionError,
 )
+from ...services.report_job.report_job_service import ReportJobService
+from ...services.idempotency.idempotency_service import IdempotencyService
+from ...services.daily_movement.daily_movement_service import DailyMovementService
 from utils.decorators import jwt_required_custom, role_required
 
 product_transaction_bp = Blueprint(
@@ -14,14 +28,59 @@ product_transaction_bp = Blueprint(
 @role_required([1])
 def get_product_trasanctions():
     try:
-        product_transactions = ProductTransactionService.get_all_products_transactions()
+        limit = request.args.get("limit", type=int)
+        after = request.args.get("after")
+        filters = ProductTransactionService.parse_transaction_filters(request.args)
 
-        return jsonify({"ok": True, "product_transactions": product_transactions}), 200
+        page = ProductTransactionService.get_products_transactions_page(
+            limit=limit, after=after, filters=filters
+        )
+
+        return (
+            jsonify(
+                {
+                    "ok": True,
+                    "product_transactions": page["product_transactions"],
+                    "next_cursor": page["next_cursor"],
+                }
+            ),
+            200,
+        )
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)} ), 500
 
 
+@product_transaction_bp.route("/summary", methods=["GET"])
+@role_required([1])
+def get_product_transactions_summary():
+    """
+    Unidades de entrada y salida por día, producto y sede, leídas del acumulado diario.
+    Acepta los filtros from, to, branch_id y product_id.
+    """
+    try:
+        filters = ProductTransactionService.parse_transaction_filters(request.args)
+
+        summary = DailyMovementService.get_daily_summary(filters)
+
+        return jsonify({"ok": True, "summary": summary}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{get_product_transactions_summary.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @product_transaction_bp.route("/<id_product_transaction>", methods=["GET"])
 @role_required([1])
 def get_product_transaction(id_product_transaction):
@@ -52,12 +111,53 @@ def create_product_transaction():
 
     try:
         product_transaction = request.json
+        idempotency_key = request.headers.get("Idempotency-Key")
+        # Las claves se guardan por usuario: la misma clave de otro usuario es otra petición
+        user_id = get_jwt().get("user_id")
+
+        if idempotency_key is not None:
+            IdempotencyService.validate_key(idempotency_key)
 
-        new_product_transaction = (
-            ProductTransactionService.create_product_transaction_service(
-                product_transaction
+            if not user_id:
+                return jsonify({"ok": False, "error": "No se pudo identificar al usuario"}), 401
+
+            stored_response = _get_stored_response(
+                user_id, idempotency_key, product_transaction
             )
-        )
+
+            if stored_response is not None:
+                return stored_response
+
+        try:
+            new_product_transaction = (
+                ProductTransactionService.create_product_transaction_service(
+                    product_transaction,
+                    idempotency_key=idempotency_key,
+                    idempotency_user_id=user_id,
+                )
+            )
+
+        except IntegrityError:
+            # Otra petición con la misma clave se registró primero: se devuelve su resultado
+            stored_response = (
+                _get_stored_response(user_id, idempotency_key, product_transaction)
+                if idempotency_key
+                else None
+            )
+
+            if stored_response is None:
+                raise
+
+            return stored_response
+
+        if idempotency_key:
+            # Se responde con el cuerpo guardado: el reintento recibe los mismos bytes
+            stored_response = _get_stored_response(
+                user_id, idempotency_key, product_transaction
+            )
+
+            if stored_response is not None:
+                return stored_response
 
         return jsonify({"ok": True, "product_transaction": new_product_transaction.to_dict()}), 201
 
@@ -74,14 +174,66 @@ def create_product_transaction():
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+def _get_stored_response(user_id, idempotency_key, product_transaction):
+
+    stored = IdempotencyService.get_stored_response(
+        user_id,
+        idempotency_key,
+        ProductTransactionService.IDEMPOTENCY_ENDPOINT,
+        product_transaction,
+    )
+
+    if stored is None:
+        return None
+
+    return current_app.response_class(
+        stored["body"], status=stored["status_code"], mimetype="application/json"
+    )
+
+
+@product_transaction_bp.route("/bulk", methods=["POST"])
+@jwt_required_custom
+def create_product_transactions_bulk():
+    """
+    Registra un lote de transacciones en una sola operación (todo o nada).
+    Body: {"transactions": [ ...misma estructura que POST /product-transactions/... ]}
+    """
+    try:
+        data = request.json or {}
+
+        product_transactions = ProductTransactionService.create_product_transactions_bulk(
+            data.get("transactions")
+        )
+
+        return jsonify({"ok": True, "product_transactions": product_transactions}), 201
+
+    except BulkTransactionError as e:
+        return jsonify({"ok": False, "error": str(e), "errors": e.errors}), 400
+
+    except (ValueError, TypeError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{create_product_transactions_bulk.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
 @product_transaction_bp.route("/report/excel", methods=["GET"])
 @role_required([1])
 def download_excel_report():
     """
-    Endpoint para descargar el reporte de todas las transacciones en formato Excel
+    Endpoint para descargar el reporte de transacciones en formato Excel.
+    Acepta los filtros from, to, branch_id, product_id, transaction_type_id y supplier_id.
     """
     try:
-        excel_file = ProductTransactionService.generate_excel_report()
+        filters = ProductTransactionService.parse_transaction_filters(request.args)
+
+        excel_file = ProductTransactionService.generate_excel_report(filters)
 
         return send_file(
             excel_file,
@@ -90,6 +242,9 @@ def download_excel_report():
             download_name='reporte_transacciones_productos.xlsx'
         )
 
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
     except Exception as e:
         LogService.create_log(
             {
@@ -98,3 +253,112 @@ def download_excel_report():
             }
         )
         return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@product_transaction_bp.route("/report/csv", methods=["GET"])
+@role_required([1])
+def download_csv_report():
+    """
+    Endpoint para descargar el reporte de transacciones en formato CSV.
+    Acepta los mismos filtros que el reporte Excel y se envía por bloques.
+    """
+    try:
+        filters = ProductTransactionService.parse_transaction_filters(request.args)
+
+        return Response(
+            stream_with_context(ProductTransactionService.iter_csv_report(filters)),
+            mimetype="text/csv",
+            headers={
+                "Content-Disposition": "attachment; filename=reporte_transacciones_productos.csv"
+            },
+        )
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{download_csv_report.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@product_transaction_bp.route("/reports", methods=["POST"])
+@role_required([1])
+def create_report_job():
+    """
+    Encola la generación de un reporte en segundo plano.
+    Body: {"format": "excel" | "csv", "filters": {from, to, branch_id, ...}}
+    """
+    try:
+        data = request.json or {}
+
+        job = ReportJobService.enqueue_report(
+            data.get("format", "excel"), data.get("filters") or {}
+        )
+
+        return jsonify({"ok": True, "report_job": job.to_dict()}), 202
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{create_report_job.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@product_transaction_bp.route("/reports/<job_id>", methods=["GET"])
+@role_required([1])
+def get_report_job(job_id):
+
+    try:
+        job = ReportJobService.get_report_job_by_id(job_id)
+
+        return jsonify({"ok": True, "report_job": job.to_dict()}), 200
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 404
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{get_report_job.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+@product_transaction_bp.route("/reports/<job_id>/download", methods=["GET"])
+@role_required([1])
+def download_report_job(job_id):
+
+    try:
+        file_path, download_name, mimetype = ReportJobService.get_report_file(job_id)
+
+        return send_file(
+            file_path,
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=download_name,
+        )
+
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 404
+
+    except Exception as e:
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{download_report_job.__name__}",
+                "message": f"Exception error {str(e)}",
+            }
+        )
+        return jsonify({"ok": False, "error": str(e)}), 500
@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from ...services.supplier.supplier_service import SupplierService
 from ...services.log.log_service import LogService
 from flask_cors import CORS
+from ...utils.conditional_get import conditional_get
 from utils.decorators import jwt_required_custom, role_required
 
 supplier_bp = Blueprint("supplier", __name__, url_prefix="/suppliers")
@@ -11,6 +12,7 @@ CORS(supplier_bp)
 
 @supplier_bp.route("/", methods=["GET"])
 @jwt_required_custom
+@conditional_get("supplier")
 def get_suppliers():
 
     try:
@@ -3,6 +3,7 @@ from ...services.log.log_service import LogService
 from ...services.transaction_type.transaction_type_service import (
     TransactionTypeService,
 )
+from ...utils.conditional_get import conditional_get
 from utils.decorators import jwt_required_custom
 
 transaction_type_bp = Blueprint(
@@ -12,6 +13,7 @@ transaction_type_bp = Blueprint(
 
 @transaction_type_bp.route("/", methods=["GET"])
 @jwt_required_custom
+@conditional_get("transaction_type")
 def get_transaction_types():
     try:
         transaction_types = TransactionTypeService.get_all_transaction_types()
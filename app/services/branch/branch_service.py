@@ -1,5 +1,6 @@
 from ...models.branch.branch import Branch
 from ...services.log.log_service import LogService
+from ...utils.reference_cache import ReferenceCache
 
 
 class BranchService:
@@ -7,24 +8,30 @@ class BranchService:
     @staticmethod
     def get_all_branches():
 
-        branches = Branch.query.filter(Branch.deleted_at.is_(None)).all()
+        def load():
+            branches = Branch.query.filter(Branch.deleted_at.is_(None)).all()
 
-        return [branch.to_dict() for branch in branches]
+            return [branch.to_dict() for branch in branches]
+
+        return ReferenceCache.get_or_load("branch", "all", load)
 
     @staticmethod
     def get_branch_by_id(id_branch):
 
-        branch = Branch.query.filter(
-            Branch.deleted_at.is_(None), Branch.id == id_branch
-        ).first()
+        def load():
+            branch = Branch.query.filter(
+                Branch.deleted_at.is_(None), Branch.id == id_branch
+            ).first()
+
+            if branch is None:
+                LogService.create_log(
+                    {
+                        "module": f"{BranchService.__name__}.{BranchService.get_branch_by_id.__name__}",
+                        "message": "No se encontró la sede buscada por id",
+                    }
+                )
+                raise ValueError("No se encontró la sede")
 
-        if branch is None:
-            LogService.create_log(
-                {
-                    "module": f"{BranchService.__name__}.{BranchService.get_branch_by_id.__name__}",
-                    "message": "No se encontró la sede buscada por id",
-                }
-            )
-            raise ValueError("No se encontró la sede")
+            return branch.to_dict()
 
-        return branch.to_dict()
+        return ReferenceCache.get_or_load("branch", int(id_branch), load)
@@ -0,0 +1,187 @@
+from ...models.daily_movement.daily_movement import DailyMovement
+from ...models.product_transaction.product_transaction import ProductTransaction
+from ...models.transaction_type.transaction_type import TransactionType
+from ...services.inventory.inventory_service import InventoryService
+from ...services.log.log_service import LogService
+from ...database import db
+from ...utils.upsert import upsert_increment
+from ...utils.unit_of_work import UnitOfWork
+from datetime import datetime, time, timedelta
+from sqlalchemy import case, func, insert, select
+
+
+class DailyMovementService:
+
+    # La reconstrucción avanza por ventanas para no mantener bloqueos largos
+    REBUILD_WINDOW_DAYS = 31
+
+    SUMMARY_FILTERS = ("from", "to", "branch_id", "product_id")
+
+    @staticmethod
+    def record_movements(movements):
+        """
+        Suma los movimientos al acumulado diario por (día, producto, sede) sin hacer
+        commit, para que quede en la misma transacción que el registro del ledger.
+        movements: dicts con transaction_date, product_id, branch_id, quantity y sign.
+        """
+        totals = {}
+
+        for movement in movements:
+            key = (
+                movement["transaction_date"].date(),
+                int(movement["product_id"]),
+                int(movement["branch_id"]),
+            )
+            total = totals.setdefault(
+                key, {"units_in": 0, "units_out": 0, "transactions_count": 0}
+            )
+
+            if movement["sign"] > 0:
+                total["units_in"] += movement["quantity"]
+            elif movement["sign"] < 0:
+                total["units_out"] += movement["quantity"]
+
+            total["transactions_count"] += 1
+
+        # Orden fijo de claves para que escrituras concurrentes bloqueen en el mismo orden
+        for (movement_date, product_id, branch_id) in sorted(totals):
+            upsert_increment(
+                DailyMovement,
+                {
+                    "movement_date": movement_date,
+                    "product_id": product_id,
+                    "branch_id": branch_id,
+                },
+                totals[(movement_date, product_id, branch_id)],
+            )
+
+    @staticmethod
+    def rebuild_daily_movements(from_date=None, to_date=None):
+        """
+        Recalcula el acumulado diario a partir del ledger entre from_date y to_date
+        (fechas inclusivas; por defecto todo el historial). Cada ventana se borra y
+        se vuelve a llenar con un INSERT ... SELECT en su propia transacción.
+        Devuelve la cantidad de ventanas procesadas.
+        """
+        first_date, last_date = db.session.query(
+            func.min(ProductTransaction.transaction_date),
+            func.max(ProductTransaction.transaction_date),
+        ).one()
+
+        if first_date is None and (from_date is None or to_date is None):
+            return 0
+
+        start = from_date or first_date.date()
+        end = to_date or last_date.date()
+
+        sign = InventoryService.quantity_sign_expression()
+        movement_date = func.date(ProductTransaction.transaction_date)
+
+        windows = 0
+        window_start = start
+
+        while window_start <= end:
+            window_end = min(
+                window_start + timedelta(days=DailyMovementService.REBUILD_WINDOW_DAYS - 1),
+                end,
+            )
+
+            def rebuild_window():
+                DailyMovement.query.filter(
+                    DailyMovement.movement_date >= window_start,
+                    DailyMovement.movement_date <= window_end,
+                ).delete(synchronize_session=False)
+
+                aggregated = (
+                    select(
+                        movement_date,
+                        ProductTransaction.product_id,
+                        ProductTransaction.branch_id,
+                        func.sum(case((sign > 0, ProductTransaction.quantity), else_=0)),
+                        func.sum(case((sign < 0, ProductTransaction.quantity), else_=0)),
+                        func.count(ProductTransaction.id),
+                    )
+                    .join(
+                        TransactionType,
+                        ProductTransaction.transaction_type_id == TransactionType.id,
+                    )
+                    .where(
+                        ProductTransaction.transaction_date
+                        >= datetime.combine(window_start, time.min),
+                        ProductTransaction.transaction_date
+                        < datetime.combine(window_end + timedelta(days=1), time.min),
+                    )
+                    .group_by(
+                        movement_date,
+                        ProductTransaction.product_id,
+                        ProductTransaction.branch_id,
+                    )
+                )
+
+                db.session.execute(
+                    insert(DailyMovement).from_select(
+                        [
+                            "movement_date",
+                            "product_id",
+                            "branch_id",
+                            "units_in",
+                            "units_out",
+                            "transactions_count",
+                        ],
+                        aggregated,
+                    )
+                )
+
+            UnitOfWork.run("rebuild_daily_movements", rebuild_window)
+
+            windows += 1
+            window_start = window_end + timedelta(days=1)
+
+        LogService.create_log(
+            {
+                "module": f"{DailyMovementService.__name__}.{DailyMovementService.rebuild_daily_movements.__name__}",
+                "message": f"Se reconstruyó el acumulado diario entre {start} y {end} ({windows} ventanas)",
+            }
+        )
+
+        return windows
+
+    @staticmethod
+    def get_daily_summary(filters=None):
+        """
+        Devuelve las unidades de entrada y salida por día, producto y sede leyendo
+        solo la tabla de acumulados. Acepta los filtros from, to, branch_id y product_id.
+        """
+        filters = filters or {}
+
+        unsupported = [
+            key for key in filters if key not in DailyMovementService.SUMMARY_FILTERS
+        ]
+
+        if unsupported:
+            raise ValueError(
+                f"El resumen no admite los filtros: {', '.join(unsupported)}"
+            )
+
+        query = DailyMovement.query
+
+        if "from" in filters:
+            query = query.filter(DailyMovement.movement_date >= filters["from"].date())
+
+        if "to" in filters:
+            # 'to' llega como límite exclusivo (día siguiente al indicado)
+            query = query.filter(DailyMovement.movement_date < filters["to"].date())
+
+        if "branch_id" in filters:
+            query = query.filter(DailyMovement.branch_id == filters["branch_id"])
+
+        if "product_id" in filters:
+            query = query.filter(DailyMovement.product_id == filters["product_id"])
+
+        movements = query.order_by(
+            DailyMovement.movement_date,
+            DailyMovement.product_id,
+            DailyMovement.branch_id,
+        ).all()
+
+        return [movement.to_dict() for movement in movements]
@@ -0,0 +1,119 @@
+from ...models.idempotency_key.idempotency_key import IdempotencyKey
+from ...services.log.log_service import LogService
+from ...database import db
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+import hashlib
+import json
+import os
+
+
+class IdempotencyService:
+
+    KEY_TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24)))
+    # Largo de la columna idempotency_key.key
+    MAX_KEY_LENGTH = 255
+
+    @staticmethod
+    def validate_key(key):
+        """Valida el header Idempotency-Key antes de usarlo"""
+        if not key.strip() or len(key) > IdempotencyService.MAX_KEY_LENGTH:
+            raise ValueError(
+                f"El header Idempotency-Key debe tener entre 1 y {IdempotencyService.MAX_KEY_LENGTH} caracteres"
+            )
+
+    @staticmethod
+    def _hash_payload(payload):
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def get_stored_response(app_user_id, key, endpoint, payload):
+        """
+        Devuelve la respuesta guardada para la clave del usuario como
+        {"body", "status_code"}, o None si la clave no se ha usado (o ya expiró).
+        Es una sola consulta por índice único y no escribe: las claves expiradas
+        las elimina delete_expired_keys o la siguiente escritura con esa clave.
+        """
+        record = IdempotencyKey.query.filter(
+            IdempotencyKey.app_user_id == app_user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.endpoint == endpoint,
+            IdempotencyKey.expires_at > datetime.now(timezone.utc).replace(tzinfo=None),
+        ).first()
+
+        if record is None:
+            return None
+
+        if record.request_hash != IdempotencyService._hash_payload(payload):
+            LogService.create_log(
+                {
+                    "module": f"{IdempotencyService.__name__}.{IdempotencyService.get_stored_response.__name__}",
+                    "message": f"Se reutilizó la clave de idempotencia {key} con un contenido distinto",
+                }
+            )
+            raise ValueError(
+                "La clave de idempotencia ya se usó con una petición diferente"
+            )
+
+        return {"body": record.response_body, "status_code": record.status_code}
+
+    @staticmethod
+    def build_record(app_user_id, key, endpoint, payload, body, status_code):
+        """
+        Crea el registro de la clave con la respuesta serializada. Se agrega a la
+        sesión de quien llama para guardarse en la misma transacción que la escritura.
+        Si la clave ya existía pero expiró, se reemplaza.
+        """
+        IdempotencyKey.query.filter(
+            IdempotencyKey.app_user_id == app_user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.endpoint == endpoint,
+            IdempotencyKey.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None),
+        ).delete(synchronize_session=False)
+
+        record = IdempotencyKey(
+            app_user_id=app_user_id,
+            key=key,
+            endpoint=endpoint,
+            request_hash=IdempotencyService._hash_payload(payload),
+            status_code=status_code,
+            # El mismo cuerpo que produce jsonify para que la respuesta repetida sea idéntica
+            response_body=current_app.json.response(body).get_data(as_text=True),
+            expires_at=datetime.now(timezone.utc) + IdempotencyService.KEY_TTL,
+        )
+
+        db.session.add(record)
+
+        return record
+
+    @staticmethod
+    def delete_expired_keys():
+        """
+        Elimina las claves de idempotencia expiradas.
+        Se ejecuta automáticamente mediante APScheduler.
+        """
+        try:
+            deleted = IdempotencyKey.query.filter(
+                IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+            ).delete(synchronize_session=False)
+
+            db.session.commit()
+
+            if deleted > 0:
+                LogService.create_log(
+                    {
+                        "module": f"{IdempotencyService.__name__}.{IdempotencyService.delete_expired_keys.__name__}",
+                        "message": f"Se eliminaron {deleted} claves de idempotencia expiradas",
+                    }
+                )
+
+        except Exception as e:
+            db.session.rollback()
+            LogService.create_log(
+                {
+                    "module": f"{IdempotencyService.__name__}.{IdempotencyService.delete_expired_keys.__name__}",
+                    "message": f"Error al eliminar claves de idempotencia expiradas: {str(e)}",
+                }
+            )
@@ -1,45 +1,223 @@
 from ...models.inventory.inventory import Inventory
+from ...models.product.product import Product
+from ...models.inventory_change.inventory_change import InventoryChange
 from ...database import db
-from sqlalchemy import func
+from ...models.transaction_type.transaction_type import TransactionType
+from ...services.table_version.table_version_service import TableVersionService
+from ...utils.cursor import encode_log_cursor, decode_log_cursor
+from ...utils.delta_sync import (
+    GAP_TIMEOUT_SECONDS,
+    get_log_page,
+    start_log_position,
+    validate_limit,
+)
+from ...utils.reference_cache import ReferenceCache
+from ...utils.upsert import upsert_expressions
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, update, case, or_, insert, select, literal, tuple_
+import os
+import time
 
 
 class InventoryService:
 
+    DEFAULT_MAX_CAPACITY = 100
+    LOW_STOCK_THRESHOLD = 50
+    # Tiempo que se conservan las filas de inventory_change (stream y /changes)
+    CHANGE_RETENTION = timedelta(
+        hours=int(os.getenv("INVENTORY_CHANGE_RETENTION_HOURS", 24))
+    )
+
     @staticmethod
-    def _create_inventory(inventory):
-        # ... (código existente) ...
-        inventoryExists = InventoryService.get_inventory_by_product_and_branch(
-            inventory["product_id"], inventory["branch_id"]
+    def _add_to_inventory(product_id, branch_id, quantity):
+        """
+        Suma quantity al inventario del producto en la sede creándolo si no existe,
+        en una sola sentencia: dos entradas concurrentes que crean el mismo
+        inventario no duplican la fila, la segunda suma sobre la primera. Una fila
+        eliminada se restaura con quantity. No hace commit.
+        """
+        now = datetime.now(timezone.utc)
+
+        upsert_expressions(
+            Inventory,
+            {"product_id": product_id, "branch_id": branch_id},
+            {"quantity": quantity},
+            {
+                # Antes que deleted_at: en MySQL cada asignación ve las anteriores
+                "quantity": case(
+                    (Inventory.deleted_at.is_(None), Inventory.quantity + quantity),
+                    else_=quantity,
+                ),
+                "deleted_at": None,
+                "updated_at": now,
+            },
         )
 
-        if inventoryExists:
-            raise ValueError(
-                f"El inventario para el producto con ID {inventory['product_id']} en la sede con ID {inventory['branch_id']} ya existe."
+    @staticmethod
+    def _inventory_rows_statement(*extra_columns):
+        """
+        SELECT de Core que une inventario y producto y devuelve filas planas, sin
+        construir objetos del ORM ni cargar el producto de forma diferida por fila.
+        """
+        return (
+            select(
+                Inventory.id,
+                Inventory.product_id,
+                Product.name.label("product_name"),
+                Product.price,
+                Product.size.label("product_size"),
+                Inventory.branch_id,
+                Inventory.quantity,
+                Inventory.created_at,
+                *extra_columns,
             )
-
-        new_inventory = Inventory(
-            product_id=inventory["product_id"],
-            branch_id=inventory["branch_id"],
-            quantity=0,
+            .select_from(Inventory)
+            .outerjoin(Product, Inventory.product_id == Product.id)
         )
 
-        db.session.add(new_inventory)
-
-        return new_inventory
+    @staticmethod
+    def _serialize_inventory_row(row):
+        # Mismo formato que Inventory.to_dict
+        return {
+            "id": row.id,
+            "product_id": row.product_id,
+            "product_name": row.product_name,
+            "price": row.price,
+            "product_size": row.product_size,
+            "branch_id": row.branch_id,
+            "quantity": float(row.quantity) if row.quantity is not None else None,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+        }
 
     @staticmethod
     def get_all_inventories(branch_id=None, product_id=None):
-        # ... (código existente) ...
-        query = Inventory.query.filter(Inventory.deleted_at.is_(None))
+        """Lista los inventarios activos con los datos del producto en un solo SELECT"""
+        statement = (
+            InventoryService._inventory_rows_statement()
+            .where(Inventory.deleted_at.is_(None))
+            .order_by(Inventory.id)
+        )
 
         if branch_id:
-            query = query.filter(Inventory.branch_id == branch_id)
+            statement = statement.where(Inventory.branch_id == branch_id)
 
         if product_id:
-            query = query.filter(Inventory.product_id == product_id)
+            statement = statement.where(Inventory.product_id == product_id)
+
+        return [
+            InventoryService._serialize_inventory_row(row)
+            for row in db.session.execute(statement)
+        ]
+
+    @staticmethod
+    def get_inventory_changes(since=None, limit=None, branch_id=None):
+        """
+        Inventarios modificados después del cursor 'since', con el cursor para la
+        siguiente llamada. Sin 'since' primero entrega todo el inventario por
+        páginas y después los cambios ocurridos desde que empezó la carga.
+        Los cambios salen de inventory_change, que se escribe en la misma
+        transacción del ledger; su id es la posición del cursor.
+        """
+        limit = validate_limit(limit)
+        now = time.time()
+
+        if since:
+            log_id, gaps, issued_at, listing_after = decode_log_cursor(since)
+
+            # Los cambios posteriores al cursor pueden haberse eliminado ya
+            if (
+                now - issued_at + GAP_TIMEOUT_SECONDS
+                >= InventoryService.CHANGE_RETENTION.total_seconds()
+            ):
+                raise ValueError(
+                    "El cursor de sincronización expiró; se debe sincronizar de nuevo sin 'since'"
+                )
+        else:
+            log_id, gaps = start_log_position(InventoryChange)
+            issued_at, listing_after = now, 0
+
+        if listing_after is not None:
+            return InventoryService._get_inventory_listing_page(
+                log_id, gaps, issued_at, listing_after, limit, branch_id
+            )
+
+        statement = (
+            select(
+                InventoryChange.id.label("log_id"),
+                Inventory.id,
+                Inventory.product_id,
+                Product.name.label("product_name"),
+                Product.price,
+                Product.size.label("product_size"),
+                Inventory.branch_id,
+                InventoryChange.quantity,
+                Inventory.created_at,
+                InventoryChange.changed_at.label("updated_at"),
+                Inventory.deleted_at,
+            )
+            .select_from(InventoryChange)
+            .join(
+                Inventory,
+                and_(
+                    Inventory.product_id == InventoryChange.product_id,
+                    Inventory.branch_id == InventoryChange.branch_id,
+                ),
+            )
+            .outerjoin(Product, Inventory.product_id == Product.id)
+        )
+
+        if branch_id:
+            statement = statement.where(InventoryChange.branch_id == branch_id)
+
+        page = get_log_page(statement, InventoryChange, log_id, gaps, limit)
+
+        return {
+            "inventories": [
+                InventoryService._serialize_inventory_change(row) for row in page["rows"]
+            ],
+            "next_cursor": encode_log_cursor(page["position"], page["gaps"], now),
+            "has_more": page["has_more"],
+        }
+
+    @staticmethod
+    def _get_inventory_listing_page(log_id, gaps, issued_at, listing_after, limit, branch_id):
+        """Página de la carga inicial: el inventario actual ordenado por id"""
+        statement = InventoryService._inventory_rows_statement(
+            Inventory.updated_at, Inventory.deleted_at
+        ).where(Inventory.id > listing_after)
+
+        if branch_id:
+            statement = statement.where(Inventory.branch_id == branch_id)
+
+        rows = db.session.execute(
+            statement.order_by(Inventory.id).limit(limit + 1)
+        ).all()
+
+        if len(rows) > limit:
+            next_cursor = encode_log_cursor(log_id, gaps, issued_at, rows[limit - 1].id)
+        else:
+            # Los huecos del inicio se esperan desde el final de la carga: una
+            # transacción que estaba en curso aún puede hacer commit
+            now = time.time()
+            next_cursor = encode_log_cursor(
+                log_id, {gap_id: now for gap_id in gaps}, issued_at
+            )
 
-        inventories = query.all()
-        return [inventory.to_dict() for inventory in inventories]
+        return {
+            "inventories": [
+                InventoryService._serialize_inventory_change(row) for row in rows[:limit]
+            ],
+            "next_cursor": next_cursor,
+            # Al terminar la carga quedan los cambios ocurridos mientras tanto
+            "has_more": True,
+        }
+
+    @staticmethod
+    def _serialize_inventory_change(row):
+        inventory = InventoryService._serialize_inventory_row(row)
+        inventory["updated_at"] = row.updated_at.isoformat()
+        inventory["deleted"] = row.deleted_at is not None
+        return inventory
 
     @staticmethod
     def get_inventory_by_product_and_branch(id_product, id_branch):
@@ -54,49 +232,211 @@ class InventoryService:
 
     @staticmethod
     def update_inventory(product_transaction, transaction_type):
-        # ... (código existente) ...
-        inventory = InventoryService.get_inventory_by_product_and_branch(
-            product_transaction["product_id"], product_transaction["branch_id"]
+        """
+        Aplica la transacción al inventario con un único UPDATE condicional, sin
+        leer la fila antes: la resta solo ocurre si hay stock suficiente, así dos
+        ventas concurrentes no pueden pisarse ni dejar el stock negativo.
+        """
+        sign = InventoryService.get_quantity_sign(transaction_type)
+        quantity = product_transaction["quantity"]
+
+        inventory_filters = (
+            Inventory.deleted_at.is_(None),
+            Inventory.product_id == product_transaction["product_id"],
+            Inventory.branch_id == product_transaction["branch_id"],
         )
 
-        if not inventory:
-            if (
-                transaction_type["direction"] == "IN"
-                or transaction_type["name"] == "ajuste positivo"
-            ):
-                inventory = InventoryService._create_inventory(
-                    {
-                        "product_id": product_transaction["product_id"],
-                        "branch_id": product_transaction["branch_id"],
-                    }
+        if sign < 0:
+            result = db.session.execute(
+                update(Inventory)
+                .where(*inventory_filters, Inventory.quantity >= quantity)
+                .values(quantity=Inventory.quantity - quantity),
+                execution_options={"synchronize_session": False},
+            )
+
+            if result.rowcount == 0:
+                # Solo en el caso de error se consulta la fila para dar el motivo exacto
+                if not InventoryService.get_inventory_by_product_and_branch(
+                    product_transaction["product_id"], product_transaction["branch_id"]
+                ):
+                    raise ValueError("No existe inventario para este producto en esta sede")
+
+                raise ValueError("No hay suficiente stock en el inventario")
+
+            InventoryService._inventory_changed(
+                [(product_transaction["product_id"], product_transaction["branch_id"])]
+            )
+            return
+
+        if sign > 0:
+            result = db.session.execute(
+                update(Inventory)
+                .where(*inventory_filters)
+                .values(quantity=Inventory.quantity + quantity),
+                execution_options={"synchronize_session": False},
+            )
+
+            if result.rowcount == 0:
+                InventoryService._add_to_inventory(
+                    product_transaction["product_id"],
+                    product_transaction["branch_id"],
+                    quantity,
                 )
-            else:
-                raise ValueError("No existe inventario para este producto en esta sede")
 
-        inventory.quantity = InventoryService.adjust_quantity(
-            transaction_type, product_transaction, inventory.quantity
-        )
+            InventoryService._inventory_changed(
+                [(product_transaction["product_id"], product_transaction["branch_id"])]
+            )
+            return
 
-        db.session.add(inventory)
+        if not InventoryService.get_inventory_by_product_and_branch(
+            product_transaction["product_id"], product_transaction["branch_id"]
+        ):
+            raise ValueError("No existe inventario para este producto en esta sede")
 
     @staticmethod
-    def adjust_quantity(transaction_type, product_transaction, quantity):
-        # ... (código existente) ...
+    def get_quantity_sign(transaction_type):
+        """
+        Devuelve -1 si el tipo de transacción descuenta stock, 1 si lo suma y 0 si no lo afecta.
+        """
         if (
             transaction_type["direction"] == "OUT"
             or transaction_type["name"] == "ajuste negativo"
         ):
-            if quantity < product_transaction["quantity"]:
-                raise ValueError("No hay suficiente stock en el inventario")
-            quantity -= product_transaction["quantity"]
+            return -1
 
-        elif (
+        if (
             transaction_type["direction"] == "IN"
             or transaction_type["name"] == "ajuste positivo"
         ):
-            quantity += product_transaction["quantity"]
+            return 1
 
-        return quantity
+        return 0
+
+    @staticmethod
+    def quantity_sign_expression():
+        """
+        Equivalente SQL de get_quantity_sign sobre las columnas de transaction_type,
+        para agregar el ledger en la base de datos.
+        """
+        return case(
+            (
+                or_(
+                    TransactionType.direction == "OUT",
+                    TransactionType.name == "ajuste negativo",
+                ),
+                -1,
+            ),
+            (
+                or_(
+                    TransactionType.direction == "IN",
+                    TransactionType.name == "ajuste positivo",
+                ),
+                1,
+            ),
+            else_=0,
+        )
+
+    @staticmethod
+    def apply_inventory_deltas(deltas):
+        """
+        Aplica cambios de cantidad agregados por (product_id, branch_id) sin hacer commit.
+        Bloquea las filas involucradas con una sola consulta y devuelve un diccionario
+        {(product_id, branch_id): error} con las claves que no se pudieron aplicar;
+        si hay errores no se modifica ningún inventario.
+        """
+        if not deltas:
+            return {}
+
+        product_ids = {product_id for product_id, _ in deltas}
+        branch_ids = {branch_id for _, branch_id in deltas}
+
+        inventories = (
+            Inventory.query.filter(
+                Inventory.deleted_at.is_(None),
+                Inventory.product_id.in_(product_ids),
+                Inventory.branch_id.in_(branch_ids),
+            )
+            .order_by(Inventory.id)
+            .with_for_update()
+            .all()
+        )
+
+        inventories_map = {
+            (inventory.product_id, inventory.branch_id): inventory
+            for inventory in inventories
+        }
+
+        errors = {}
+        new_quantities = {}
+
+        for key in sorted(deltas):
+            inventory = inventories_map.get(key)
+            current_quantity = inventory.quantity if inventory else 0
+
+            if inventory is None and deltas[key] < 0:
+                errors[key] = "No existe inventario para este producto en esta sede"
+            elif current_quantity + deltas[key] < 0:
+                errors[key] = "No hay suficiente stock en el inventario"
+            else:
+                new_quantities[key] = current_quantity + deltas[key]
+
+        if errors:
+            return errors
+
+        for key, quantity in new_quantities.items():
+            inventory = inventories_map.get(key)
+
+            if inventory is None:
+                # Sin fila bloqueada: otra transacción puede crearla a la vez
+                InventoryService._add_to_inventory(key[0], key[1], deltas[key])
+            else:
+                inventory.quantity = quantity
+
+        InventoryService._inventory_changed(new_quantities)
+
+        return errors
+
+    @staticmethod
+    def _inventory_changed(keys):
+        """
+        Mantiene lo que depende de la cantidad de inventario para las claves
+        (product_id, branch_id) modificadas, dentro de la misma transacción.
+        """
+        keys = sorted(set(keys))
+
+        InventoryService._record_inventory_changes(keys)
+
+        if keys:
+            TableVersionService.bump("inventory")
+
+    @staticmethod
+    def _record_inventory_changes(keys):
+        """
+        Registra la cantidad resultante de cada inventario modificado con un
+        INSERT ... SELECT. Como queda en la misma transacción, los workers que leen
+        inventory_change solo ven los cambios que ya hicieron commit.
+        """
+        if not keys:
+            return
+
+        db.session.flush()
+
+        db.session.execute(
+            insert(InventoryChange).from_select(
+                ["product_id", "branch_id", "quantity", "changed_at"],
+                select(
+                    Inventory.product_id,
+                    Inventory.branch_id,
+                    Inventory.quantity,
+                    literal(datetime.now(timezone.utc), InventoryChange.changed_at.type),
+                )
+                .where(
+                    Inventory.deleted_at.is_(None),
+                    tuple_(Inventory.product_id, Inventory.branch_id).in_(keys),
+                )
+                .order_by(Inventory.product_id, Inventory.branch_id),
+            )
+        )
 
     @staticmethod
     def get_inventory_by_id(id_inventory):
@@ -125,20 +465,69 @@ class InventoryService:
         return percentage
         
     @staticmethod
-    def _get_max_quantity_by_product():
-        
-        max_quantities = db.session.query(
-            Inventory.product_id, 
-            func.max(Inventory.quantity).label('max_q')
-        ).filter(
-            Inventory.deleted_at.is_(None)
-        ).group_by(
-            Inventory.product_id
-        ).all()
-        
-        max_map = {item.product_id: item.max_q for item in max_quantities}
-        
-        return max_map
+    def compute_stock_levels(quantities, max_capacities, threshold=LOW_STOCK_THRESHOLD):
+        """
+        Calcula en una sola pasada por columnas lo mismo que _calculate_stock_percentage
+        y _get_average_if_low_stock fila por fila. Recibe dos listas paralelas y
+        devuelve (porcentajes, capacidades usadas, niveles ajustados).
+        """
+        # La capacidad usada es al menos la cantidad actual
+        capacities_used = list(map(max, max_capacities, quantities))
+
+        percentages = [
+            min(100, round((quantity / (capacity if capacity > 1 else 1)) * 100))
+            for quantity, capacity in zip(quantities, capacities_used)
+        ]
+
+        adjusted_levels = [
+            round((percentage + 10) / 2) if quantity < threshold else percentage
+            for quantity, percentage in zip(quantities, percentages)
+        ]
+
+        return percentages, capacities_used, adjusted_levels
+
+    @staticmethod
+    def _get_max_quantity_by_product(product_ids):
+        """
+        Capacidad máxima (mayor cantidad entre sedes) solo de los productos pedidos.
+        Se calcula al leer con el índice (product_id, deleted_at, quantity): una
+        búsqueda por producto, sin recorrer la tabla ni escribir nada.
+        """
+        product_ids = sorted(set(product_ids))
+
+        if not product_ids:
+            return {}
+
+        return dict(
+            db.session.execute(
+                select(Inventory.product_id, func.max(Inventory.quantity))
+                .where(
+                    Inventory.deleted_at.is_(None),
+                    Inventory.product_id.in_(product_ids),
+                )
+                .group_by(Inventory.product_id)
+            ).all()
+        )
+
+    @staticmethod
+    def _get_all_max_quantities():
+        """
+        Capacidad máxima de todos los productos, para los niveles sin filtros. Se
+        guarda en la caché del proceso y se descarta cuando cambia la versión de
+        'inventory' (que se incrementa después del commit), así el GROUP BY sobre
+        toda la tabla no se repite en cada consulta.
+        """
+
+        def load():
+            return dict(
+                db.session.execute(
+                    select(Inventory.product_id, func.max(Inventory.quantity))
+                    .where(Inventory.deleted_at.is_(None))
+                    .group_by(Inventory.product_id)
+                ).all()
+            )
+
+        return ReferenceCache.get_or_load("inventory", "max_quantities", load)
 
     # --- NUEVAS FUNCIONES DE STOCK LEVEL (REQUERIDAS POR EL FRONTEND) ---
     
@@ -149,30 +538,31 @@ class InventoryService:
         Esta función es la que llama tu frontend.
         """
         inventories_data = InventoryService.get_all_inventories(branch_id, product_id)
-        
-        max_quantities_map = InventoryService._get_max_quantity_by_product()
-
-        DEFAULT_MAX_CAPACITY = 100 
-
-        for item in inventories_data:
-            current_quantity = item["quantity"]
-            product_id = item["product_id"]
-            
-            max_capacity = max_quantities_map.get(product_id, DEFAULT_MAX_CAPACITY)
-            
-            # Asegura que la capacidad máxima usada sea al menos la cantidad actual
-            max_capacity = max(max_capacity, current_quantity)
-            
-            percentage = InventoryService._calculate_stock_percentage(
-                current_quantity, max_capacity
+
+        if branch_id is None and product_id is None:
+            max_quantities_map = InventoryService._get_all_max_quantities()
+        else:
+            max_quantities_map = InventoryService._get_max_quantity_by_product(
+                item["product_id"] for item in inventories_data
             )
+
+        quantities = [item["quantity"] for item in inventories_data]
+        max_capacities = [
+            max_quantities_map.get(item["product_id"], InventoryService.DEFAULT_MAX_CAPACITY)
+            for item in inventories_data
+        ]
+
+        percentages, capacities_used, adjusted_levels = (
+            InventoryService.compute_stock_levels(quantities, max_capacities)
+        )
+
+        for item, percentage, max_capacity, adjusted in zip(
+            inventories_data, percentages, capacities_used, adjusted_levels
+        ):
             item["stock_percentage_real"] = percentage
             item["max_capacity_used"] = max_capacity
-            
-            item["stock_level_adjusted"] = InventoryService._get_average_if_low_stock(
-                percentage, current_quantity
-            )
-            
+            item["stock_level_adjusted"] = adjusted
+
         return inventories_data
 
     # --- FUNCIÓN get_inventory_percentage (TU FUNCIÓN REUBICADA) ---
@@ -0,0 +1,317 @@
+from ...models.inventory_change.inventory_change import InventoryChange
+from ...services.inventory.inventory_service import InventoryService
+from ...services.log.log_service import LogService
+from ...database import db
+from ...utils.delta_sync import GAP_TIMEOUT_SECONDS
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, or_
+import json
+import os
+import queue
+import threading
+import time
+
+
+class InventoryChangeService:
+
+    POLL_INTERVAL_SECONDS = float(os.getenv("INVENTORY_STREAM_POLL_SECONDS", 1))
+    HEARTBEAT_SECONDS = 15
+    RETENTION = InventoryService.CHANGE_RETENTION
+
+    # Ids saltados que aún pueden aparecer (transacciones que hicieron commit en otro orden)
+    GAP_TIMEOUT_SECONDS = GAP_TIMEOUT_SECONDS
+    BATCH_SIZE = 500
+    REPLAY_LIMIT = 1000
+    SUBSCRIBER_QUEUE_SIZE = 1000
+
+    # Estado del pub/sub de este proceso: una cola por conexión abierta
+    _subscribers = {}
+    _lock = threading.Lock()
+    _poller = None
+    _cursor = None
+    _gaps = {}
+
+    @staticmethod
+    def subscribe(app, branch_id=None):
+        """
+        Registra una cola que recibirá los eventos de la sede (o de todas si es None)
+        y arranca el hilo lector de inventory_change si no está corriendo.
+        """
+        subscriber = queue.Queue(maxsize=InventoryChangeService.SUBSCRIBER_QUEUE_SIZE)
+
+        with InventoryChangeService._lock:
+            InventoryChangeService._subscribers[subscriber] = branch_id
+
+            if InventoryChangeService._poller is None:
+                InventoryChangeService._poller = threading.Thread(
+                    target=InventoryChangeService._poll_loop,
+                    args=(app,),
+                    name="inventory-change-poller",
+                    daemon=True,
+                )
+                InventoryChangeService._poller.start()
+
+        return subscriber
+
+    @staticmethod
+    def unsubscribe(subscriber):
+        with InventoryChangeService._lock:
+            InventoryChangeService._subscribers.pop(subscriber, None)
+
+    @staticmethod
+    def _poll_loop(app):
+        """
+        Lee los cambios nuevos de la tabla y los reparte a las colas suscritas.
+        Termina cuando no queda ninguna conexión abierta en el proceso.
+        """
+        with app.app_context():
+            while True:
+                with InventoryChangeService._lock:
+                    if not InventoryChangeService._subscribers:
+                        InventoryChangeService._poller = None
+                        InventoryChangeService._cursor = None
+                        InventoryChangeService._gaps = {}
+                        return
+
+                try:
+                    changes = InventoryChangeService._fetch_new_changes()
+
+                    if changes:
+                        InventoryChangeService._publish(
+                            InventoryChangeService._build_events(changes)
+                        )
+
+                except Exception as e:
+                    LogService.create_log(
+                        {
+                            "module": f"{InventoryChangeService.__name__}.{InventoryChangeService._poll_loop.__name__}",
+                            "message": f"Error al leer los cambios de inventario: {str(e)}",
+                        }
+                    )
+
+                finally:
+                    # Libera la conexión entre lecturas y evita ver un snapshot viejo
+                    db.session.remove()
+
+                time.sleep(InventoryChangeService.POLL_INTERVAL_SECONDS)
+
+    @staticmethod
+    def _fetch_new_changes():
+        """
+        Devuelve los cambios posteriores al cursor del proceso. Los ids que quedan
+        saltados se vuelven a consultar durante GAP_TIMEOUT_SECONDS, porque una
+        transacción con id menor puede hacer commit después de una con id mayor.
+        """
+        if InventoryChangeService._cursor is None:
+            # Solo interesan los cambios desde que se abrió la primera conexión
+            InventoryChangeService._cursor = (
+                db.session.query(func.max(InventoryChange.id)).scalar() or 0
+            )
+            return []
+
+        now = time.monotonic()
+        InventoryChangeService._gaps = {
+            change_id: seen_at
+            for change_id, seen_at in InventoryChangeService._gaps.items()
+            if now - seen_at < InventoryChangeService.GAP_TIMEOUT_SECONDS
+        }
+
+        condition = InventoryChange.id > InventoryChangeService._cursor
+
+        if InventoryChangeService._gaps:
+            condition = or_(
+                condition, InventoryChange.id.in_(InventoryChangeService._gaps)
+            )
+
+        changes = (
+            InventoryChange.query.filter(condition)
+            .order_by(InventoryChange.id)
+            .limit(InventoryChangeService.BATCH_SIZE)
+            .all()
+        )
+
+        for change in changes:
+            InventoryChangeService._gaps.pop(change.id, None)
+
+            for missing_id in range(InventoryChangeService._cursor + 1, change.id):
+                InventoryChangeService._gaps[missing_id] = now
+
+            InventoryChangeService._cursor = max(
+                InventoryChangeService._cursor, change.id
+            )
+
+        return changes
+
+    @staticmethod
+    def _build_events(changes):
+        """Serializa los cambios con los mismos campos de nivel que /inventories/levels"""
+        events = [change.to_dict() for change in changes]
+
+        max_quantities_map = InventoryService._get_max_quantity_by_product(
+            event["product_id"] for event in events
+        )
+
+        percentages, capacities_used, adjusted_levels = (
+            InventoryService.compute_stock_levels(
+                [event["quantity"] for event in events],
+                [
+                    max_quantities_map.get(
+                        event["product_id"], InventoryService.DEFAULT_MAX_CAPACITY
+                    )
+                    for event in events
+                ],
+            )
+        )
+
+        for event, percentage, max_capacity, adjusted in zip(
+            events, percentages, capacities_used, adjusted_levels
+        ):
+            event["stock_percentage_real"] = percentage
+            event["max_capacity_used"] = max_capacity
+            event["stock_level_adjusted"] = adjusted
+
+        return events
+
+    @staticmethod
+    def _publish(events):
+
+        with InventoryChangeService._lock:
+            subscribers = list(InventoryChangeService._subscribers.items())
+
+        for subscriber, branch_id in subscribers:
+            for event in events:
+                if branch_id and event["branch_id"] != branch_id:
+                    continue
+
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # Cliente demasiado lento: se cierra su conexión y al reconectar
+                    # recupera lo perdido con Last-Event-ID
+                    InventoryChangeService.unsubscribe(subscriber)
+
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+
+                    subscriber.put_nowait(None)
+                    break
+
+    @staticmethod
+    def get_changes_since(last_event_id, branch_id=None):
+        """
+        Cambios con id mayor a last_event_id, para reponer una conexión que se cortó.
+        Devuelve (eventos, completo); si hay más de REPLAY_LIMIT no se devuelve
+        ninguno y completo es False: el cliente debe volver a cargar todo.
+        """
+        query = InventoryChange.query.filter(InventoryChange.id > last_event_id)
+
+        if branch_id:
+            query = query.filter(InventoryChange.branch_id == branch_id)
+
+        changes = (
+            query.order_by(InventoryChange.id)
+            .limit(InventoryChangeService.REPLAY_LIMIT + 1)
+            .all()
+        )
+
+        if len(changes) > InventoryChangeService.REPLAY_LIMIT:
+            return [], False
+
+        return (InventoryChangeService._build_events(changes) if changes else []), True
+
+    @staticmethod
+    def _format_event(event):
+        return f"id: {event['id']}\nevent: inventory\ndata: {json.dumps(event)}\n\n"
+
+    @staticmethod
+    def _format_resync():
+        """
+        Evento que pide al cliente recargar /inventories/levels porque no se pueden
+        reponer todos los cambios. Su id avanza Last-Event-ID hasta el último cambio.
+        """
+        last_id = db.session.query(func.max(InventoryChange.id)).scalar() or 0
+
+        return f"id: {last_id}\nevent: resync\ndata: {json.dumps({'last_id': last_id})}\n\n"
+
+    @staticmethod
+    def stream_events(app, branch_id=None, last_event_id=None):
+        """
+        Generador de Server-Sent Events con los cambios de inventario de la sede.
+        Si el cliente reconecta con Last-Event-ID, primero repone lo que se perdió.
+        """
+        subscriber = InventoryChangeService.subscribe(app, branch_id)
+
+        try:
+            # Ids ya enviados al reponer. El lector también puede entregarlos (se
+            # suscribió antes), pero un id menor que haga commit tarde sí se envía
+            replayed_ids = set()
+
+            if last_event_id is not None:
+                events, complete = InventoryChangeService.get_changes_since(
+                    last_event_id, branch_id
+                )
+
+                if not complete:
+                    yield InventoryChangeService._format_resync()
+
+                for event in events:
+                    replayed_ids.add(event["id"])
+                    yield InventoryChangeService._format_event(event)
+
+            # La conexión a la base no se necesita mientras se esperan eventos
+            db.session.close()
+
+            yield ": conectado\n\n"
+
+            while True:
+                try:
+                    event = subscriber.get(
+                        timeout=InventoryChangeService.HEARTBEAT_SECONDS
+                    )
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is None:
+                    return
+
+                # Evita repetir lo que ya se envió al reponer; el lector entrega cada id una vez
+                if event["id"] in replayed_ids:
+                    replayed_ids.discard(event["id"])
+                    continue
+
+                yield InventoryChangeService._format_event(event)
+
+        finally:
+            InventoryChangeService.unsubscribe(subscriber)
+
+    @staticmethod
+    def delete_old_changes():
+        """
+        Elimina los cambios de inventario más antiguos que la retención configurada.
+        Se ejecuta automáticamente mediante APScheduler.
+        """
+        try:
+            deleted = InventoryChange.query.filter(
+                InventoryChange.changed_at
+                <= datetime.now(timezone.utc) - InventoryChangeService.RETENTION
+            ).delete(synchronize_session=False)
+
+            db.session.commit()
+
+            if deleted > 0:
+                LogService.create_log(
+                    {
+                        "module": f"{InventoryChangeService.__name__}.{InventoryChangeService.delete_old_changes.__name__}",
+                        "message": f"Se eliminaron {deleted} cambios de inventario antiguos",
+                    }
+                )
+
+        except Exception as e:
+            db.session.rollback()
+            LogService.create_log(
+                {
+                    "module": f"{InventoryChangeService.__name__}.{InventoryChangeService.delete_old_changes.__name__}",
+                    "message": f"Error al eliminar cambios de inventario antiguos: {str(e)}",
+                }
+            )
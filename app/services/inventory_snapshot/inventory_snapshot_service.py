@@ -0,0 +1,432 @@
+from ...models.inventory_snapshot.inventory_snapshot import InventorySnapshot
+from ...models.inventory.inventory import Inventory
+from ...models.daily_movement.daily_movement import DailyMovement
+from ...models.backdated_movement.backdated_movement import BackdatedMovement
+from ...services.product_price_history.product_price_history_service import (
+    ProductPriceHistoryService,
+)
+from ...services.log.log_service import LogService
+from ...database import db
+from ...utils.unit_of_work import UnitOfWork
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+import os
+
+
+class InventorySnapshotService:
+    """
+    Cierres diarios de stock por producto y sede. Las fechas son de negocio
+    (transaction_date, la misma del acumulado daily_movement): una transacción
+    registrada hoy con fecha de ayer cuenta en el cierre de ayer.
+    """
+
+    CENTS = Decimal("0.01")
+    # Claves con movimientos atrasados que se corrigen por transacción
+    REPAIR_CHUNK_SIZE = int(os.getenv("INVENTORY_SNAPSHOT_REPAIR_CHUNK_SIZE", 500))
+
+    @staticmethod
+    def _net_movements_statement(*conditions):
+        """Unidades netas (entradas - salidas) por (producto, sede) del acumulado diario"""
+        return (
+            select(
+                DailyMovement.product_id,
+                DailyMovement.branch_id,
+                func.sum(DailyMovement.units_in - DailyMovement.units_out),
+            )
+            .where(*conditions)
+            .group_by(DailyMovement.product_id, DailyMovement.branch_id)
+        )
+
+    @staticmethod
+    def _begin_consistent_read():
+        """
+        Inicia la transacción con REPEATABLE READ en MySQL y PostgreSQL: el
+        inventario y el acumulado diario se leen en el mismo estado sin bloquear
+        filas, porque el ledger escribe ambos en la misma transacción. En SQLite
+        cada transacción ya ve un estado fijo.
+        """
+        if db.session.get_bind().dialect.name in ("mysql", "postgresql"):
+            db.session.connection(
+                execution_options={"isolation_level": "REPEATABLE READ"}
+            )
+
+    @staticmethod
+    def take_snapshot(snapshot_date=None):
+        """
+        Guarda el cierre del día snapshot_date (ayer por defecto): la cantidad actual
+        de cada inventario menos los movimientos con fecha posterior, leídos en una
+        sola transacción sin bloquear el inventario. Después corrige los cierres que
+        dejaron viejos los movimientos con fecha atrasada. Se ejecuta
+        automáticamente mediante APScheduler en cada worker; solo el primero escribe
+        el cierre y los demás lo omiten. Devuelve True si se guardó.
+        """
+        snapshot_date = snapshot_date or date.today() - timedelta(days=1)
+
+        # Un día abierto aún recibe movimientos que no se registran como atrasados
+        if snapshot_date >= date.today():
+            raise ValueError("Solo se puede guardar el cierre de un día que ya terminó")
+
+        taken_at = datetime.now(timezone.utc)
+
+        def write_snapshot():
+            InventorySnapshotService._begin_consistent_read()
+
+            already_taken = db.session.execute(
+                select(InventorySnapshot.id)
+                .where(InventorySnapshot.snapshot_date == snapshot_date)
+                .limit(1)
+            ).first()
+
+            if already_taken is not None:
+                return False
+
+            quantities = {
+                (product_id, branch_id): quantity
+                for product_id, branch_id, quantity in db.session.execute(
+                    select(
+                        Inventory.product_id, Inventory.branch_id, Inventory.quantity
+                    ).where(Inventory.deleted_at.is_(None))
+                )
+            }
+
+            for product_id, branch_id, units in db.session.execute(
+                InventorySnapshotService._net_movements_statement(
+                    DailyMovement.movement_date > snapshot_date
+                )
+            ):
+                key = (product_id, branch_id)
+                quantities[key] = quantities.get(key, 0) - int(units or 0)
+
+            if quantities:
+                db.session.execute(
+                    insert(InventorySnapshot),
+                    [
+                        {
+                            "snapshot_date": snapshot_date,
+                            "taken_at": taken_at,
+                            "product_id": product_id,
+                            "branch_id": branch_id,
+                            "quantity": quantity,
+                        }
+                        for (product_id, branch_id), quantity in sorted(
+                            quantities.items()
+                        )
+                    ],
+                )
+
+            return True
+
+        written = False
+
+        try:
+            # Termina cualquier lectura previa para que el cierre parta de un estado nuevo
+            db.session.commit()
+            written = UnitOfWork.run("take_inventory_snapshot", write_snapshot)
+
+            if written:
+                print(f"[APScheduler] Snapshot de inventario guardado: {snapshot_date.isoformat()}")
+
+        except IntegrityError:
+            # Otro worker guardó el mismo cierre entre la verificación y el INSERT
+            pass
+
+        except Exception as e:
+            LogService.create_log(
+                {
+                    "module": f"{InventorySnapshotService.__name__}.{InventorySnapshotService.take_snapshot.__name__}",
+                    "message": f"Error al guardar el snapshot de inventario del {snapshot_date.isoformat()}: {str(e)}",
+                }
+            )
+            return False
+
+        InventorySnapshotService.repair_backdated_snapshots()
+
+        return written
+
+    @staticmethod
+    def record_backdated_movements(movements):
+        """
+        Anota, sin hacer commit y en la misma transacción del ledger, los
+        movimientos con fecha de un día ya terminado: los cierres de ese día en
+        adelante pueden haberse guardado sin ellos. Solo es un INSERT, sin leer
+        ni bloquear los cierres; la corrección la hace el job nocturno y, mientras
+        tanto, get_inventories_as_of calcula esas claves desde el inventario actual.
+        movements: dicts con transaction_date, product_id y branch_id.
+        """
+        today = date.today()
+
+        keys = sorted(
+            {
+                (
+                    movement["transaction_date"].date(),
+                    int(movement["product_id"]),
+                    int(movement["branch_id"]),
+                )
+                for movement in movements
+                if movement["transaction_date"].date() < today
+            }
+        )
+
+        if keys:
+            db.session.execute(
+                insert(BackdatedMovement),
+                [
+                    {
+                        "movement_date": movement_date,
+                        "product_id": product_id,
+                        "branch_id": branch_id,
+                    }
+                    for movement_date, product_id, branch_id in keys
+                ],
+            )
+
+    @staticmethod
+    def repair_backdated_snapshots():
+        """
+        Recalcula los cierres de las claves con movimientos atrasados pendientes,
+        por bloques de REPAIR_CHUNK_SIZE claves con una transacción corta cada uno.
+        Cada cierre se vuelve a calcular desde el inventario y el acumulado diario
+        leídos en el mismo estado, así da igual si el movimiento ya estaba incluido.
+        Devuelve la cantidad de movimientos atrasados procesados.
+        """
+        processed = 0
+
+        try:
+            while True:
+                pending = db.session.execute(
+                    select(
+                        BackdatedMovement.id,
+                        BackdatedMovement.movement_date,
+                        BackdatedMovement.product_id,
+                        BackdatedMovement.branch_id,
+                    )
+                    .order_by(BackdatedMovement.id)
+                    .limit(InventorySnapshotService.REPAIR_CHUNK_SIZE)
+                ).all()
+                db.session.commit()
+
+                if not pending:
+                    break
+
+                UnitOfWork.run(
+                    "repair_backdated_snapshots",
+                    lambda: InventorySnapshotService._repair_chunk(pending),
+                )
+                processed += len(pending)
+
+        except Exception as e:
+            db.session.rollback()
+            LogService.create_log(
+                {
+                    "module": f"{InventorySnapshotService.__name__}.{InventorySnapshotService.repair_backdated_snapshots.__name__}",
+                    "message": f"Error al corregir los cierres por movimientos atrasados después de {processed}: {str(e)}",
+                }
+            )
+
+        return processed
+
+    @staticmethod
+    def _repair_chunk(pending):
+        InventorySnapshotService._begin_consistent_read()
+
+        # Día más antiguo afectado por clave
+        since_dates = {}
+
+        for _, movement_date, product_id, branch_id in pending:
+            key = (product_id, branch_id)
+            since_dates[key] = min(since_dates.get(key, movement_date), movement_date)
+
+        keys = sorted(since_dates)
+        first_date = min(since_dates.values())
+
+        snapshot_dates = db.session.execute(
+            select(InventorySnapshot.snapshot_date, func.min(InventorySnapshot.taken_at))
+            .where(InventorySnapshot.snapshot_date >= first_date)
+            .group_by(InventorySnapshot.snapshot_date)
+            .order_by(InventorySnapshot.snapshot_date)
+        ).all()
+
+        if snapshot_dates:
+            current = InventorySnapshotService._current_quantities(keys)
+            daily = InventorySnapshotService._daily_net_movements(keys, first_date)
+            rows = []
+
+            for key in keys:
+                for snapshot_date, taken_at in snapshot_dates:
+                    if snapshot_date < since_dates[key]:
+                        continue
+
+                    rows.append(
+                        {
+                            "snapshot_date": snapshot_date,
+                            "taken_at": taken_at,
+                            "product_id": key[0],
+                            "branch_id": key[1],
+                            "quantity": current.get(key, 0)
+                            - sum(
+                                units
+                                for movement_date, units in daily.get(key, ())
+                                if movement_date > snapshot_date
+                            ),
+                        }
+                    )
+
+            # Reemplaza los cierres de esas claves desde el día afectado
+            for key in keys:
+                db.session.execute(
+                    delete(InventorySnapshot).where(
+                        InventorySnapshot.product_id == key[0],
+                        InventorySnapshot.branch_id == key[1],
+                        InventorySnapshot.snapshot_date >= since_dates[key],
+                    )
+                )
+
+            if rows:
+                db.session.execute(insert(InventorySnapshot), rows)
+
+        db.session.execute(
+            delete(BackdatedMovement).where(
+                BackdatedMovement.id.in_([row[0] for row in pending])
+            )
+        )
+
+    @staticmethod
+    def _current_quantities(keys):
+        """Cantidad actual de cada inventario (product_id, branch_id) indicado"""
+        return {
+            (product_id, branch_id): quantity
+            for product_id, branch_id, quantity in db.session.execute(
+                select(Inventory.product_id, Inventory.branch_id, Inventory.quantity).where(
+                    Inventory.deleted_at.is_(None),
+                    tuple_(Inventory.product_id, Inventory.branch_id).in_(keys),
+                )
+            )
+        }
+
+    @staticmethod
+    def _daily_net_movements(keys, after_date):
+        """{(product_id, branch_id): [(día, unidades netas)]} de los días desde after_date"""
+        movements = {}
+
+        for movement_date, product_id, branch_id, units in db.session.execute(
+            select(
+                DailyMovement.movement_date,
+                DailyMovement.product_id,
+                DailyMovement.branch_id,
+                DailyMovement.units_in - DailyMovement.units_out,
+            ).where(
+                DailyMovement.movement_date >= after_date,
+                tuple_(DailyMovement.product_id, DailyMovement.branch_id).in_(keys),
+            )
+        ):
+            movements.setdefault((product_id, branch_id), []).append(
+                (movement_date, int(units or 0))
+            )
+
+        return movements
+
+    @staticmethod
+    def get_inventories_as_of(as_of, branch_id=None, product_id=None):
+        """
+        Reconstruye el stock al final del día 'as_of' (fecha de negocio) partiendo
+        del cierre más cercano anterior o igual y sumando solo los días posteriores
+        del acumulado diario, sin recorrer el ledger. Las claves con movimientos
+        atrasados que el job nocturno aún no corrigió se calculan desde el
+        inventario actual restando los días posteriores a 'as_of'.
+        """
+        filters = []
+        movement_filters = []
+        backdated_filters = []
+
+        if branch_id:
+            filters.append(InventorySnapshot.branch_id == branch_id)
+            movement_filters.append(DailyMovement.branch_id == branch_id)
+            backdated_filters.append(BackdatedMovement.branch_id == branch_id)
+
+        if product_id:
+            filters.append(InventorySnapshot.product_id == product_id)
+            movement_filters.append(DailyMovement.product_id == product_id)
+            backdated_filters.append(BackdatedMovement.product_id == product_id)
+
+        previous_date = (
+            db.session.query(func.max(InventorySnapshot.snapshot_date))
+            .filter(InventorySnapshot.snapshot_date <= as_of)
+            .scalar()
+        )
+
+        quantities = {}
+
+        if previous_date is not None:
+            for snapshot in InventorySnapshot.query.filter(
+                InventorySnapshot.snapshot_date == previous_date, *filters
+            ):
+                quantities[(snapshot.product_id, snapshot.branch_id)] = snapshot.quantity
+
+            movement_filters.append(DailyMovement.movement_date > previous_date)
+
+        for movement_product_id, movement_branch_id, units in db.session.execute(
+            InventorySnapshotService._net_movements_statement(
+                DailyMovement.movement_date <= as_of, *movement_filters
+            )
+        ):
+            key = (movement_product_id, movement_branch_id)
+            quantities[key] = quantities.get(key, 0) + int(units or 0)
+
+        if previous_date is not None:
+            stale_keys = sorted(
+                db.session.execute(
+                    select(BackdatedMovement.product_id, BackdatedMovement.branch_id)
+                    .where(
+                        BackdatedMovement.movement_date <= previous_date,
+                        *backdated_filters,
+                    )
+                    .distinct()
+                ).all()
+            )
+
+            if stale_keys:
+                stale_keys = [tuple(key) for key in stale_keys]
+                current = InventorySnapshotService._current_quantities(stale_keys)
+                later = {
+                    (later_product_id, later_branch_id): int(units or 0)
+                    for later_product_id, later_branch_id, units in db.session.execute(
+                        InventorySnapshotService._net_movements_statement(
+                            DailyMovement.movement_date > as_of,
+                            tuple_(DailyMovement.product_id, DailyMovement.branch_id).in_(
+                                stale_keys
+                            ),
+                        )
+                    )
+                }
+
+                for key in stale_keys:
+                    quantities[key] = current.get(key, 0) - later.get(key, 0)
+
+        # Valorización en Decimal con el precio vigente a esa fecha, sin recorrer el ledger
+        prices = {}
+
+        if quantities:
+            prices = ProductPriceHistoryService.get_price_map_as_of(
+                as_of, product_ids=sorted({key[0] for key in quantities})
+            )
+
+        return [
+            {
+                "product_id": key[0],
+                "branch_id": key[1],
+                "quantity": quantity,
+                "unit_price": (
+                    prices[key[0]].quantize(InventorySnapshotService.CENTS)
+                    if key[0] in prices
+                    else None
+                ),
+                "value": (
+                    (prices[key[0]] * quantity).quantize(InventorySnapshotService.CENTS)
+                    if key[0] in prices
+                    else None
+                ),
+            }
+            for key, quantity in sorted(quantities.items())
+        ]
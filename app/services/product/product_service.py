@@ -3,9 +3,16 @@ from ...utils.validator import validate_data
 from ...utils.soft_delete_handler import SoftDeleteHandler
 from ...services.log.log_service import LogService
 from ...database import db
+from ...services.table_version.table_version_service import TableVersionService
+from ...services.product_search.product_search_service import ProductSearchService
+from ...services.product_price_history.product_price_history_service import (
+    ProductPriceHistoryService,
+)
 from decimal import Decimal
 from datetime import datetime, timezone
-from sqlalchemy import and_
+from ...utils.delta_sync import get_changes_page
+from ...utils.reference_cache import ReferenceCache
+from sqlalchemy import and_, insert, select, tuple_, update
 
 
 class ProductService:
@@ -13,9 +20,26 @@ class ProductService:
     @staticmethod
     def get_all_products() -> list[dict]:
 
-        products = Product.query.filter(Product.deleted_at.is_(None)).all()
+        def load():
+            products = Product.query.filter(Product.deleted_at.is_(None)).all()
 
-        return [p.to_dict() for p in products]
+            return [p.to_dict() for p in products]
+
+        return ReferenceCache.get_or_load("product", "all", load)
+
+    @staticmethod
+    def get_product_changes(since=None, limit=None):
+        """
+        Productos creados, modificados o eliminados después del cursor 'since',
+        con el cursor para la siguiente llamada. Los eliminados traen deleted_at.
+        """
+        page = get_changes_page(select(Product), Product, since, limit, scalars=True)
+
+        return {
+            "products": [product.to_dict() for product in page["rows"]],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"],
+        }
 
     @staticmethod
     def create_product_service(product):
@@ -58,8 +82,10 @@ class ProductService:
         product_to_delete = ProductService.get_product_by_id(id_product)
 
         product_to_delete.deleted_at = datetime.now(timezone.utc)
+        product_to_delete.change_version = TableVersionService.next_version("product")
 
         db.session.commit()
+        ProductSearchService.index_product(product_to_delete)
 
         return True
 
@@ -81,12 +107,22 @@ class ProductService:
 
         return product
 
+    @staticmethod
+    def get_product_data_by_id(id_product):
+        """Versión de solo lectura de get_product_by_id, servida desde la caché de referencia"""
+        return ReferenceCache.get_or_load(
+            "product",
+            int(id_product),
+            lambda: ProductService.get_product_by_id(id_product).to_dict(),
+        )
+
     @staticmethod
     def update_product_by_id(id_product, data):
 
         product = ProductService.get_product_by_id(id_product)
 
         allowed_fields = ["name", "size", "price", "description", "is_active"]
+        previous_price = product.price
 
         for key, value in data.items():
             if key not in allowed_fields:
@@ -132,7 +168,12 @@ class ProductService:
                 )
                 raise ValueError("Ya existe otro producto con el mismo nombre y tamaño")
 
+        if product.price != previous_price:
+            ProductPriceHistoryService.record_prices([(product.id, product.price)])
+
+        product.change_version = TableVersionService.next_version("product")
         db.session.commit()
+        ProductSearchService.index_product(product)
 
         return product
 
@@ -151,7 +192,15 @@ class ProductService:
         existing_product.deleted_at = None
         # created_at se mantiene igual (cuándo se creó originalmente)
 
+        # El precio con el que vuelve rige desde la restauración
+        ProductPriceHistoryService.record_prices(
+            [(existing_product.id, existing_product.price)],
+            valid_from=existing_product.updated_at,
+        )
+
+        existing_product.change_version = TableVersionService.next_version("product")
         db.session.commit()
+        ProductSearchService.index_product(existing_product)
         return existing_product
 
     @staticmethod
@@ -165,9 +214,101 @@ class ProductService:
             price=price,
             description=product_data["description"],
             is_active=product_data.get("is_active", True),
+            change_version=TableVersionService.next_version("product"),
         )
 
         db.session.add(new_product)
+        db.session.flush()
+
+        ProductPriceHistoryService.record_prices(
+            [(new_product.id, new_product.price)], valid_from=new_product.created_at
+        )
+
         db.session.commit()
+        ProductSearchService.index_product(new_product)
+
+        return new_product
+
+    @staticmethod
+    def restore_deleted_products(restores):
+        """
+        Versión por lotes de restore_deleted_product para create_or_restore_many:
+        recibe [(id, datos)] y los restaura con un solo UPDATE. No hace commit.
+        """
+        now = datetime.now(timezone.utc)
+        version = TableVersionService.next_version("product")
+
+        db.session.execute(
+            update(Product),
+            [
+                {
+                    "id": product_id,
+                    "name": data["name"],
+                    "size": data["size"],
+                    "price": Decimal(data["price"]),
+                    "description": data["description"],
+                    "is_active": data.get("is_active", True),
+                    "updated_at": now,
+                    "deleted_at": None,
+                    "change_version": version,
+                }
+                for product_id, data in restores
+            ],
+        )
+        ProductPriceHistoryService.record_prices(
+            [(product_id, data["price"]) for product_id, data in restores],
+            valid_from=now,
+        )
+
+    @staticmethod
+    def create_fresh_products(products_data):
+        """
+        Versión por lotes de create_fresh_product para create_or_restore_many: un
+        INSERT para todos y una consulta para leer los ids, que el INSERT por lote no
+        devuelve en todos los motores. No hace commit.
+        """
+        now = datetime.now(timezone.utc)
+        version = TableVersionService.next_version("product")
+
+        db.session.execute(
+            insert(Product),
+            [
+                {
+                    "name": data["name"],
+                    "size": data["size"],
+                    "price": Decimal(data["price"]),
+                    "description": data["description"],
+                    "is_active": data.get("is_active", True),
+                    "created_at": now,
+                    "updated_at": now,
+                    "change_version": version,
+                }
+                for data in products_data
+            ],
+        )
+
+        keys = [(data["name"], data["size"]) for data in products_data]
+        created_ids = {
+            (name, size): product_id
+            for product_id, name, size in db.session.execute(
+                select(Product.id, Product.name, Product.size)
+                .where(
+                    Product.deleted_at.is_(None),
+                    tuple_(Product.name, Product.size).in_(keys),
+                )
+                .order_by(Product.id)
+            )
+        }
+
+        ids = [created_ids.get(key) for key in keys]
+
+        ProductPriceHistoryService.record_prices(
+            [
+                (product_id, data["price"])
+                for product_id, data in zip(ids, products_data)
+                if product_id is not None
+            ],
+            valid_from=now,
+        )
 
-        return new_product
\ No newline at end of file
+        return ids
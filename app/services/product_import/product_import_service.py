@@ -0,0 +1,287 @@
+from ...models.product.product import Product
+from ...services.log.log_service import LogService
+from ...services.product.product_service import ProductService
+from ...services.product_search.product_search_service import ProductSearchService
+from ...utils.soft_delete_handler import SoftDeleteHandler
+from ...utils.unit_of_work import UnitOfWork
+from decimal import Decimal, InvalidOperation
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+import csv
+import io
+import os
+import zipfile
+
+
+class ProductImportService:
+    """
+    Carga masiva del catálogo desde un archivo Excel (.xlsx) o CSV. El archivo se
+    lee fila a fila y se procesa por bloques de CHUNK_SIZE con
+    SoftDeleteHandler.create_or_restore_many: una consulta para encontrar los
+    (nombre, tamaño) ya registrados, sentencias por lote para crear y restaurar,
+    y un commit por bloque.
+    """
+
+    CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", 500))
+    ALLOWED_EXTENSIONS = (".xlsx", ".csv")
+
+    # Encabezados aceptados para cada campo (en minúsculas y sin espacios extremos)
+    COLUMNS = {
+        "name": ("name", "nombre"),
+        "size": ("size", "tamaño", "tamano"),
+        "price": ("price", "precio"),
+        "description": ("description", "descripción", "descripcion"),
+        "is_active": ("is_active", "activo"),
+    }
+    REQUIRED_COLUMNS = ("name", "size", "price", "description")
+
+    TRUE_VALUES = {"1", "true", "si", "sí", "s", "yes"}
+    FALSE_VALUES = {"0", "false", "no", "n"}
+
+    @staticmethod
+    def import_products(stream, filename):
+        """
+        Crea los productos nuevos y restaura los eliminados con el mismo nombre y
+        tamaño. Devuelve un resumen con el resultado de cada fila del archivo.
+        """
+        extension = os.path.splitext(filename or "")[1].lower()
+
+        if extension not in ProductImportService.ALLOWED_EXTENSIONS:
+            raise ValueError("El archivo debe ser .xlsx o .csv")
+
+        rows = (
+            ProductImportService._iter_excel_rows(stream)
+            if extension == ".xlsx"
+            else ProductImportService._iter_csv_rows(stream)
+        )
+
+        results = []
+        seen_keys = set()
+        chunk = []
+
+        for row_number, values in rows:
+            chunk.append((row_number, values))
+
+            if len(chunk) >= ProductImportService.CHUNK_SIZE:
+                results.extend(ProductImportService._import_chunk(chunk, seen_keys))
+                chunk = []
+
+        if chunk:
+            results.extend(ProductImportService._import_chunk(chunk, seen_keys))
+
+        summary = {
+            status: sum(1 for result in results if result["status"] == status)
+            for status in ("created", "restored", "error")
+        }
+
+        LogService.create_log(
+            {
+                "module": f"{ProductImportService.__name__}.{ProductImportService.import_products.__name__}",
+                "message": f"Importación de productos '{filename}': {summary['created']} creados, {summary['restored']} restaurados, {summary['error']} con error",
+            }
+        )
+
+        return {**summary, "rows": results}
+
+    @staticmethod
+    def _header_fields(header):
+        """Relaciona cada posición del encabezado con su campo; valida las obligatorias"""
+        aliases = {
+            alias: field
+            for field, names in ProductImportService.COLUMNS.items()
+            for alias in names
+        }
+        fields = [
+            aliases.get(str(cell).strip().lower()) if cell is not None else None
+            for cell in header
+        ]
+
+        missing = [
+            field for field in ProductImportService.REQUIRED_COLUMNS if field not in fields
+        ]
+
+        if missing:
+            raise ValueError(
+                f"Faltan columnas obligatorias en el archivo: {', '.join(missing)}"
+            )
+
+        return fields
+
+    @staticmethod
+    def _iter_rows(raw_rows):
+        """Convierte las filas crudas en (número de fila, dict); omite las vacías"""
+        header = next(raw_rows, None)
+
+        if header is None:
+            raise ValueError("El archivo está vacío")
+
+        fields = ProductImportService._header_fields(header)
+
+        # La fila 1 es el encabezado
+        for row_number, row in enumerate(raw_rows, start=2):
+            if all(value is None or str(value).strip() == "" for value in row):
+                continue
+
+            yield row_number, {
+                field: value for field, value in zip(fields, row) if field is not None
+            }
+
+    @staticmethod
+    def _iter_excel_rows(stream):
+        # Modo de solo lectura: las filas se leen del archivo a medida que se piden
+        try:
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+        except (InvalidFileException, zipfile.BadZipFile):
+            raise ValueError("El archivo no es un Excel (.xlsx) válido")
+
+        try:
+            yield from ProductImportService._iter_rows(
+                workbook.active.iter_rows(values_only=True)
+            )
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _iter_csv_rows(stream):
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+        try:
+            yield from ProductImportService._iter_rows(csv.reader(text))
+        except UnicodeDecodeError:
+            raise ValueError("El archivo CSV debe estar codificado en UTF-8")
+        finally:
+            # El stream pertenece a la petición: no se cierra junto con el wrapper
+            text.detach()
+
+    @staticmethod
+    def _parse_row(values):
+        """Valida y normaliza una fila con las mismas reglas que POST /products"""
+        product = {}
+
+        for field in ProductImportService.REQUIRED_COLUMNS:
+            value = values.get(field)
+
+            if value is None or str(value).strip() == "":
+                raise ValueError(
+                    f"El campo '{field}' es obligatorio y no puede estar vacío."
+                )
+
+        product["name"] = str(values["name"]).strip().lower()
+        product["size"] = str(values["size"]).strip().lower()
+        product["description"] = str(values["description"]).strip()
+
+        if len(product["name"]) < 3:
+            raise ValueError("El nombre del producto no puede ser menor a 3 caracteres")
+
+        for field, max_length in (("name", 100), ("size", 100), ("description", 500)):
+            if len(product[field]) > max_length:
+                raise ValueError(
+                    f"El campo '{field}' no puede superar {max_length} caracteres"
+                )
+
+        try:
+            product["price"] = Decimal(str(values["price"]).strip())
+        except InvalidOperation:
+            raise ValueError("El campo 'price' debe ser un número")
+
+        if not product["price"].is_finite() or product["price"] < 0:
+            raise ValueError("El campo 'price' debe ser un número positivo")
+
+        is_active = values.get("is_active")
+
+        if is_active is None or str(is_active).strip() == "":
+            product["is_active"] = True
+        elif isinstance(is_active, bool):
+            product["is_active"] = is_active
+        elif str(is_active).strip().lower() in ProductImportService.TRUE_VALUES:
+            product["is_active"] = True
+        elif str(is_active).strip().lower() in ProductImportService.FALSE_VALUES:
+            product["is_active"] = False
+        else:
+            raise ValueError("El campo 'is_active' debe ser verdadero o falso")
+
+        return product
+
+    @staticmethod
+    def _import_chunk(chunk, seen_keys):
+        """Valida, crea y restaura un bloque de filas en una sola transacción"""
+        results = {}
+        products = {}
+
+        for row_number, values in chunk:
+            try:
+                product = ProductImportService._parse_row(values)
+                key = (product["name"], product["size"])
+
+                if key in seen_keys:
+                    raise ValueError(
+                        "El producto aparece más de una vez en el archivo con el mismo nombre y tamaño"
+                    )
+
+                seen_keys.add(key)
+                products[row_number] = product
+
+            except ValueError as e:
+                results[row_number] = {
+                    "row": row_number,
+                    "status": "error",
+                    "error": str(e),
+                }
+
+        if products:
+            try:
+                results.update(
+                    UnitOfWork.run(
+                        "import_products",
+                        lambda: ProductImportService._write_chunk(products),
+                    )
+                )
+
+                # Las búsquedas de este worker aplican el cambio en la próxima consulta
+                ProductSearchService.expire()
+
+            except Exception as e:
+                LogService.create_log(
+                    {
+                        "module": f"{ProductImportService.__name__}.{ProductImportService._import_chunk.__name__}",
+                        "message": f"Error al guardar un bloque de {len(products)} productos importados: {str(e)}",
+                    }
+                )
+
+                for row_number in products:
+                    results[row_number] = {
+                        "row": row_number,
+                        "status": "error",
+                        "error": "No se pudo guardar el bloque de productos",
+                    }
+
+        return [results[row_number] for row_number, _ in chunk]
+
+    @staticmethod
+    def _write_chunk(products):
+        outcomes = SoftDeleteHandler.create_or_restore_many(
+            model=Product,
+            unique_fields=("name", "size"),
+            records=list(products.values()),
+            restore_many_fn=ProductService.restore_deleted_products,
+            create_many_fn=ProductService.create_fresh_products,
+        )
+
+        results = {}
+
+        for row_number, outcome in zip(products, outcomes):
+            if outcome["status"] in ("created", "restored"):
+                results[row_number] = {
+                    "row": row_number,
+                    "status": outcome["status"],
+                    "product_id": outcome["id"],
+                }
+            else:
+                results[row_number] = {
+                    "row": row_number,
+                    "status": "error",
+                    "product_id": outcome["id"],
+                    "error": "El Product ya existe en el sistema",
+                }
+
+        return results
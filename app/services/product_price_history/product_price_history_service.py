@@ -0,0 +1,135 @@
+from ...models.product.product import Product
+from ...models.product_price_history.product_price_history import ProductPriceHistory
+from ...services.log.log_service import LogService
+from ...database import db
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import and_, func, insert, literal, select
+
+
+class ProductPriceHistoryService:
+
+    # Máximo de productos por consulta en GET /products/prices/as-of
+    MAX_PRODUCT_IDS = 1000
+
+    @staticmethod
+    def record_prices(prices, valid_from=None):
+        """
+        Registra [(product_id, precio)] como vigentes desde valid_from (ahora por
+        defecto) con un solo INSERT. No hace commit: va en la transacción del cambio.
+        """
+        if not prices:
+            return
+
+        valid_from = valid_from or datetime.now(timezone.utc)
+
+        db.session.execute(
+            insert(ProductPriceHistory),
+            [
+                {
+                    "product_id": product_id,
+                    "price": Decimal(price),
+                    "valid_from": valid_from,
+                }
+                for product_id, price in prices
+            ],
+        )
+
+    @staticmethod
+    def backfill_missing_history():
+        """
+        Registra el precio actual de los productos que aún no tienen historial,
+        vigente desde su fecha de creación. Devuelve la cantidad de productos.
+        """
+        try:
+            result = db.session.execute(
+                insert(ProductPriceHistory).from_select(
+                    ["product_id", "price", "valid_from"],
+                    select(Product.id, Product.price, Product.created_at).where(
+                        ~select(literal(1))
+                        .where(ProductPriceHistory.product_id == Product.id)
+                        .exists()
+                    ),
+                )
+            )
+            db.session.commit()
+
+            return result.rowcount
+
+        except Exception as e:
+            db.session.rollback()
+            LogService.create_log(
+                {
+                    "module": f"{ProductPriceHistoryService.__name__}.{ProductPriceHistoryService.backfill_missing_history.__name__}",
+                    "message": f"Error al completar el historial de precios: {str(e)}",
+                }
+            )
+            raise
+
+    @staticmethod
+    def _latest_prices(as_of, product_ids=None):
+        """
+        (product_id, price, valid_from) vigentes al final del día 'as_of', en una
+        sola consulta sobre el índice (product_id, valid_from), con el precio en Decimal
+        """
+        upper_bound = datetime.combine(as_of, datetime.min.time()) + timedelta(days=1)
+
+        latest = select(
+            ProductPriceHistory.product_id,
+            func.max(ProductPriceHistory.valid_from).label("valid_from"),
+        ).where(ProductPriceHistory.valid_from < upper_bound)
+
+        if product_ids is not None:
+            latest = latest.where(ProductPriceHistory.product_id.in_(product_ids))
+
+        latest = latest.group_by(ProductPriceHistory.product_id).subquery()
+
+        rows = db.session.execute(
+            select(
+                ProductPriceHistory.product_id,
+                ProductPriceHistory.price,
+                ProductPriceHistory.valid_from,
+            )
+            .join(
+                latest,
+                and_(
+                    ProductPriceHistory.product_id == latest.c.product_id,
+                    ProductPriceHistory.valid_from == latest.c.valid_from,
+                ),
+            )
+            # Dos cambios en el mismo instante: gana el último registrado
+            .order_by(ProductPriceHistory.product_id, ProductPriceHistory.id)
+        )
+
+        return {
+            product_id: (price, valid_from) for product_id, price, valid_from in rows
+        }
+
+    @staticmethod
+    def get_price_map_as_of(as_of, product_ids=None):
+        """Precio vigente (Decimal) por product_id al final del día 'as_of'"""
+        return {
+            product_id: price
+            for product_id, (price, _) in ProductPriceHistoryService._latest_prices(
+                as_of, product_ids
+            ).items()
+        }
+
+    @staticmethod
+    def get_prices_as_of(as_of, product_ids=None):
+        """
+        Precio vigente de cada producto al final del día 'as_of'. Los productos sin
+        precio registrado hasta esa fecha no aparecen.
+        """
+        prices = {
+            product_id: {
+                "product_id": product_id,
+                "price": float(price),
+                "valid_from": valid_from.isoformat(),
+            }
+            for product_id, (price, valid_from) in ProductPriceHistoryService._latest_prices(
+                as_of, product_ids
+            ).items()
+        }
+
+        return [prices[product_id] for product_id in sorted(prices)]
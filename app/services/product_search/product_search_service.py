@@ -0,0 +1,315 @@
+from ...models.product.product import Product
+from ...services.table_version.table_version_service import TableVersionService
+from sqlalchemy import func
+import os
+import re
+import threading
+import time
+import unicodedata
+
+
+class ProductSearchService:
+    """
+    Índice invertido de trigramas de los productos activos (no eliminados y con
+    is_active) en memoria del proceso. Se construye
+    completo la primera vez y después se actualiza por producto: de inmediato en el
+    worker que escribe y, en los demás, cuando cambia la versión de 'product' en
+    table_version (se releen solo los productos con change_version mayor al último aplicado).
+    """
+
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+    CHECK_SECONDS = float(os.getenv("PRODUCT_SEARCH_CHECK_SECONDS", 2))
+
+    _lock = threading.Lock()
+    _documents = {}
+    _trigrams = {}
+    _loaded = False
+    _version = None
+    _synced_change_version = None
+    _checked_at = None
+
+    @staticmethod
+    def _normalize(text):
+        """Minúsculas, sin tildes y con solo letras y números separados por un espacio"""
+        text = unicodedata.normalize("NFKD", text or "")
+        text = "".join(char for char in text if not unicodedata.combining(char))
+
+        return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+    @staticmethod
+    def _word_trigrams(word):
+        # El relleno hace que el comienzo y el final de cada palabra tengan sus propios trigramas
+        padded = f"  {word} "
+
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def _query_trigrams(word):
+        """
+        Trigramas que debe tener un producto para contener 'word'. Con tres letras o
+        más se usan solo los internos, así también coincide en medio de una palabra;
+        con menos, los del comienzo de palabra (búsqueda por prefijo).
+        """
+        if len(word) >= 3:
+            return {word[i : i + 3] for i in range(len(word) - 2)}
+
+        padded = f"  {word}"
+
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def _text_trigrams(text):
+        trigrams = set()
+
+        for word in text.split():
+            trigrams |= ProductSearchService._word_trigrams(word)
+
+        return trigrams
+
+    @staticmethod
+    def _index_document(product):
+        """Agrega o reemplaza un producto en el índice. Requiere tener el candado"""
+        ProductSearchService._remove_document(product["id"])
+
+        document = {
+            "name": ProductSearchService._normalize(product["name"]),
+            "size": ProductSearchService._normalize(product["size"]),
+            "description": ProductSearchService._normalize(product["description"]),
+            "product": product,
+        }
+        document["trigrams"] = ProductSearchService._text_trigrams(
+            f"{document['name']} {document['size']} {document['description']}"
+        )
+
+        ProductSearchService._documents[product["id"]] = document
+
+        for trigram in document["trigrams"]:
+            ProductSearchService._trigrams.setdefault(trigram, set()).add(product["id"])
+
+    @staticmethod
+    def _remove_document(product_id):
+        """Quita un producto del índice. Requiere tener el candado"""
+        document = ProductSearchService._documents.pop(product_id, None)
+
+        if document is None:
+            return
+
+        for trigram in document["trigrams"]:
+            postings = ProductSearchService._trigrams.get(trigram)
+
+            if postings is not None:
+                postings.discard(product_id)
+
+                if not postings:
+                    del ProductSearchService._trigrams[trigram]
+
+    @staticmethod
+    def _search_fields(product):
+        return {
+            "id": product.id,
+            "name": product.name,
+            "size": product.size,
+            "price": float(product.price) if product.price is not None else None,
+            "description": product.description,
+            "is_active": product.is_active,
+        }
+
+    @staticmethod
+    def _apply_product(product):
+        """Indexa el producto si está activo o lo quita si no. Requiere tener el candado"""
+        if product.deleted_at is not None or not product.is_active:
+            ProductSearchService._remove_document(product.id)
+        else:
+            ProductSearchService._index_document(
+                ProductSearchService._search_fields(product)
+            )
+
+    @staticmethod
+    def index_product(product):
+        """Actualiza el índice de este worker tras crear, editar, restaurar o eliminar"""
+        with ProductSearchService._lock:
+            if not ProductSearchService._loaded:
+                return
+
+            ProductSearchService._apply_product(product)
+
+    @staticmethod
+    def _ensure_fresh():
+        """Construye el índice o aplica los cambios hechos por otros workers"""
+        now = time.monotonic()
+
+        with ProductSearchService._lock:
+            if (
+                ProductSearchService._loaded
+                and ProductSearchService._checked_at is not None
+                and now - ProductSearchService._checked_at
+                < ProductSearchService.CHECK_SECONDS
+            ):
+                return
+
+        version = TableVersionService.get_versions(["product"])["product"]
+
+        with ProductSearchService._lock:
+            ProductSearchService._checked_at = now
+
+            if ProductSearchService._loaded and version == ProductSearchService._version:
+                return
+
+            loaded = ProductSearchService._loaded
+            last_version = ProductSearchService._synced_change_version
+
+        # La lectura se hace sin el candado para no bloquear las búsquedas. Como
+        # change_version se asigna con la fila de table_version bloqueada, los
+        # cambios se confirman en orden y basta con releer los mayores al último
+        if loaded:
+            products = (
+                Product.query.filter(Product.change_version > last_version)
+                .order_by(Product.change_version, Product.id)
+                .all()
+            )
+            synced_version = max(
+                [last_version, *(product.change_version for product in products)]
+            )
+        else:
+            # El máximo se lee antes: lo que cambie durante la carga se relee después
+            synced_version = (
+                Product.query.with_entities(func.max(Product.change_version)).scalar() or 0
+            )
+            products = Product.query.filter(
+                Product.deleted_at.is_(None), Product.is_active
+            ).all()
+
+        with ProductSearchService._lock:
+            # Otro hilo ya aplicó estos cambios (o se reinició el índice)
+            if (
+                ProductSearchService._loaded != loaded
+                or ProductSearchService._synced_change_version != last_version
+            ):
+                return
+
+            for product in products:
+                ProductSearchService._apply_product(product)
+
+            ProductSearchService._loaded = True
+            ProductSearchService._version = version
+            ProductSearchService._synced_change_version = synced_version
+
+    @staticmethod
+    def _score(document, query, words):
+        """Mayor puntaje para coincidencias más fuertes y en campos más relevantes"""
+        name = document["name"]
+
+        if name == query:
+            return 100
+        if name.startswith(query):
+            return 90
+        if any(word.startswith(query) for word in name.split()):
+            return 70
+        if query in name:
+            return 50
+        if query in document["size"]:
+            return 30
+        if query in document["description"]:
+            return 10
+
+        # Consultas de varias palabras: todas deben aparecer en alguno de los campos
+        text = f"{name} {document['size']} {document['description']}"
+
+        if all(word in text for word in words):
+            return 5
+
+        return 0
+
+    @staticmethod
+    def _candidate_ids(words):
+        """
+        Productos que tienen todos los trigramas de la consulta: los únicos que se
+        puntúan. Intersecta empezando por la lista más corta. Requiere tener el candado
+        """
+        query_trigrams = set()
+
+        for word in words:
+            query_trigrams |= ProductSearchService._query_trigrams(word)
+
+        postings = sorted(
+            (
+                ProductSearchService._trigrams.get(trigram, set())
+                for trigram in query_trigrams
+            ),
+            key=len,
+        )
+
+        candidates = set(postings[0]) if postings else set()
+
+        for posting in postings[1:]:
+            candidates &= posting
+
+            if not candidates:
+                break
+
+        return candidates
+
+    @staticmethod
+    def search_products(query, limit=None):
+        """
+        Devuelve los productos activos que coinciden con 'query' por prefijo o
+        subcadena en nombre, tamaño o descripción, ordenados por relevancia.
+        """
+        normalized_query = ProductSearchService._normalize(query)
+
+        if not normalized_query:
+            raise ValueError("El parámetro 'q' es obligatorio")
+
+        if limit is None:
+            limit = ProductSearchService.DEFAULT_LIMIT
+
+        if limit <= 0:
+            raise ValueError("El límite debe ser un número positivo")
+
+        limit = min(limit, ProductSearchService.MAX_LIMIT)
+
+        ProductSearchService._ensure_fresh()
+
+        words = normalized_query.split()
+
+        with ProductSearchService._lock:
+            candidates = ProductSearchService._candidate_ids(words)
+            ranked = []
+
+            for product_id in candidates:
+                document = ProductSearchService._documents[product_id]
+                score = ProductSearchService._score(document, normalized_query, words)
+
+                if score > 0:
+                    ranked.append((-score, len(document["name"]), document["name"], product_id))
+
+            ranked.sort()
+
+            return [
+                {
+                    **ProductSearchService._documents[product_id]["product"],
+                    "score": -negative_score,
+                }
+                for negative_score, _, _, product_id in ranked[:limit]
+            ]
+
+    @staticmethod
+    def expire():
+        """
+        Hace que la próxima búsqueda compare la versión de 'product' sin esperar
+        CHECK_SECONDS. Para escrituras por lote, que no pasan por index_product.
+        """
+        with ProductSearchService._lock:
+            ProductSearchService._checked_at = None
+
+    @staticmethod
+    def reset():
+        """Descarta el índice de este proceso; se reconstruye en la siguiente búsqueda"""
+        with ProductSearchService._lock:
+            ProductSearchService._documents = {}
+            ProductSearchService._trigrams = {}
+            ProductSearchService._loaded = False
+            ProductSearchService._version = None
+            ProductSearchService._synced_change_version = None
+            ProductSearchService._checked_at = None
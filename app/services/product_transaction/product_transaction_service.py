@@ -1,35 +1,205 @@
 from ...models.product_transaction.product_transaction import ProductTransaction
-from ...services.transaction_type.transaction_type_service import TransactionTypeService
+from ...models.product.product import Product
+from ...models.supplier.supplier import Supplier
+from ...models.branch.branch import Branch
+from ...models.transaction_type.transaction_type import TransactionType
+from ...models.staff.staff_peticion import AppUser
 from ...services.inventory.inventory_service import InventoryService
-from ...services.branch.branch_service import BranchService
-from ...services.product.product_service import ProductService
-from ...services.supplier.supplier_service import SupplierService
 from ...services.log.log_service import LogService
-from ...services.staff.staff import get_user_by_id
+from ...services.idempotency.idempotency_service import IdempotencyService
+from ...services.daily_movement.daily_movement_service import DailyMovementService
+from ...services.table_version.table_version_service import TableVersionService
+from ...services.inventory_snapshot.inventory_snapshot_service import (
+    InventorySnapshotService,
+)
 from ...database import db
 from ...utils.validator import validate_data
 from ...utils.date_conversor import parse_transaction_date
+from ...utils.cursor import encode_cursor, decode_cursor
+from ...utils.unit_of_work import UnitOfWork
 from decimal import Decimal
+from datetime import timedelta
+from sqlalchemy import and_, or_, select, literal
+from sqlalchemy.orm import joinedload
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
-from io import BytesIO
+from openpyxl.utils import get_column_letter
+from itertools import islice
+import tempfile
+import csv
+import io
+
+
+class BulkTransactionError(ValueError):
+    """Error de validación de un lote, con el detalle de cada línea rechazada"""
+
+    def __init__(self, errors):
+        super().__init__("El lote contiene transacciones inválidas; no se registró ninguna")
+        self.errors = errors
 
 
 class ProductTransactionService:
 
+    BULK_MAX_SIZE = 1000
+
+    IDEMPOTENCY_ENDPOINT = "create_product_transaction"
+
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+
+    REPORT_CHUNK_SIZE = 1000
+    REPORT_WIDTH_SAMPLE_SIZE = 200
+
+    REPORT_HEADERS = [
+        "ID",
+        "Descripción",
+        "Producto",
+        "Cantidad",
+        "Precio Unitario",
+        "Precio Total",
+        "Fecha de Transacción",
+        "Tipo de Transacción",
+        "Sucursal",
+        "Usuario",
+        "Proveedor",
+        "Fecha de Creación",
+    ]
+
+    # Filtros numéricos aceptados por el listado y los reportes
+    ID_FILTERS = ("branch_id", "product_id", "transaction_type_id", "supplier_id")
+
+    @staticmethod
+    def parse_transaction_filters(args):
+        """
+        Convierte los parámetros de la petición (from, to, branch_id, product_id,
+        transaction_type_id, supplier_id) en un diccionario de filtros.
+        La fecha 'to' es inclusiva: se filtra hasta el final de ese día.
+        """
+        filters = {}
+
+        if args.get("from"):
+            filters["from"] = parse_transaction_date(args.get("from"))
+
+        if args.get("to"):
+            filters["to"] = parse_transaction_date(args.get("to")) + timedelta(days=1)
+
+        for field in ProductTransactionService.ID_FILTERS:
+            value = args.get(field)
+
+            if value is None or value == "":
+                continue
+
+            try:
+                filters[field] = int(value)
+            except (ValueError, TypeError):
+                LogService.create_log(
+                    {
+                        "module": f"{ProductTransactionService.__name__}.{ProductTransactionService.parse_transaction_filters.__name__}",
+                        "message": f"Se ingresó un valor inválido para el filtro '{field}': {value}",
+                    }
+                )
+                raise ValueError(f"El filtro '{field}' debe ser un número válido")
+
+        return filters
+
+    @staticmethod
+    def _apply_transaction_filters(query, filters):
+
+        if not filters:
+            return query
+
+        if "from" in filters:
+            query = query.filter(ProductTransaction.transaction_date >= filters["from"])
+
+        if "to" in filters:
+            query = query.filter(ProductTransaction.transaction_date < filters["to"])
+
+        for field in ProductTransactionService.ID_FILTERS:
+            if field in filters:
+                query = query.filter(
+                    getattr(ProductTransaction, field) == filters[field]
+                )
+
+        return query
+
+    @staticmethod
+    def _query_with_relations():
+        """
+        Consulta de transacciones que carga en el mismo SELECT las relaciones
+        usadas por to_dict, evitando una consulta extra por cada fila (N+1).
+        """
+        return ProductTransaction.query.options(
+            joinedload(ProductTransaction.product),
+            joinedload(ProductTransaction.supplier),
+            joinedload(ProductTransaction.branch),
+            joinedload(ProductTransaction.transaction_type),
+            joinedload(ProductTransaction.app_user),
+        )
+
     @staticmethod
-    def get_all_products_transactions():
+    def get_products_transactions_page(limit=None, after=None, filters=None):
+        """
+        Devuelve una página de transacciones ordenada de la más reciente a la más
+        antigua, paginada por keyset sobre (transaction_date, id).
+        'after' es el cursor devuelto en la página anterior.
+        """
+        if limit is None:
+            limit = ProductTransactionService.DEFAULT_PAGE_SIZE
+
+        if limit <= 0:
+            raise ValueError("El límite debe ser un número positivo")
 
-        product_transactions = ProductTransaction.query.all()
+        limit = min(limit, ProductTransactionService.MAX_PAGE_SIZE)
+
+        query = ProductTransactionService._apply_transaction_filters(
+            ProductTransactionService._query_with_relations(), filters
+        )
+
+        if after:
+            after_date, after_id = decode_cursor(after)
+            query = query.filter(
+                or_(
+                    ProductTransaction.transaction_date < after_date,
+                    and_(
+                        ProductTransaction.transaction_date == after_date,
+                        ProductTransaction.id < after_id,
+                    ),
+                )
+            )
+
+        # Se pide un registro extra para saber si existe una página siguiente
+        product_transactions = (
+            query.order_by(
+                ProductTransaction.transaction_date.desc(),
+                ProductTransaction.id.desc(),
+            )
+            .limit(limit + 1)
+            .all()
+        )
 
-        return [p_transaction.to_dict() for p_transaction in product_transactions]
+        next_cursor = None
+
+        if len(product_transactions) > limit:
+            product_transactions = product_transactions[:limit]
+            last = product_transactions[-1]
+            next_cursor = encode_cursor(last.transaction_date, last.id)
+
+        return {
+            "product_transactions": [
+                p_transaction.to_dict() for p_transaction in product_transactions
+            ],
+            "next_cursor": next_cursor,
+        }
 
     @staticmethod
     def get_product_transaction_by_id(id_product_transaction):
 
-        product_transaction = ProductTransaction.query.filter(
-            ProductTransaction.id == id_product_transaction
-        ).first()
+        product_transaction = (
+            ProductTransactionService._query_with_relations()
+            .filter(ProductTransaction.id == id_product_transaction)
+            .first()
+        )
 
         if product_transaction is None:
             LogService.create_log(
@@ -43,7 +213,15 @@ class ProductTransactionService:
         return product_transaction.to_dict()
 
     @staticmethod
-    def create_product_transaction_service(product_transaction):
+    def create_product_transaction_service(
+        product_transaction, idempotency_key=None, idempotency_user_id=None
+    ):
+        """
+        Registra una transacción y actualiza el inventario.
+        Si se envía idempotency_key (con el usuario autenticado que la envió), la
+        respuesta se guarda en la misma transacción para que los reintentos del
+        cliente no dupliquen el movimiento.
+        """
 
         required_fields = {
             "description": str,
@@ -58,7 +236,9 @@ class ProductTransactionService:
 
         validate_data(product_transaction, required_fields)
 
-        ProductTransactionService.validate_product_transaction_data(product_transaction)
+        transaction_type = ProductTransactionService.validate_product_transaction_data(
+            product_transaction
+        )
 
         unit_price = Decimal(product_transaction["unit_price"])
         total_price = unit_price * product_transaction["quantity"]
@@ -66,11 +246,7 @@ class ProductTransactionService:
         # Validar y parsear la fecha con formatos estrictos
         parsed_date = parse_transaction_date(product_transaction["transaction_date"])
 
-        transaction_type = TransactionTypeService.get_transaction_type_by_id(
-            product_transaction["transaction_type_id"]
-        )
-
-        try:
+        def write_transaction():
 
             InventoryService.update_inventory(product_transaction, transaction_type)
 
@@ -89,10 +265,42 @@ class ProductTransactionService:
             )
 
             db.session.add(new_product_transaction)
-            db.session.commit()
+            # Clave de la caché de reportes; se incrementa después del commit
+            TableVersionService.bump("product_transaction")
+
+            movements = [
+                {
+                    "transaction_date": parsed_date,
+                    "product_id": product_transaction["product_id"],
+                    "branch_id": product_transaction["branch_id"],
+                    "quantity": product_transaction["quantity"],
+                    "sign": InventoryService.get_quantity_sign(transaction_type),
+                }
+            ]
+            DailyMovementService.record_movements(movements)
+            InventorySnapshotService.record_backdated_movements(movements)
+
+            if idempotency_key:
+                db.session.flush()
+                # Valores tal como quedaron en las columnas (precios con dos decimales)
+                db.session.refresh(new_product_transaction)
+                IdempotencyService.build_record(
+                    idempotency_user_id,
+                    idempotency_key,
+                    ProductTransactionService.IDEMPOTENCY_ENDPOINT,
+                    product_transaction,
+                    {"ok": True, "product_transaction": new_product_transaction.to_dict()},
+                    201,
+                )
 
             return new_product_transaction
 
+        try:
+            # Reintenta ante deadlocks sobre filas de inventario muy concurridas
+            return UnitOfWork.run(
+                "create_product_transaction", write_transaction
+            )
+
         except Exception as e:
             db.session.rollback()
             LogService.create_log(
@@ -103,24 +311,453 @@ class ProductTransactionService:
             )
             raise e
 
+    @staticmethod
+    def create_product_transactions_bulk(product_transactions):
+        """
+        Registra un lote de transacciones con semántica todo o nada: valida todas las
+        líneas con una consulta IN por entidad referenciada, aplica los cambios de
+        inventario agregados por (producto, sede) y hace un único commit.
+        """
+        return ProductTransactionService._create_transactions_batch(
+            product_transactions, "create_product_transactions_bulk"
+        )
+
+    @staticmethod
+    def _create_transactions_batch(product_transactions, operation_name):
+
+        if not isinstance(product_transactions, list) or not product_transactions:
+            raise ValueError("Se debe enviar una lista de transacciones")
+
+        if len(product_transactions) > ProductTransactionService.BULK_MAX_SIZE:
+            raise ValueError(
+                f"El lote no puede superar {ProductTransactionService.BULK_MAX_SIZE} transacciones"
+            )
+
+        required_fields = {
+            "description": str,
+            "quantity": int,
+            "unit_price": (int, float),
+            "transaction_date": str,
+            "product_id": (int, str),
+            "branch_id": (int, str),
+            "transaction_type_id": (int, str),
+            "app_user_id": (int, str),
+        }
+
+        errors = []
+        lines = []
+
+        for index, product_transaction in enumerate(product_transactions):
+            try:
+                if not isinstance(product_transaction, dict):
+                    raise ValueError("La transacción debe ser un objeto")
+
+                validate_data(product_transaction, required_fields)
+                ProductTransactionService._validate_product_transaction_fields(
+                    product_transaction
+                )
+
+                lines.append(
+                    {
+                        "index": index,
+                        "description": product_transaction["description"],
+                        "quantity": product_transaction["quantity"],
+                        "unit_price": Decimal(product_transaction["unit_price"]),
+                        "transaction_date": parse_transaction_date(
+                            product_transaction["transaction_date"]
+                        ),
+                        "product_id": int(product_transaction["product_id"]),
+                        "branch_id": int(product_transaction["branch_id"]),
+                        "transaction_type_id": int(
+                            product_transaction["transaction_type_id"]
+                        ),
+                        "app_user_id": int(product_transaction["app_user_id"]),
+                        "supplier_id": (
+                            int(product_transaction["supplier_id"])
+                            if product_transaction.get("supplier_id")
+                            else None
+                        ),
+                    }
+                )
+
+            except (ValueError, TypeError) as e:
+                errors.append({"index": index, "error": str(e)})
+
+        # Una consulta por entidad referenciada para todo el lote
+        product_ids = ProductTransactionService._existing_ids(
+            Product, {line["product_id"] for line in lines}
+        )
+        branch_ids = ProductTransactionService._existing_ids(
+            Branch, {line["branch_id"] for line in lines}
+        )
+        user_ids = ProductTransactionService._existing_ids(
+            AppUser, {line["app_user_id"] for line in lines}
+        )
+        supplier_ids = ProductTransactionService._existing_ids(
+            Supplier, {line["supplier_id"] for line in lines if line["supplier_id"]}
+        )
+        transaction_types = {
+            transaction_type.id: transaction_type.to_dict()
+            for transaction_type in TransactionType.query.filter(
+                TransactionType.deleted_at.is_(None),
+                TransactionType.id.in_({line["transaction_type_id"] for line in lines}),
+            )
+        }
+
+        deltas = {}
+        valid_lines = []
+
+        for line in lines:
+            if line["product_id"] not in product_ids:
+                error = "Producto no encontrado"
+            elif line["branch_id"] not in branch_ids:
+                error = "No se encontró la sede"
+            elif line["app_user_id"] not in user_ids:
+                error = "Usuario no encontrado"
+            elif line["supplier_id"] and line["supplier_id"] not in supplier_ids:
+                error = "El proveedor no se encontró"
+            elif line["transaction_type_id"] not in transaction_types:
+                error = "Tipo de transacción no encontrado"
+            else:
+                error = None
+
+            if error:
+                errors.append({"index": line["index"], "error": error})
+                continue
+
+            key = (line["product_id"], line["branch_id"])
+            line["sign"] = InventoryService.get_quantity_sign(
+                transaction_types[line["transaction_type_id"]]
+            )
+            deltas[key] = deltas.get(key, 0) + line["sign"] * line["quantity"]
+            valid_lines.append(line)
+
+        if errors:
+            ProductTransactionService._raise_bulk_errors(errors, operation_name)
+
+        def write_batch():
+
+            inventory_errors = InventoryService.apply_inventory_deltas(deltas)
+
+            if inventory_errors:
+                db.session.rollback()
+                ProductTransactionService._raise_bulk_errors(
+                    [
+                        {
+                            "index": line["index"],
+                            "error": inventory_errors[
+                                (line["product_id"], line["branch_id"])
+                            ],
+                        }
+                        for line in valid_lines
+                        if (line["product_id"], line["branch_id"]) in inventory_errors
+                    ],
+                    operation_name,
+                )
+
+            new_product_transactions = [
+                ProductTransaction(
+                    description=line["description"],
+                    quantity=line["quantity"],
+                    unit_price=line["unit_price"],
+                    total_price=line["unit_price"] * line["quantity"],
+                    transaction_date=line["transaction_date"],
+                    product_id=line["product_id"],
+                    supplier_id=line["supplier_id"],
+                    branch_id=line["branch_id"],
+                    transaction_type_id=line["transaction_type_id"],
+                    app_user_id=line["app_user_id"],
+                )
+                for line in valid_lines
+            ]
+
+            db.session.add_all(new_product_transactions)
+            TableVersionService.bump("product_transaction")
+            DailyMovementService.record_movements(valid_lines)
+            InventorySnapshotService.record_backdated_movements(valid_lines)
+            db.session.flush()
+
+            # Se serializa antes del commit para no recargar cada fila expirada
+            return [
+                new_product_transaction.to_dict()
+                for new_product_transaction in new_product_transactions
+            ]
+
+        try:
+            return UnitOfWork.run(operation_name, write_batch)
+
+        except BulkTransactionError:
+            raise
+
+        except Exception as e:
+            db.session.rollback()
+            LogService.create_log(
+                {
+                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService.create_product_transactions_bulk.__name__}",
+                    "message": f"Ocurrió un error en la creación del lote de transacciones: {str(e)}. Se realizó rollback.",
+                }
+            )
+            raise e
+
+    @staticmethod
+    def create_inventory_transfer(transfer):
+        """
+        Traslada stock de una sede a otra en una sola transacción: por cada línea
+        registra la salida en la sede de origen y la entrada en la de destino.
+        Las filas de inventario de ambas sedes se bloquean juntas en orden fijo, así
+        el stock nunca queda fuera de las dos sedes ni dos traslados se bloquean
+        mutuamente. Los errores de línea se informan con el índice de la línea.
+        """
+        required_fields = {
+            "description": str,
+            "transaction_date": str,
+            "from_branch_id": (int, str),
+            "to_branch_id": (int, str),
+            "out_transaction_type_id": (int, str),
+            "in_transaction_type_id": (int, str),
+            "app_user_id": (int, str),
+            "lines": list,
+        }
+
+        validate_data(transfer, required_fields)
+
+        if int(transfer["from_branch_id"]) == int(transfer["to_branch_id"]):
+            LogService.create_log(
+                {
+                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService.create_inventory_transfer.__name__}",
+                    "message": "Se intentó trasladar stock a la misma sede de origen",
+                }
+            )
+            raise ValueError("La sede de origen y la de destino deben ser distintas")
+
+        lines = transfer["lines"]
+
+        if not lines:
+            raise ValueError("El traslado debe tener al menos una línea")
+
+        if len(lines) * 2 > ProductTransactionService.BULK_MAX_SIZE:
+            raise ValueError(
+                f"El traslado no puede superar {ProductTransactionService.BULK_MAX_SIZE // 2} líneas"
+            )
+
+        transaction_types = {
+            transaction_type.id: transaction_type.to_dict()
+            for transaction_type in TransactionType.query.filter(
+                TransactionType.deleted_at.is_(None),
+                TransactionType.id.in_(
+                    {
+                        int(transfer["out_transaction_type_id"]),
+                        int(transfer["in_transaction_type_id"]),
+                    }
+                ),
+            )
+        }
+
+        out_type = transaction_types.get(int(transfer["out_transaction_type_id"]))
+        in_type = transaction_types.get(int(transfer["in_transaction_type_id"]))
+
+        if out_type is None or InventoryService.get_quantity_sign(out_type) >= 0:
+            raise ValueError("El tipo de transacción de salida debe descontar stock")
+
+        if in_type is None or InventoryService.get_quantity_sign(in_type) <= 0:
+            raise ValueError("El tipo de transacción de entrada debe sumar stock")
+
+        errors = []
+        product_transactions = []
+
+        for index, line in enumerate(lines):
+            if not isinstance(line, dict):
+                errors.append({"index": index, "error": "La línea debe ser un objeto"})
+                continue
+
+            if not isinstance(line.get("quantity"), int) or line["quantity"] <= 0:
+                errors.append(
+                    {"index": index, "error": "La cantidad debe ser un entero positivo"}
+                )
+                continue
+
+            for branch_key, type_key in (
+                ("from_branch_id", "out_transaction_type_id"),
+                ("to_branch_id", "in_transaction_type_id"),
+            ):
+                product_transactions.append(
+                    {
+                        "description": transfer["description"],
+                        "quantity": line["quantity"],
+                        "unit_price": line.get("unit_price"),
+                        "transaction_date": transfer["transaction_date"],
+                        "product_id": line.get("product_id"),
+                        "branch_id": transfer[branch_key],
+                        "transaction_type_id": transfer[type_key],
+                        "app_user_id": transfer["app_user_id"],
+                    }
+                )
+
+        if errors:
+            ProductTransactionService._raise_bulk_errors(
+                errors, ProductTransactionService.create_inventory_transfer.__name__
+            )
+
+        try:
+            product_transactions = ProductTransactionService._create_transactions_batch(
+                product_transactions, "create_inventory_transfer"
+            )
+
+        except BulkTransactionError as e:
+            # Cada línea del traslado genera dos transacciones: salida y entrada
+            line_errors = {}
+
+            for error in e.errors:
+                line_errors.setdefault(error["index"] // 2, error["error"])
+
+            raise BulkTransactionError(
+                [
+                    {"index": index, "error": error}
+                    for index, error in sorted(line_errors.items())
+                ]
+            )
+
+        return {
+            "from_branch_id": int(transfer["from_branch_id"]),
+            "to_branch_id": int(transfer["to_branch_id"]),
+            "product_transactions": product_transactions,
+        }
+
+    @staticmethod
+    def _existing_ids(model, ids):
+        """Devuelve el subconjunto de ids que existen y no están eliminados"""
+        if not ids:
+            return set()
+
+        rows = db.session.query(model.id).filter(
+            model.deleted_at.is_(None), model.id.in_(ids)
+        )
+
+        return {row.id for row in rows}
+
+    @staticmethod
+    def _raise_bulk_errors(errors, operation_name):
+        """Registra el rechazo con el nombre de la operación que llamó y lanza el error"""
+
+        errors = sorted(errors, key=lambda error: error["index"])
+
+        LogService.create_log(
+            {
+                "module": f"{ProductTransactionService.__name__}.{operation_name}",
+                "message": f"Se rechazó un lote de transacciones con {len(errors)} líneas inválidas",
+            }
+        )
+        raise BulkTransactionError(errors)
+
     @staticmethod
     def validate_product_transaction_data(product_transaction):
+        """
+        Valida las entidades referenciadas y los campos de la transacción.
+        Devuelve el tipo de transacción (id, name, direction) para actualizar el inventario.
+        """
+        references = ProductTransactionService._resolve_references(product_transaction)
+
+        if references.product_id is None:
+            ProductTransactionService._reference_not_found(
+                "No se encontró el producto buscado por id", "Producto no encontrado"
+            )
+
+        if references.branch_id is None:
+            ProductTransactionService._reference_not_found(
+                "No se encontró la sede buscada por id", "No se encontró la sede"
+            )
+
+        if references.app_user_id is None:
+            ProductTransactionService._reference_not_found(
+                "No se encontró el usuario buscado por id", "Usuario no encontrado"
+            )
+
+        if product_transaction.get("supplier_id") and references.supplier_id is None:
+            ProductTransactionService._reference_not_found(
+                "No se encontró el proveedor buscado por id",
+                "El proveedor no se encontró",
+            )
+
+        ProductTransactionService._validate_product_transaction_fields(
+            product_transaction
+        )
+
+        if references.transaction_type_id is None:
+            ProductTransactionService._reference_not_found(
+                "No se encontró el tipo de transacción buscado por id",
+                "Tipo de transacción no encontrado",
+            )
+
+        return {
+            "id": references.transaction_type_id,
+            "name": references.transaction_type_name,
+            "direction": references.transaction_type_direction,
+        }
 
-        ProductService.get_product_by_id(product_transaction["product_id"])
+    @staticmethod
+    def _resolve_references(product_transaction):
+        """
+        Resuelve todas las entidades referenciadas en un solo viaje a la base de datos:
+        un SELECT sin FROM con una subconsulta escalar por entidad (None si no existe
+        o está eliminada), en lugar de cinco consultas seriales.
+        """
+
+        def active_column(model, column, id_value):
+            return (
+                select(column)
+                .where(model.deleted_at.is_(None), model.id == id_value)
+                .scalar_subquery()
+            )
+
+        transaction_type_id = product_transaction["transaction_type_id"]
+        supplier_id = product_transaction.get("supplier_id")
+
+        statement = select(
+            active_column(
+                Product, Product.id, product_transaction["product_id"]
+            ).label("product_id"),
+            active_column(
+                Branch, Branch.id, product_transaction["branch_id"]
+            ).label("branch_id"),
+            active_column(
+                AppUser, AppUser.id, product_transaction["app_user_id"]
+            ).label("app_user_id"),
+            (
+                active_column(Supplier, Supplier.id, supplier_id)
+                if supplier_id
+                else literal(None)
+            ).label("supplier_id"),
+            active_column(
+                TransactionType, TransactionType.id, transaction_type_id
+            ).label("transaction_type_id"),
+            active_column(
+                TransactionType, TransactionType.name, transaction_type_id
+            ).label("transaction_type_name"),
+            active_column(
+                TransactionType, TransactionType.direction, transaction_type_id
+            ).label("transaction_type_direction"),
+        )
 
-        BranchService.get_branch_by_id(product_transaction["branch_id"])
+        return db.session.execute(statement).one()
 
-        get_user_by_id(
-            product_transaction["app_user_id"]
-        )  # Validamos si el usuario de la transacción existe
+    @staticmethod
+    def _reference_not_found(log_message, error_message):
+
+        LogService.create_log(
+            {
+                "module": f"{ProductTransactionService.__name__}.{ProductTransactionService.validate_product_transaction_data.__name__}",
+                "message": log_message,
+            }
+        )
+        raise ValueError(error_message)
 
-        if "supplier_id" in product_transaction and product_transaction["supplier_id"]:
-            SupplierService.get_supplier_by_id(product_transaction["supplier_id"])
+    @staticmethod
+    def _validate_product_transaction_fields(product_transaction):
 
         if product_transaction["quantity"] < 0:
             LogService.create_log(
                 {
-                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService.validate_product_transaction_data.__name__}",
+                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService._validate_product_transaction_fields.__name__}",
                     "message": "Se ingresó una cantidad negativa en la transacción",
                 }
             )
@@ -129,7 +766,7 @@ class ProductTransactionService:
         if len(product_transaction["description"].strip()) < 5:
             LogService.create_log(
                 {
-                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService.validate_product_transaction_data.__name__}",
+                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService._validate_product_transaction_fields.__name__}",
                     "message": "Se ingresó una descripción menor a 5 caracterese en la transacción",
                 }
             )
@@ -138,86 +775,187 @@ class ProductTransactionService:
         if product_transaction["unit_price"] < 0:
             LogService.create_log(
                 {
-                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService.validate_product_transaction_data.__name__}",
+                    "module": f"{ProductTransactionService.__name__}.{ProductTransactionService._validate_product_transaction_fields.__name__}",
                     "message": "Se ingresó una precio unitario negativo en la transacción",
                 }
             )
             raise ValueError(f"El precio unitario no puede ser negativo")
 
     @staticmethod
-    def generate_excel_report():
+    def _report_rows_statement(filters=None):
         """
-        Genera un archivo Excel con todas las transacciones de productos
+        Proyección plana de columnas para los reportes: una sola consulta con
+        los nombres relacionados ya resueltos, sin hidratar objetos ORM.
         """
+        statement = (
+            select(
+                ProductTransaction.id,
+                ProductTransaction.description,
+                Product.name,
+                ProductTransaction.quantity,
+                ProductTransaction.unit_price,
+                ProductTransaction.total_price,
+                ProductTransaction.transaction_date,
+                TransactionType.name,
+                Branch.name,
+                AppUser.name,
+                Supplier.name,
+                ProductTransaction.created_at,
+            )
+            .select_from(ProductTransaction)
+            .outerjoin(Product, ProductTransaction.product_id == Product.id)
+            .outerjoin(
+                TransactionType,
+                ProductTransaction.transaction_type_id == TransactionType.id,
+            )
+            .outerjoin(Branch, ProductTransaction.branch_id == Branch.id)
+            .outerjoin(AppUser, ProductTransaction.app_user_id == AppUser.id)
+            .outerjoin(Supplier, ProductTransaction.supplier_id == Supplier.id)
+        )
+
+        statement = ProductTransactionService._apply_transaction_filters(
+            statement, filters
+        )
+
+        return statement.order_by(ProductTransaction.id)
+
+    @staticmethod
+    def _iter_report_rows(filters=None):
+        """
+        Recorre las filas del reporte por bloques usando un cursor del lado del
+        servidor (yield_per), de modo que nunca se carga el ledger completo en memoria.
+        """
+        result = db.session.execute(
+            ProductTransactionService._report_rows_statement(filters),
+            execution_options={"yield_per": ProductTransactionService.REPORT_CHUNK_SIZE},
+        )
+
         try:
-            # Obtener todas las transacciones
-            product_transactions = ProductTransaction.query.all()
-
-            # Crear el workbook y la hoja activa
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Transacciones de Productos"
-
-            # Definir estilos
-            header_font = Font(bold=True, color="FFFFFF", size=12)
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-
-            # Definir encabezados
-            headers = [
-                "ID",
-                "Descripción",
-                "Producto",
-                "Cantidad",
-                "Precio Unitario",
-                "Precio Total",
-                "Fecha de Transacción",
-                "Tipo de Transacción",
-                "Sucursal",
-                "Usuario",
-                "Proveedor",
-                "Fecha de Creación"
-            ]
+            for row in result:
+                (
+                    id_transaction,
+                    description,
+                    product_name,
+                    quantity,
+                    unit_price,
+                    total_price,
+                    transaction_date,
+                    transaction_type_name,
+                    branch_name,
+                    app_user_name,
+                    supplier_name,
+                    created_at,
+                ) = row
+
+                yield (
+                    id_transaction,
+                    description,
+                    product_name or "N/A",
+                    quantity,
+                    float(unit_price),
+                    float(total_price),
+                    transaction_date.strftime("%Y-%m-%d %H:%M:%S") if transaction_date else "N/A",
+                    transaction_type_name or "N/A",
+                    branch_name or "N/A",
+                    app_user_name or "N/A",
+                    supplier_name or "N/A",
+                    created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else "N/A",
+                )
+        finally:
+            result.close()
+
+    @staticmethod
+    def write_excel_report(target, filters=None):
+        """
+        Escribe el reporte Excel de transacciones en 'target' (ruta o archivo binario)
+        con una hoja de solo escritura: las filas se vuelcan a disco a medida que
+        llegan y el ancho de columnas se calcula con una muestra acotada.
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title="Transacciones de Productos")
+
+        # Definir estilos
+        header_font = Font(bold=True, color="FFFFFF", size=12)
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+
+        headers = ProductTransactionService.REPORT_HEADERS
+
+        rows = ProductTransactionService._iter_report_rows(filters)
+
+        try:
+            # En modo solo escritura los anchos deben definirse antes de la primera
+            # fila, por eso se calculan con las primeras filas y no con todo el archivo
+            sample = list(
+                islice(rows, ProductTransactionService.REPORT_WIDTH_SAMPLE_SIZE)
+            )
 
-            # Escribir encabezados
             for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num)
-                cell.value = header
+                max_length = max(
+                    [len(str(header))] + [len(str(row[col_num - 1])) for row in sample]
+                )
+                ws.column_dimensions[get_column_letter(col_num)].width = min(
+                    max_length + 2, 50
+                )
+
+            # Escribir encabezados
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
                 cell.font = header_font
                 cell.fill = header_fill
                 cell.alignment = header_alignment
+                header_cells.append(cell)
+            ws.append(header_cells)
 
             # Escribir datos
-            for row_num, transaction in enumerate(product_transactions, 2):
-                ws.cell(row=row_num, column=1, value=transaction.id)
-                ws.cell(row=row_num, column=2, value=transaction.description)
-                ws.cell(row=row_num, column=3, value=transaction.product.name if transaction.product else "N/A")
-                ws.cell(row=row_num, column=4, value=transaction.quantity)
-                ws.cell(row=row_num, column=5, value=float(transaction.unit_price))
-                ws.cell(row=row_num, column=6, value=float(transaction.total_price))
-                ws.cell(row=row_num, column=7, value=transaction.transaction_date.strftime("%Y-%m-%d %H:%M:%S") if transaction.transaction_date else "N/A")
-                ws.cell(row=row_num, column=8, value=transaction.transaction_type.name if transaction.transaction_type else "N/A")
-                ws.cell(row=row_num, column=9, value=transaction.branch.name if transaction.branch else "N/A")
-                ws.cell(row=row_num, column=10, value=transaction.app_user.name if transaction.app_user else "N/A")
-                ws.cell(row=row_num, column=11, value=transaction.supplier.name if transaction.supplier else "N/A")
-                ws.cell(row=row_num, column=12, value=transaction.created_at.strftime("%Y-%m-%d %H:%M:%S") if transaction.created_at else "N/A")
-
-            # Ajustar el ancho de las columnas
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            # Guardar en un BytesIO
-            excel_file = BytesIO()
-            wb.save(excel_file)
+            for row in sample:
+                ws.append(row)
+
+            for row in rows:
+                ws.append(row)
+
+        finally:
+            # Libera el cursor del servidor aunque la escritura falle
+            rows.close()
+
+        wb.save(target)
+
+    @staticmethod
+    def iter_csv_report(filters=None):
+        """
+        Genera el reporte de transacciones en CSV como bloques de texto, para
+        enviarlo al cliente a medida que se leen las filas de la base de datos.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        # BOM para que Excel reconozca el archivo como UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(ProductTransactionService.REPORT_HEADERS)
+
+        for row_num, row in enumerate(
+            ProductTransactionService._iter_report_rows(filters), 1
+        ):
+            writer.writerow(row)
+
+            if row_num % ProductTransactionService.REPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue()
+
+    @staticmethod
+    def generate_excel_report(filters=None):
+        """
+        Genera un archivo Excel con las transacciones de productos en un archivo
+        temporal en disco, listo para enviarse al cliente por bloques.
+        """
+        try:
+            excel_file = tempfile.TemporaryFile()
+
+            ProductTransactionService.write_excel_report(excel_file, filters)
             excel_file.seek(0)
 
             return excel_file
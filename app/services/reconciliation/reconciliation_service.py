@@ -0,0 +1,263 @@
+from ...models.inventory_drift.inventory_drift import InventoryDrift
+from ...models.inventory.inventory import Inventory
+from ...models.product.product import Product
+from ...models.product_transaction.product_transaction import ProductTransaction
+from ...models.transaction_type.transaction_type import TransactionType
+from ...services.inventory.inventory_service import InventoryService
+from ...services.log.log_service import LogService
+from ...database import db
+from ...utils.unit_of_work import UnitOfWork
+from ...utils.upsert import upsert
+from datetime import datetime, timezone
+from sqlalchemy import func, select, tuple_
+import os
+import uuid
+
+
+class ReconciliationService:
+
+    # Productos por bloque: cada bloque es una transacción corta de solo lectura
+    CHUNK_SIZE = int(os.getenv("RECONCILIATION_CHUNK_SIZE", 500))
+    REPAIR_BATCH_SIZE = int(os.getenv("RECONCILIATION_REPAIR_BATCH_SIZE", 100))
+
+    @staticmethod
+    def _ledger_quantities_statement(condition):
+        """Suma del ledger con signo por (producto, sede), calculada en la base de datos"""
+        return (
+            select(
+                ProductTransaction.product_id,
+                ProductTransaction.branch_id,
+                func.sum(
+                    InventoryService.quantity_sign_expression()
+                    * ProductTransaction.quantity
+                ),
+            )
+            .join(
+                TransactionType,
+                ProductTransaction.transaction_type_id == TransactionType.id,
+            )
+            .where(condition)
+            .group_by(ProductTransaction.product_id, ProductTransaction.branch_id)
+        )
+
+    @staticmethod
+    def _find_chunk_drift(first_product_id, last_product_id):
+        """
+        Compara ledger e inventario para un rango de productos. Ambas lecturas van
+        en la misma transacción para ver el mismo snapshot, sin bloquear filas.
+        """
+        ledger = {
+            (product_id, branch_id): int(quantity or 0)
+            for product_id, branch_id, quantity in db.session.execute(
+                ReconciliationService._ledger_quantities_statement(
+                    ProductTransaction.product_id.between(
+                        first_product_id, last_product_id
+                    )
+                )
+            )
+        }
+
+        inventory = {
+            (product_id, branch_id): quantity
+            for product_id, branch_id, quantity in db.session.execute(
+                select(Inventory.product_id, Inventory.branch_id, Inventory.quantity).where(
+                    Inventory.deleted_at.is_(None),
+                    Inventory.product_id.between(first_product_id, last_product_id),
+                )
+            )
+        }
+
+        drift = []
+
+        for key in sorted(set(ledger) | set(inventory)):
+            ledger_quantity = ledger.get(key, 0)
+            inventory_quantity = inventory.get(key)
+
+            if (inventory_quantity or 0) != ledger_quantity:
+                drift.append((key, inventory_quantity, ledger_quantity))
+
+        return drift
+
+    @staticmethod
+    def reconcile_inventory():
+        """
+        Recorre los productos por bloques de CHUNK_SIZE, compara la cantidad de cada
+        inventario con la suma de movimientos del ledger y guarda las diferencias en
+        inventory_drift. Devuelve {"run_id", "chunks", "drift"}.
+        Se ejecuta automáticamente mediante APScheduler.
+        """
+        run_id = str(uuid.uuid4())
+        last_product_id = 0
+        chunks = 0
+        drift_count = 0
+
+        try:
+            while True:
+                product_ids = (
+                    db.session.execute(
+                        select(Product.id)
+                        .where(Product.id > last_product_id)
+                        .order_by(Product.id)
+                        .limit(ReconciliationService.CHUNK_SIZE)
+                    )
+                    .scalars()
+                    .all()
+                )
+
+                if not product_ids:
+                    break
+
+                drift = ReconciliationService._find_chunk_drift(
+                    product_ids[0], product_ids[-1]
+                )
+
+                # La nueva medición reemplaza lo pendiente de ejecuciones anteriores
+                InventoryDrift.query.filter(
+                    InventoryDrift.repaired_at.is_(None),
+                    InventoryDrift.product_id.between(product_ids[0], product_ids[-1]),
+                ).delete(synchronize_session=False)
+
+                db.session.add_all(
+                    InventoryDrift(
+                        run_id=run_id,
+                        product_id=product_id,
+                        branch_id=branch_id,
+                        inventory_quantity=inventory_quantity,
+                        ledger_quantity=ledger_quantity,
+                    )
+                    for (product_id, branch_id), inventory_quantity, ledger_quantity in drift
+                )
+                # Cierra la transacción del bloque antes de pasar al siguiente
+                db.session.commit()
+
+                chunks += 1
+                drift_count += len(drift)
+                last_product_id = product_ids[-1]
+
+        except Exception as e:
+            db.session.rollback()
+            LogService.create_log(
+                {
+                    "module": f"{ReconciliationService.__name__}.{ReconciliationService.reconcile_inventory.__name__}",
+                    "message": f"Error en la conciliación {run_id} después de {chunks} bloques: {str(e)}",
+                }
+            )
+            raise
+
+        LogService.create_log(
+            {
+                "module": f"{ReconciliationService.__name__}.{ReconciliationService.reconcile_inventory.__name__}",
+                "message": f"Conciliación {run_id}: {drift_count} inventarios con diferencias en {chunks} bloques",
+            }
+        )
+
+        return {"run_id": run_id, "chunks": chunks, "drift": drift_count}
+
+    @staticmethod
+    def repair_drift(max_repairs=None):
+        """
+        Corrige los inventarios con diferencias pendientes, en lotes de
+        REPAIR_BATCH_SIZE y una transacción corta por lote. La cantidad correcta se
+        recalcula con las filas de inventario ya bloqueadas, así una venta que llegue
+        mientras tanto no se pierde. Devuelve la cantidad de inventarios corregidos.
+        """
+        repaired = 0
+
+        while max_repairs is None or repaired < max_repairs:
+            batch_size = ReconciliationService.REPAIR_BATCH_SIZE
+
+            if max_repairs is not None:
+                batch_size = min(batch_size, max_repairs - repaired)
+
+            pending = (
+                InventoryDrift.query.filter(InventoryDrift.repaired_at.is_(None))
+                .order_by(InventoryDrift.id)
+                .limit(batch_size)
+                .all()
+            )
+
+            if not pending:
+                break
+
+            drift_ids = [drift.id for drift in pending]
+            keys = sorted({(drift.product_id, drift.branch_id) for drift in pending})
+
+            # Termina la lectura para que el lote arranque con un snapshot nuevo
+            db.session.commit()
+
+            UnitOfWork.run(
+                "repair_inventory_drift",
+                lambda: ReconciliationService._repair_batch(drift_ids, keys),
+            )
+
+            repaired += len(drift_ids)
+
+        if repaired > 0:
+            LogService.create_log(
+                {
+                    "module": f"{ReconciliationService.__name__}.{ReconciliationService.repair_drift.__name__}",
+                    "message": f"Se corrigieron {repaired} inventarios con diferencias frente al ledger",
+                }
+            )
+
+        return repaired
+
+    @staticmethod
+    def _repair_batch(drift_ids, keys):
+
+        # Primero el bloqueo: las escrituras del ledger pasan por estas mismas filas
+        inventories = {
+            (inventory.product_id, inventory.branch_id): inventory
+            for inventory in Inventory.query.filter(
+                Inventory.deleted_at.is_(None),
+                tuple_(Inventory.product_id, Inventory.branch_id).in_(keys),
+            )
+            .order_by(Inventory.id)
+            .with_for_update()
+        }
+
+        ledger = {
+            (product_id, branch_id): int(quantity or 0)
+            for product_id, branch_id, quantity in db.session.execute(
+                ReconciliationService._ledger_quantities_statement(
+                    tuple_(
+                        ProductTransaction.product_id, ProductTransaction.branch_id
+                    ).in_(keys)
+                )
+            )
+        }
+
+        for key in keys:
+            inventory = inventories.get(key)
+
+            if inventory is None:
+                # La fila no existe o está eliminada: una sola por (producto, sede)
+                upsert(
+                    Inventory,
+                    {"product_id": key[0], "branch_id": key[1]},
+                    {
+                        "quantity": ledger.get(key, 0),
+                        "deleted_at": None,
+                        "updated_at": datetime.now(timezone.utc),
+                    },
+                )
+            else:
+                inventory.quantity = ledger.get(key, 0)
+
+        InventoryService._inventory_changed(keys)
+
+        InventoryDrift.query.filter(InventoryDrift.id.in_(drift_ids)).update(
+            {InventoryDrift.repaired_at: datetime.now(timezone.utc)},
+            synchronize_session=False,
+        )
+
+    @staticmethod
+    def get_pending_drift():
+        """Diferencias detectadas que aún no se han corregido"""
+        pending = (
+            InventoryDrift.query.filter(InventoryDrift.repaired_at.is_(None))
+            .order_by(InventoryDrift.id)
+            .all()
+        )
+
+        return [drift.to_dict() for drift in pending]
@@ -0,0 +1,280 @@
+from ...models.report_job.report_job import ReportJob
+from ...services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+from ...services.log.log_service import LogService
+from ...services.table_version.table_version_service import TableVersionService
+from ...database import db
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import and_, or_, update
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+
+
+class ReportJobService:
+
+    REPORT_FORMATS = {
+        "excel": {
+            "extension": ".xlsx",
+            "mimetype": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        },
+        "csv": {"extension": ".csv", "mimetype": "text/csv"},
+    }
+
+    REPORT_PARAMETERS = ("from", "to") + ProductTransactionService.ID_FILTERS
+
+    REPORTS_DIR = os.getenv(
+        "REPORTS_DIR", os.path.join(tempfile.gettempdir(), "improexpress_reports")
+    )
+    REPORT_TTL = timedelta(minutes=int(os.getenv("REPORT_TTL_MINUTES", 60)))
+    # Un trabajo PENDING o RUNNING más antiguo que esto quedó huérfano (p. ej. el
+    # proceso que lo generaba se reinició): se marca FAILED y se vuelve a encolar
+    REPORT_JOB_TIMEOUT = timedelta(
+        minutes=int(os.getenv("REPORT_JOB_TIMEOUT_MINUTES", 15))
+    )
+
+    # Tablas que lee el reporte: sus versiones forman la clave de la caché
+    REPORT_TABLES = (
+        "product_transaction",
+        "product",
+        "transaction_type",
+        "branch",
+        "app_user",
+        "supplier",
+    )
+
+    # Pool acotado: como máximo REPORT_WORKERS reportes se generan a la vez por proceso
+    _executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("REPORT_WORKERS", 2)),
+        thread_name_prefix="report-job",
+    )
+
+    @staticmethod
+    def _stale_job_filter():
+        """Trabajos en curso que superaron REPORT_JOB_TIMEOUT"""
+        cutoff = datetime.now(timezone.utc) - ReportJobService.REPORT_JOB_TIMEOUT
+
+        return or_(
+            and_(ReportJob.status == "PENDING", ReportJob.created_at <= cutoff),
+            and_(ReportJob.status == "RUNNING", ReportJob.started_at <= cutoff),
+        )
+
+    @staticmethod
+    def fail_stale_jobs():
+        """Marca como FAILED los trabajos huérfanos sin hacer commit; devuelve cuántos"""
+        return db.session.execute(
+            update(ReportJob)
+            .where(ReportJobService._stale_job_filter())
+            .values(
+                status="FAILED",
+                error="El reporte superó el tiempo máximo de generación",
+            ),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+
+    @staticmethod
+    def enqueue_report(report_format, args):
+        """
+        Encola la generación de un reporte o devuelve el trabajo existente para los
+        mismos parámetros si ninguna tabla del reporte ha cambiado desde entonces.
+        """
+        if report_format not in ReportJobService.REPORT_FORMATS:
+            LogService.create_log(
+                {
+                    "module": f"{ReportJobService.__name__}.{ReportJobService.enqueue_report.__name__}",
+                    "message": f"Se solicitó un formato de reporte inválido: {report_format}",
+                }
+            )
+            raise ValueError("El formato del reporte debe ser 'excel' o 'csv'")
+
+        parameters = {
+            key: str(args[key])
+            for key in ReportJobService.REPORT_PARAMETERS
+            if args.get(key) not in (None, "")
+        }
+
+        # Valida los filtros antes de encolar para responder 400 de inmediato
+        ProductTransactionService.parse_transaction_filters(parameters)
+
+        serialized_parameters = json.dumps(parameters, sort_keys=True)
+        params_hash = hashlib.sha256(
+            f"{report_format}:{serialized_parameters}".encode("utf-8")
+        ).hexdigest()
+        data_version = TableVersionService.get_etag(ReportJobService.REPORT_TABLES)
+
+        if ReportJobService.fail_stale_jobs():
+            db.session.commit()
+
+        cached_job = (
+            ReportJob.query.filter(
+                ReportJob.params_hash == params_hash,
+                ReportJob.data_version == data_version,
+                ReportJob.status != "FAILED",
+                ReportJob.expires_at > datetime.now(timezone.utc),
+            )
+            .order_by(ReportJob.created_at.desc())
+            .first()
+        )
+
+        if cached_job and (
+            cached_job.status != "DONE" or os.path.exists(cached_job.file_path)
+        ):
+            return cached_job
+
+        job = ReportJob(
+            id=str(uuid.uuid4()),
+            format=report_format,
+            parameters=serialized_parameters,
+            params_hash=params_hash,
+            data_version=data_version,
+            status="PENDING",
+            expires_at=datetime.now(timezone.utc) + ReportJobService.REPORT_TTL,
+        )
+
+        db.session.add(job)
+        db.session.commit()
+
+        ReportJobService._executor.submit(
+            ReportJobService._run_report_job,
+            current_app._get_current_object(),
+            job.id,
+        )
+
+        return job
+
+    @staticmethod
+    def _run_report_job(app, job_id):
+        """Genera el archivo del reporte en un hilo del pool, fuera de la petición"""
+        with app.app_context():
+            # Solo lo toma si sigue PENDING: pudo marcarse FAILED por tiempo en la cola
+            started = db.session.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status == "PENDING")
+                .values(status="RUNNING", started_at=datetime.now(timezone.utc)),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            db.session.commit()
+
+            if not started:
+                db.session.remove()
+                return
+
+            job = db.session.get(ReportJob, job_id)
+
+            report_format = ReportJobService.REPORT_FORMATS[job.format]
+            file_path = os.path.join(
+                ReportJobService.REPORTS_DIR, f"{job.id}{report_format['extension']}"
+            )
+            partial_path = f"{file_path}.part"
+
+            try:
+                os.makedirs(ReportJobService.REPORTS_DIR, exist_ok=True)
+
+                filters = ProductTransactionService.parse_transaction_filters(
+                    json.loads(job.parameters)
+                )
+
+                if job.format == "excel":
+                    ProductTransactionService.write_excel_report(partial_path, filters)
+                else:
+                    with open(partial_path, "w", encoding="utf-8", newline="") as f:
+                        for chunk in ProductTransactionService.iter_csv_report(filters):
+                            f.write(chunk)
+
+                # El archivo solo queda visible cuando está completo
+                os.replace(partial_path, file_path)
+
+                job.status = "DONE"
+                job.file_path = file_path
+                job.expires_at = datetime.now(timezone.utc) + ReportJobService.REPORT_TTL
+                db.session.commit()
+
+            except Exception as e:
+                db.session.rollback()
+
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+
+                job = db.session.get(ReportJob, job_id)
+                job.status = "FAILED"
+                job.error = str(e)
+                db.session.commit()
+
+                LogService.create_log(
+                    {
+                        "module": f"{ReportJobService.__name__}.{ReportJobService._run_report_job.__name__}",
+                        "message": f"Error al generar el reporte {job_id}: {str(e)}",
+                    }
+                )
+
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def get_report_job_by_id(job_id):
+
+        job = ReportJob.query.filter(
+            ReportJob.id == job_id,
+            ReportJob.expires_at > datetime.now(timezone.utc),
+        ).first()
+
+        if job is None:
+            LogService.create_log(
+                {
+                    "module": f"{ReportJobService.__name__}.{ReportJobService.get_report_job_by_id.__name__}",
+                    "message": "No se encontró el reporte buscado por id o ya expiró",
+                }
+            )
+            raise ValueError("Reporte no encontrado o expirado")
+
+        return job
+
+    @staticmethod
+    def get_report_file(job_id):
+        """Devuelve (ruta, nombre de descarga, mimetype) de un reporte terminado"""
+        job = ReportJobService.get_report_job_by_id(job_id)
+
+        if job.status != "DONE" or not os.path.exists(job.file_path):
+            raise ValueError("El reporte todavía no está disponible")
+
+        report_format = ReportJobService.REPORT_FORMATS[job.format]
+
+        return (
+            job.file_path,
+            f"reporte_transacciones_productos{report_format['extension']}",
+            report_format["mimetype"],
+        )
+
+    @staticmethod
+    def delete_expired_reports():
+        """
+        Elimina los trabajos expirados y sus archivos en disco, y marca FAILED los
+        que quedaron huérfanos. Se ejecuta automáticamente mediante APScheduler.
+        """
+        try:
+            ReportJobService.fail_stale_jobs()
+
+            expired_jobs = ReportJob.query.filter(
+                ReportJob.expires_at <= datetime.now(timezone.utc)
+            ).all()
+
+            for job in expired_jobs:
+                if job.file_path and os.path.exists(job.file_path):
+                    os.remove(job.file_path)
+                db.session.delete(job)
+
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            LogService.create_log(
+                {
+                    "module": f"{ReportJobService.__name__}.{ReportJobService.delete_expired_reports.__name__}",
+                    "message": f"Error al eliminar reportes expirados: {str(e)}",
+                }
+            )
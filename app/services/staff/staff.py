@@ -2,6 +2,7 @@ from ...database import db
 from datetime import datetime, timezone
 from ...models.staff.staff_peticion import AppUser
 from ...services.log.log_service import LogService
+from ...services.table_version.table_version_service import TableVersionService
 from ...utils.validator import (
     validate_data,
     validate_phone_number,
@@ -204,6 +205,11 @@ def update_user_service(document_id, data):
         setattr(user, field, value)
 
     user.updated_at = datetime.utcnow()
+
+    # Los reportes de transacciones muestran el nombre del usuario
+    if "name" in update_data:
+        TableVersionService.bump("app_user")
+
     db.session.commit()
 
     # Serializar el usuario actualizado para devolverlo
@@ -236,6 +242,8 @@ def restore_deleted_user(existing_user: AppUser, new_data: dict) -> AppUser:
     existing_user.deleted_at = None
     # created_at se mantiene igual (cuándo se creó originalmente)
 
+    # Los reportes de transacciones muestran el nombre del usuario
+    TableVersionService.bump("app_user")
     db.session.commit()
     return existing_user
 
@@ -3,6 +3,7 @@ from ...utils.validator import validate_data, validate_supplier_data
 from ...utils.soft_delete_handler import SoftDeleteHandler
 from ...services.log.log_service import LogService
 from ...database import db
+from ...services.table_version.table_version_service import TableVersionService
 from datetime import datetime, timezone
 
 
@@ -112,6 +113,7 @@ class SupplierService:
             )
             raise ValueError("Ya existe otro proveedor con el mismo nit")
 
+        TableVersionService.bump("supplier")
         db.session.commit()
 
         return supplier
@@ -123,6 +125,7 @@ class SupplierService:
 
         supplier.deleted_at = datetime.now(timezone.utc)
 
+        TableVersionService.bump("supplier")
         db.session.commit()
 
         return True
@@ -148,6 +151,7 @@ class SupplierService:
         existing_supplier.deleted_at = None
         # created_at se mantiene igual (cuándo se creó originalmente)
 
+        TableVersionService.bump("supplier")
         db.session.commit()
         return existing_supplier
 
@@ -167,6 +171,7 @@ class SupplierService:
         )
 
         db.session.add(new_supplier)
+        TableVersionService.bump("supplier")
         db.session.commit()
 
         return new_supplier
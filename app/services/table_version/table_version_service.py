@@ -0,0 +1,144 @@
+from ...models.table_version.table_version import TableVersion
+from ...database import db
+from ...utils.upsert import upsert_increment
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+
+class TableVersionService:
+
+    # Tablas de referencia que solo se escriben con objetos del ORM (no tienen
+    # servicio de escritura): su versión se incrementa en cualquier flush que las
+    # modifique. El ledger y los usuarios no van aquí: se escriben en cada venta y
+    # en cada login, y sus servicios marcan la versión solo cuando hace falta
+    FLUSH_VERSIONED_TABLES = (
+        "branch",
+        "company",
+        "transaction_type",
+    )
+
+    # Clave de session.info con las tablas modificadas en la transacción en curso
+    BUMPED_TABLES_KEY = "bumped_tables"
+    # Clave de session.info con las tablas cuya versión se incrementa tras el commit
+    PENDING_BUMPS_KEY = "pending_table_bumps"
+    COMMITTED_BUMPS_KEY = "committed_table_bumps"
+
+    @staticmethod
+    def bump(*table_names):
+        """
+        Marca las tablas para incrementar su versión cuando la transacción haga
+        commit. El incremento va en una transacción propia y corta después del
+        commit: las escrituras no se esperan entre sí por la fila de versión.
+        """
+        for key in (
+            TableVersionService.BUMPED_TABLES_KEY,
+            TableVersionService.PENDING_BUMPS_KEY,
+        ):
+            db.session.info.setdefault(key, set()).update(table_names)
+
+    @staticmethod
+    def next_version(table_name):
+        """
+        Incrementa la versión de la tabla y la devuelve, sin hacer commit. La fila de
+        versión queda bloqueada hasta el commit, así las versiones se asignan en el
+        orden en que las transacciones hacen commit. Solo para el catálogo de
+        productos, que se escribe poco: serializa todas sus escrituras.
+        """
+        upsert_increment(TableVersion, {"table_name": table_name}, {"version": 1})
+
+        db.session.info.setdefault(TableVersionService.BUMPED_TABLES_KEY, set()).add(
+            table_name
+        )
+
+        return db.session.execute(
+            select(TableVersion.version).where(TableVersion.table_name == table_name)
+        ).scalar_one()
+
+    @staticmethod
+    def _mark_committed(session):
+        """Listener after_commit: las tablas marcadas con bump ya hicieron commit"""
+        table_names = session.info.pop(TableVersionService.PENDING_BUMPS_KEY, None)
+
+        if table_names:
+            session.info.setdefault(TableVersionService.COMMITTED_BUMPS_KEY, set()).update(
+                table_names
+            )
+
+    @staticmethod
+    def _bump_committed(session, transaction):
+        """
+        Listener after_transaction_end: incrementa las versiones que hicieron commit.
+        Corre cuando la sesión ya devolvió su conexión al pool, así el incremento
+        no necesita una segunda conexión mientras retiene la primera.
+        """
+        if transaction.parent is not None:
+            return
+
+        table_names = session.info.pop(TableVersionService.COMMITTED_BUMPS_KEY, None)
+
+        if not table_names:
+            return
+
+        try:
+            # Conexión aparte y transacción propia, fuera de la sesión
+            with session.get_bind().begin() as connection:
+                for table_name in sorted(table_names):
+                    upsert_increment(
+                        TableVersion,
+                        {"table_name": table_name},
+                        {"version": 1},
+                        connection=connection,
+                    )
+
+        except Exception as e:
+            # Los datos ya hicieron commit: el ETag se corrige con la próxima escritura
+            # o con el comando bump-table-version
+            print(
+                f"[TableVersion] No se pudo incrementar la versión de {', '.join(sorted(table_names))}: {str(e)}"
+            )
+
+    @staticmethod
+    def _forget_rolled_back(session):
+        session.info.pop(TableVersionService.PENDING_BUMPS_KEY, None)
+
+    @staticmethod
+    def _bump_flushed_tables(session, flush_context, instances):
+        """Listener before_flush: versiona las tablas de FLUSH_VERSIONED_TABLES escritas"""
+        table_names = {
+            instance.__table__.name
+            for instance in (*session.new, *session.dirty, *session.deleted)
+            if getattr(instance, "__table__", None) is not None
+            and instance.__table__.name in TableVersionService.FLUSH_VERSIONED_TABLES
+            and (instance not in session.dirty or session.is_modified(instance))
+        }
+
+        if table_names:
+            TableVersionService.bump(*table_names)
+
+    @staticmethod
+    def get_versions(table_names):
+        """Devuelve {tabla: versión}; las tablas que nunca se han escrito valen 0"""
+        versions = {table_name: 0 for table_name in table_names}
+
+        versions.update(
+            db.session.query(TableVersion.table_name, TableVersion.version)
+            .filter(TableVersion.table_name.in_(table_names))
+            .all()
+        )
+
+        return versions
+
+    @staticmethod
+    def get_etag(table_names):
+        """ETag de un listado que depende de las tablas indicadas"""
+        versions = TableVersionService.get_versions(table_names)
+
+        return "-".join(
+            f"{table_name}.{versions[table_name]}" for table_name in table_names
+        )
+
+
+event.listen(Session, "before_flush", TableVersionService._bump_flushed_tables)
+event.listen(Session, "after_commit", TableVersionService._mark_committed)
+event.listen(Session, "after_transaction_end", TableVersionService._bump_committed)
+event.listen(Session, "after_rollback", TableVersionService._forget_rolled_back)
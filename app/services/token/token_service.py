@@ -1,6 +1,7 @@
 from ...models.token.token import Token
 from ...database import db
 from ...services.log.log_service import LogService
+from ...utils.unit_of_work import UnitOfWork
 from datetime import datetime, timedelta, timezone
 
 
@@ -52,18 +53,21 @@ class TokenService:
         Elimina todos los tokens expirados de la base de datos.
         Se ejecuta automáticamente mediante APScheduler.
         """
-        try:
+        def delete_tokens():
             expired_tokens = Token.query.filter(
                 Token.expires_at <= datetime.now(timezone.utc)
             ).all()
 
-            count = len(expired_tokens)
+            for token in expired_tokens:
+                db.session.delete(token)
 
-            if count > 0:
-                for token in expired_tokens:
-                    db.session.delete(token)
-                db.session.commit()
+            return len(expired_tokens)
 
+        try:
+            # Reintenta con backoff si otro worker tiene bloqueadas las mismas filas
+            count = UnitOfWork.run("delete_expired_tokens", delete_tokens)
+
+            if count > 0:
                 LogService.create_log(
                     {
                         "module": f"{TokenService.__name__}.{TokenService.deleteExpiredTokens.__name__}",
@@ -76,8 +80,8 @@ class TokenService:
 
         except Exception as e:
             db.session.rollback()
-            # Los errores de deadlock son esperados cuando múltiples workers intentan eliminar
-            # al mismo tiempo. Solo registramos en log sin imprimir en consola para evitar ruido.
+            # Si los deadlocks persisten tras los reintentos solo registramos en log
+            # sin imprimir en consola para evitar ruido.
             LogService.create_log(
                 {
                     "module": f"{TokenService.__name__}.{TokenService.deleteExpiredTokens.__name__}",
@@ -1,5 +1,6 @@
 from ...models.transaction_type.transaction_type import TransactionType
 from ...services.log.log_service import LogService
+from ...utils.reference_cache import ReferenceCache
 
 
 class TransactionTypeService:
@@ -7,27 +8,35 @@ class TransactionTypeService:
     @staticmethod
     def get_all_transaction_types() -> list[dict]:
 
-        transaction_types = TransactionType.query.filter(
-            TransactionType.deleted_at.is_(None)
-        ).all()
+        def load():
+            transaction_types = TransactionType.query.filter(
+                TransactionType.deleted_at.is_(None)
+            ).all()
 
-        return [transaction_type.to_dict() for transaction_type in transaction_types]
+            return [transaction_type.to_dict() for transaction_type in transaction_types]
+
+        return ReferenceCache.get_or_load("transaction_type", "all", load)
 
     @staticmethod
     def get_transaction_type_by_id(id_transaction_type):
 
-        transaction_type = TransactionType.query.filter(
-            TransactionType.deleted_at.is_(None),
-            TransactionType.id == id_transaction_type,
-        ).first()
-
-        if transaction_type is None:
-            LogService.create_log(
-                {
-                    "module": f"{TransactionTypeService.__name__}.{TransactionTypeService.get_transaction_type_by_id.__name__}",
-                    "message": "No se encontró el tipo de transacción buscado por id",
-                }
-            )
-            raise ValueError("Tipo de transacción no encontrado")
-
-        return transaction_type.to_dict()
+        def load():
+            transaction_type = TransactionType.query.filter(
+                TransactionType.deleted_at.is_(None),
+                TransactionType.id == id_transaction_type,
+            ).first()
+
+            if transaction_type is None:
+                LogService.create_log(
+                    {
+                        "module": f"{TransactionTypeService.__name__}.{TransactionTypeService.get_transaction_type_by_id.__name__}",
+                        "message": "No se encontró el tipo de transacción buscado por id",
+                    }
+                )
+                raise ValueError("Tipo de transacción no encontrado")
+
+            return transaction_type.to_dict()
+
+        return ReferenceCache.get_or_load(
+            "transaction_type", int(id_transaction_type), load
+        )
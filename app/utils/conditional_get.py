@@ -0,0 +1,34 @@
+from functools import wraps
+from flask import current_app, make_response, request
+from ..services.table_version.table_version_service import TableVersionService
+
+
+def conditional_get(*table_names):
+    """
+    Agrega un ETag basado en la versión de las tablas de las que depende el listado.
+    Si el cliente envía If-None-Match con el ETag vigente responde 304 sin ejecutar
+    la consulta del listado. Va debajo del decorador de autenticación.
+    """
+
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            # La versión se lee antes del listado: si alguien escribe en medio, el
+            # ETag queda viejo y la siguiente petición recibe datos completos
+            etag = TableVersionService.get_etag(table_names)
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return decorator
+
+    return wrapper
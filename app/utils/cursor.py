@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import datetime
+from ..services.log.log_service import LogService
+
+
+def encode_cursor(date_value, id_value):
+    """
+    Codifica la posición (fecha, id) del último registro entregado en un
+    cursor opaco para la paginación por keyset.
+    """
+    payload = json.dumps([date_value.isoformat(), id_value])
+
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica un cursor generado por encode_cursor y devuelve la tupla (fecha, id).
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        date_value, id_value = json.loads(payload)
+
+        return datetime.fromisoformat(date_value), int(id_value)
+
+    except (ValueError, TypeError, UnicodeError):
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{decode_cursor.__name__}",
+                "message": f"Se ingresó un cursor de paginación inválido: {cursor}",
+            }
+        )
+        raise ValueError("El cursor de paginación no es válido")
+
+
+def encode_version_cursor(version, id_value):
+    """Cursor opaco con la posición (versión, id) de la sincronización incremental"""
+    payload = json.dumps(["v", version, id_value])
+
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_version_cursor(cursor):
+    """Decodifica un cursor de encode_version_cursor y devuelve la tupla (versión, id)"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        marker, version, id_value = json.loads(payload)
+
+        if marker != "v":
+            raise ValueError(marker)
+
+        return int(version), int(id_value)
+
+    except (ValueError, TypeError, UnicodeError):
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{decode_version_cursor.__name__}",
+                "message": f"Se ingresó un cursor de sincronización inválido: {cursor}",
+            }
+        )
+        raise ValueError("El cursor de sincronización no es válido")
+
+
+def encode_log_cursor(log_id, gaps, issued_at, listing_after=None):
+    """
+    Cursor opaco de la sincronización basada en un registro de cambios: último id
+    leído, ids saltados que aún se esperan ({id: visto en}), momento en que se
+    emitió y, mientras dura la carga inicial, el último id del listado completo.
+    """
+    payload = json.dumps(
+        ["l", log_id, sorted(gaps.items()), issued_at, listing_after]
+    )
+
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_log_cursor(cursor):
+    """Decodifica un cursor de encode_log_cursor: (log_id, gaps, issued_at, listing_after)"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        marker, log_id, gaps, issued_at, listing_after = json.loads(payload)
+
+        if marker != "l":
+            raise ValueError(marker)
+
+        return (
+            int(log_id),
+            {int(gap_id): float(seen_at) for gap_id, seen_at in gaps},
+            float(issued_at),
+            int(listing_after) if listing_after is not None else None,
+        )
+
+    except (ValueError, TypeError, UnicodeError):
+        LogService.create_log(
+            {
+                "module": f"{__name__}.{decode_log_cursor.__name__}",
+                "message": f"Se ingresó un cursor de sincronización inválido: {cursor}",
+            }
+        )
+        raise ValueError("El cursor de sincronización no es válido")
@@ -0,0 +1,160 @@
+from sqlalchemy import and_, func, or_, select
+from ..database import db
+from .cursor import encode_version_cursor, decode_version_cursor
+from datetime import datetime, timedelta, timezone
+import time
+
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+# Segundos que se sigue esperando un id saltado de un registro de cambios: una
+# transacción con id menor puede hacer commit después de una con id mayor
+GAP_TIMEOUT_SECONDS = 10
+# Huecos que viajan en el cursor como máximo (se conservan los más recientes)
+MAX_CURSOR_GAPS = 1000
+
+
+def validate_limit(limit):
+    if limit is None:
+        limit = DEFAULT_LIMIT
+
+    if limit <= 0:
+        raise ValueError("El límite debe ser un número positivo")
+
+    return min(limit, MAX_LIMIT)
+
+
+def get_changes_page(statement, model, since=None, limit=None, scalars=False):
+    """
+    Aplica a 'statement' la paginación por keyset sobre (change_version, id) de
+    'model' y devuelve {"rows", "next_cursor", "has_more"}. Cada escritura marca sus
+    filas con la versión de table_version que incrementó; como esa fila queda
+    bloqueada hasta el commit, las versiones visibles crecen en orden de commit y
+    una transacción lenta no puede quedar detrás del cursor. Por ese bloqueo solo
+    lo usa el catálogo de productos, que se escribe poco.
+    'since' es el cursor devuelto por la llamada anterior; sin él se entrega todo.
+    """
+    limit = validate_limit(limit)
+
+    if since:
+        since_version, since_id = decode_version_cursor(since)
+        statement = statement.where(
+            or_(
+                model.change_version > since_version,
+                and_(model.change_version == since_version, model.id > since_id),
+            )
+        )
+
+    result = db.session.execute(
+        statement.order_by(model.change_version, model.id).limit(limit + 1)
+    )
+    rows = result.scalars().all() if scalars else result.all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = since
+
+    if rows:
+        next_cursor = encode_version_cursor(rows[-1].change_version, rows[-1].id)
+
+    return {"rows": rows, "next_cursor": next_cursor, "has_more": has_more}
+
+
+def start_log_position(log_model):
+    """
+    Posición inicial en un registro de cambios con id autoincremental y changed_at:
+    el último id visible y, como huecos, los ids de los últimos
+    GAP_TIMEOUT_SECONDS que aún no son visibles (transacciones en curso).
+    """
+    now = time.time()
+    max_id = db.session.query(func.max(log_model.id)).scalar() or 0
+
+    recent_min_id = (
+        db.session.query(func.min(log_model.id))
+        .filter(
+            log_model.changed_at
+            >= datetime.now(timezone.utc) - timedelta(seconds=GAP_TIMEOUT_SECONDS)
+        )
+        .scalar()
+    )
+
+    gaps = {}
+
+    if recent_min_id is not None:
+        gaps = _missing_ids(log_model, recent_min_id - 1, max_id, now)
+
+    return max_id, gaps
+
+
+def _missing_ids(log_model, after_id, up_to_id, now):
+    """Ids de (after_id, up_to_id] que no son visibles, como huecos vistos en 'now'"""
+    if up_to_id <= after_id:
+        return {}
+
+    id_range = (log_model.id > after_id, log_model.id <= up_to_id)
+    visible = db.session.query(func.count(log_model.id)).filter(*id_range).scalar()
+
+    # Caso normal: no falta ninguno y no hace falta traer los ids
+    if visible == up_to_id - after_id:
+        return {}
+
+    visible_ids = set(db.session.execute(select(log_model.id).where(*id_range)).scalars())
+
+    return {
+        missing_id: now
+        for missing_id in range(after_id + 1, up_to_id + 1)
+        if missing_id not in visible_ids
+    }
+
+
+def get_log_page(statement, log_model, position, gaps, limit=None):
+    """
+    Aplica a 'statement' la paginación sobre el id de un registro de cambios que
+    se escribe en la misma transacción que el dato: filas con id mayor a
+    'position' o pendientes en 'gaps'. El statement debe incluir log_model.id con
+    la etiqueta 'log_id' y puede filtrar (por ejemplo por sede): los huecos se
+    calculan sobre todo el registro. No bloquea nada al escribir; un id que hace
+    commit más de GAP_TIMEOUT_SECONDS después de quedar saltado se pierde.
+    Devuelve {"rows", "position", "gaps", "has_more"}.
+    """
+    limit = validate_limit(limit)
+    now = time.time()
+
+    gaps = {
+        gap_id: seen_at
+        for gap_id, seen_at in gaps.items()
+        if now - seen_at < GAP_TIMEOUT_SECONDS
+    }
+
+    # Límite superior fijo antes de leer: lo que haga commit después queda para
+    # la próxima llamada, aunque el filtro no traiga ninguna fila
+    upper_id = db.session.query(func.max(log_model.id)).scalar() or 0
+
+    condition = and_(log_model.id > position, log_model.id <= upper_id)
+
+    if gaps:
+        condition = or_(condition, log_model.id.in_(gaps))
+
+    rows = db.session.execute(
+        statement.where(condition).order_by(log_model.id).limit(limit + 1)
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    for row in rows:
+        gaps.pop(row.log_id, None)
+
+    new_position = max(position, rows[-1].log_id if rows else position)
+
+    if not has_more:
+        new_position = max(position, upper_id)
+
+    gaps.update(_missing_ids(log_model, position, new_position, now))
+
+    if len(gaps) > MAX_CURSOR_GAPS:
+        gaps = dict(sorted(gaps.items())[-MAX_CURSOR_GAPS:])
+
+    return {"rows": rows, "position": new_position, "gaps": gaps, "has_more": has_more}
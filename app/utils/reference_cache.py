@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..services.table_version.table_version_service import TableVersionService
+
+
+class FrozenDict(dict):
+    """dict de solo lectura: se serializa igual que un dict pero no se puede modificar"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Los valores de la caché de referencia son de solo lectura")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+class ReferenceCache:
+    """
+    Caché en memoria del proceso para datos de referencia (sedes, compañías, tipos
+    de transacción, catálogo de productos). Cada tabla tiene su propio espacio con
+    límite de entradas (LRU) y TTL. La validez se comprueba contra table_version:
+    cuando otro worker escribe la tabla, este proceso lo nota en a lo sumo
+    CHECK_SECONDS y descarta todo lo que tenía de esa tabla; las escrituras del
+    propio worker la descartan al hacer commit. Los valores se guardan congelados
+    (FrozenDict y tuplas) y se entregan sin copiar.
+    """
+
+    MAX_ENTRIES = int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", 1000))
+    TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+    CHECK_SECONDS = float(os.getenv("REFERENCE_CACHE_CHECK_SECONDS", 2))
+
+    _lock = threading.Lock()
+    _entries = {}
+    _versions = {}
+    _checked_at = {}
+    # Aumenta cada vez que se vacía una tabla, para no guardar cargas que empezaron antes
+    _generations = {}
+
+    @staticmethod
+    def get_or_load(table_name, key, loader):
+        """
+        Devuelve el valor guardado para (tabla, key), de solo lectura, o lo obtiene
+        con loader() y lo guarda. Si loader lanza una excepción no se guarda nada.
+        """
+        generation = ReferenceCache._validate(table_name)
+        now = time.monotonic()
+
+        with ReferenceCache._lock:
+            entries = ReferenceCache._entries.setdefault(table_name, OrderedDict())
+            entry = entries.get(key)
+
+            if entry is not None and entry[0] > now:
+                entries.move_to_end(key)
+                return entry[1]
+
+        value = ReferenceCache._freeze(loader())
+
+        with ReferenceCache._lock:
+            if ReferenceCache._generations.get(table_name, 0) == generation:
+                entries = ReferenceCache._entries.setdefault(table_name, OrderedDict())
+                entries[key] = (now + ReferenceCache.TTL_SECONDS, value)
+                entries.move_to_end(key)
+
+                while len(entries) > ReferenceCache.MAX_ENTRIES:
+                    entries.popitem(last=False)
+
+        return value
+
+    @staticmethod
+    def _freeze(value):
+        """Copia el valor una sola vez, al cargarlo, en estructuras de solo lectura"""
+        if isinstance(value, dict):
+            return FrozenDict(
+                (key, ReferenceCache._freeze(item)) for key, item in value.items()
+            )
+
+        if isinstance(value, (list, tuple)):
+            return tuple(ReferenceCache._freeze(item) for item in value)
+
+        return value
+
+    @staticmethod
+    def invalidate(*table_names):
+        """Descarta las tablas indicadas y fuerza a releer su versión en la próxima consulta"""
+        with ReferenceCache._lock:
+            for table_name in table_names:
+                ReferenceCache._entries.pop(table_name, None)
+                ReferenceCache._checked_at.pop(table_name, None)
+                ReferenceCache._generations[table_name] = (
+                    ReferenceCache._generations.get(table_name, 0) + 1
+                )
+
+    @staticmethod
+    def _invalidate_committed(session):
+        """Listener after_commit: descarta las tablas cuya versión se incrementó"""
+        table_names = session.info.pop(TableVersionService.BUMPED_TABLES_KEY, None)
+
+        if table_names:
+            ReferenceCache.invalidate(*table_names)
+
+    @staticmethod
+    def _forget_rolled_back(session):
+        session.info.pop(TableVersionService.BUMPED_TABLES_KEY, None)
+
+    @staticmethod
+    def _validate(table_name):
+        """Vacía la tabla si su versión cambió; consulta la versión cada CHECK_SECONDS"""
+        now = time.monotonic()
+
+        with ReferenceCache._lock:
+            checked_at = ReferenceCache._checked_at.get(table_name)
+
+            if checked_at is not None and now - checked_at < ReferenceCache.CHECK_SECONDS:
+                return ReferenceCache._generations.get(table_name, 0)
+
+        version = TableVersionService.get_versions([table_name])[table_name]
+
+        with ReferenceCache._lock:
+            if ReferenceCache._versions.get(table_name) != version:
+                ReferenceCache._entries.pop(table_name, None)
+                ReferenceCache._versions[table_name] = version
+                ReferenceCache._generations[table_name] = (
+                    ReferenceCache._generations.get(table_name, 0) + 1
+                )
+
+            ReferenceCache._checked_at[table_name] = now
+
+            return ReferenceCache._generations[table_name]
+
+    @staticmethod
+    def clear():
+        """Descarta todo el contenido de la caché de este proceso"""
+        with ReferenceCache._lock:
+            ReferenceCache._entries.clear()
+            ReferenceCache._versions.clear()
+            ReferenceCache._checked_at.clear()
+            ReferenceCache._generations.clear()
+
+
+event.listen(Session, "after_commit", ReferenceCache._invalidate_committed)
+event.listen(Session, "after_rollback", ReferenceCache._forget_rolled_back)
@@ -1,7 +1,13 @@
 from ..services.log.log_service import LogService
+from ..database import db
+from sqlalchemy import select, tuple_
+import os
 
 class SoftDeleteHandler:
 
+    # Registros por consulta en create_or_restore_many
+    CHUNK_SIZE = int(os.getenv("SOFT_DELETE_CHUNK_SIZE", 500))
+
     @staticmethod
     def create_or_restore(model, unique_filters, data, restore_fn, create_fn):
         """
@@ -12,12 +18,14 @@ class SoftDeleteHandler:
         create_fn: función para crear
         """
 
-        # Verificar si existe ACTIVO (no eliminado)
-        existing_active = model.query.filter(
-            unique_filters, model.deleted_at.is_(None)
-        ).first()
+        # Una sola consulta: primero el registro activo y, si no hay, el eliminado más reciente
+        existing = (
+            model.query.filter(unique_filters)
+            .order_by(model.deleted_at.is_(None).desc(), model.id.desc())
+            .first()
+        )
 
-        if existing_active:
+        if existing is not None and existing.deleted_at is None:
             LogService.create_log(
                 {
                     "module": f"{SoftDeleteHandler.__name__}.{SoftDeleteHandler.create_or_restore.__name__}",
@@ -27,12 +35,82 @@ class SoftDeleteHandler:
             raise ValueError(f"El {model.__name__} ya existe en el sistema")
 
         # Verificar si existe eliminado
-        existing_deleted = model.query.filter(
-            unique_filters, model.deleted_at.isnot(None)
-        ).first()
-
-        if existing_deleted:
-            return restore_fn(existing_deleted, data)
+        if existing is not None:
+            return restore_fn(existing, data)
 
         # Crear nuevo
         return create_fn(data)
+
+    @staticmethod
+    def create_or_restore_many(model, unique_fields, records, restore_many_fn, create_many_fn):
+        """
+        Versión por lotes de create_or_restore, con una consulta por bloque de CHUNK_SIZE.
+        model: clase SQLAlchemy
+        unique_fields: nombres de las columnas que identifican al registro (ej. ("name", "size"))
+        records: lista de dicts ya validados y normalizados
+        restore_many_fn: recibe [(id eliminado, datos)] y restaura esos registros
+        create_many_fn: recibe [datos], los crea y devuelve sus ids en el mismo orden
+        No hace commit: la transacción es de quien llama.
+        Devuelve por registro {"status": "created" | "restored" | "exists" | "duplicate", "id"}.
+        """
+        columns = [getattr(model, field) for field in unique_fields]
+        results = []
+        first_results = {}
+
+        for start in range(0, len(records), SoftDeleteHandler.CHUNK_SIZE):
+            chunk = records[start : start + SoftDeleteHandler.CHUNK_SIZE]
+            keys = [tuple(record[field] for field in unique_fields) for record in chunk]
+
+            # Igual que create_or_restore: el activo gana y, entre eliminados, el más reciente
+            existing = {}
+
+            for row in db.session.execute(
+                select(model.id, model.deleted_at, *columns)
+                .where(tuple_(*columns).in_(set(keys)))
+                .order_by(model.deleted_at.is_(None).desc(), model.id.desc())
+            ):
+                existing.setdefault(tuple(row[2:]), row)
+
+            chunk_results = []
+            to_restore = []
+            to_create = []
+
+            for record, key in zip(chunk, keys):
+                match = existing.get(key)
+
+                if key in first_results:
+                    # Repetido en records: se informa con el id que quedó para la primera aparición
+                    chunk_results.append({"status": "duplicate", "key": key})
+                    continue
+
+                if match is not None and match.deleted_at is None:
+                    result = {"status": "exists", "id": match.id}
+                elif match is not None:
+                    result = {"status": "restored", "id": match.id}
+                    to_restore.append((match.id, record))
+                else:
+                    result = {"status": "created", "id": None}
+                    to_create.append((result, record))
+
+                first_results[key] = result
+                chunk_results.append(result)
+
+            if to_restore:
+                restore_many_fn(to_restore)
+
+            if to_create:
+                created_ids = create_many_fn([record for _, record in to_create])
+
+                for (result, _), created_id in zip(to_create, created_ids):
+                    result["id"] = created_id
+
+            results.extend(chunk_results)
+
+        return [
+            (
+                {"status": "duplicate", "id": first_results[result["key"]]["id"]}
+                if result["status"] == "duplicate"
+                else result
+            )
+            for result in results
+        ]
@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+from sqlalchemy.exc import DBAPIError
+from ..database import db
+from ..services.log.log_service import LogService
+
+
+# Errores de MySQL que indican conflicto de bloqueos: 1213 deadlock, 1205 lock wait timeout
+RETRYABLE_MYSQL_CODES = {1205, 1213}
+# SQLSTATE estándar de fallo de serialización y deadlock
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+class UnitOfWork:
+
+    MAX_ATTEMPTS = 4
+    BASE_DELAY_SECONDS = 0.05
+    MAX_DELAY_SECONDS = 1.0
+
+    _metrics = {}
+    _metrics_lock = threading.Lock()
+
+    @staticmethod
+    def run(operation_name, work, max_attempts=None):
+        """
+        Ejecuta work() y hace commit como una sola transacción.
+        Si la base de datos aborta la transacción por deadlock o fallo de
+        serialización, hace rollback y reintenta con espera exponencial con
+        jitter hasta max_attempts veces. work() debe poder repetirse desde cero:
+        todo lo que agregue a la sesión se descarta en cada rollback.
+        """
+        max_attempts = max_attempts or UnitOfWork.MAX_ATTEMPTS
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                result = work()
+                db.session.commit()
+
+                UnitOfWork._record(operation_name, attempt, succeeded=True)
+                return result
+
+            except DBAPIError as e:
+                db.session.rollback()
+
+                if not UnitOfWork.is_retryable(e) or attempt == max_attempts:
+                    UnitOfWork._record(operation_name, attempt, succeeded=False)
+
+                    if attempt > 1:
+                        LogService.create_log(
+                            {
+                                "module": f"{UnitOfWork.__name__}.{UnitOfWork.run.__name__}",
+                                "message": f"La operación {operation_name} falló tras {attempt} intentos: {str(e)}",
+                            }
+                        )
+                    raise
+
+                # Full jitter: evita que los workers en conflicto reintenten a la vez
+                time.sleep(
+                    random.uniform(
+                        0,
+                        min(
+                            UnitOfWork.MAX_DELAY_SECONDS,
+                            UnitOfWork.BASE_DELAY_SECONDS * 2 ** (attempt - 1),
+                        ),
+                    )
+                )
+
+            except Exception:
+                db.session.rollback()
+                UnitOfWork._record(operation_name, attempt, succeeded=False)
+                raise
+
+    @staticmethod
+    def is_retryable(error):
+        """Indica si el error de la base de datos es transitorio por contención de bloqueos"""
+        original = getattr(error, "orig", None)
+
+        if original is None:
+            return False
+
+        args = getattr(original, "args", ())
+        if args and args[0] in RETRYABLE_MYSQL_CODES:
+            return True
+
+        sqlstate = getattr(original, "sqlstate", None) or getattr(original, "pgcode", None)
+        if sqlstate in RETRYABLE_SQLSTATES:
+            return True
+
+        # SQLite reporta la contención como "database is locked"
+        return "database is locked" in str(original)
+
+    @staticmethod
+    def _record(operation_name, attempts, succeeded):
+
+        with UnitOfWork._metrics_lock:
+            metrics = UnitOfWork._metrics.setdefault(
+                operation_name,
+                {"calls": 0, "retries": 0, "successes": 0, "failures": 0},
+            )
+            metrics["calls"] += 1
+            metrics["retries"] += attempts - 1
+            metrics["successes" if succeeded else "failures"] += 1
+
+    @staticmethod
+    def get_metrics():
+        """Contadores de llamadas, reintentos, éxitos y fallos por operación en este proceso"""
+        with UnitOfWork._metrics_lock:
+            return {name: dict(metrics) for name, metrics in UnitOfWork._metrics.items()}
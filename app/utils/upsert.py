@@ -0,0 +1,122 @@
+from ..database import db
+from sqlalchemy import update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+def upsert(model, key_values, values):
+    """
+    Inserta la fila identificada por key_values o, si ya existe, reemplaza sus
+    columnas con values, en una sola sentencia dentro de la transacción actual.
+    """
+    table = model.__table__
+    row = {**key_values, **values}
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        statement = mysql_insert(table).values(**row)
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in values}
+        )
+        db.session.execute(statement)
+        return
+
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert(table).values(**row)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key_values),
+            set_={column: statement.excluded[column] for column in values},
+        )
+        db.session.execute(statement)
+        return
+
+    result = db.session.execute(
+        update(table)
+        .where(*[table.c[column] == value for column, value in key_values.items()])
+        .values(**values)
+    )
+
+    if result.rowcount == 0:
+        db.session.execute(table.insert().values(**row))
+
+
+def upsert_increment(model, key_values, increments, connection=None):
+    """
+    Inserta la fila identificada por key_values o, si ya existe, suma los valores
+    de increments a sus columnas, en una sola sentencia dentro de la transacción actual
+    (o de 'connection' si se indica). Requiere un índice único sobre las columnas de key_values.
+    """
+    table = model.__table__
+    values = {**key_values, **increments}
+    executor = connection if connection is not None else db.session
+    dialect = (
+        connection.dialect.name
+        if connection is not None
+        else db.session.get_bind().dialect.name
+    )
+
+    if dialect == "mysql":
+        statement = mysql_insert(table).values(**values)
+        statement = statement.on_duplicate_key_update(
+            {column: table.c[column] + statement.inserted[column] for column in increments}
+        )
+        executor.execute(statement)
+        return
+
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key_values),
+            set_={column: table.c[column] + statement.excluded[column] for column in increments},
+        )
+        executor.execute(statement)
+        return
+
+    # Otros motores: UPDATE y, si no había fila, INSERT
+    result = executor.execute(
+        update(table)
+        .where(*[table.c[column] == value for column, value in key_values.items()])
+        .values({column: table.c[column] + value for column, value in increments.items()})
+    )
+
+    if result.rowcount == 0:
+        executor.execute(table.insert().values(**values))
+
+
+def upsert_expressions(model, key_values, values, on_conflict):
+    """
+    Inserta la fila key_values + values o, si ya existe, le asigna on_conflict:
+    {columna: expresión}, donde las expresiones pueden leer las columnas actuales de
+    la fila. Las asignaciones se aplican en el orden de on_conflict (en MySQL cada
+    una ve las anteriores). Requiere un índice único sobre las columnas de key_values.
+    """
+    table = model.__table__
+    row = {**key_values, **values}
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        statement = mysql_insert(table).values(**row)
+        statement = statement.on_duplicate_key_update(list(on_conflict.items()))
+        db.session.execute(statement)
+        return
+
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert(table).values(**row)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key_values), set_=on_conflict
+        )
+        db.session.execute(statement)
+        return
+
+    result = db.session.execute(
+        update(table)
+        .where(*[table.c[column] == value for column, value in key_values.items()])
+        .values(on_conflict)
+    )
+
+    if result.rowcount == 0:
+        db.session.execute(table.insert().values(**row))
@@ -0,0 +1,206 @@
+import pytest
+from decimal import Decimal
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from sqlalchemy import event
+from app.database import db
+from app.utils.reference_cache import ReferenceCache
+from app.services.product_search.product_search_service import ProductSearchService
+from app.models import (
+    Company,
+    Branch,
+    Product,
+    Supplier,
+    TransactionType,
+    AppUser,
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplicación mínima sobre SQLite en archivo (permite pruebas con hilos)"""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+    app.config["JWT_SECRET_KEY"] = "test-secret-de-al-menos-32-caracteres"
+    app.config["TESTING"] = True
+
+    db.init_app(app)
+    # La caché es del proceso: cada prueba usa una base nueva
+    ReferenceCache.clear()
+    ProductSearchService.reset()
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def seed(app):
+    """Crea los datos de referencia mínimos para registrar transacciones"""
+    company = Company(name="empresa", nit="900000000")
+    db.session.add(company)
+    db.session.flush()
+
+    branch = Branch(
+        name="sede norte",
+        phone_number="3000000000",
+        email="sede@empresa.com",
+        address="calle 1 # 2-3",
+        company_id=company.id,
+        is_active=True,
+    )
+    db.session.add(branch)
+    db.session.flush()
+
+    product = Product(
+        name="laptop",
+        size="15 pulgadas",
+        price=Decimal("2500000.00"),
+        description="laptop de oficina",
+        is_active=True,
+    )
+    supplier = Supplier(
+        name="proveedor",
+        nit="900000001",
+        email="proveedor@empresa.com",
+        contact_name="contacto",
+        phone_number="3000000001",
+        address="calle 4 # 5-6",
+        city="bogota",
+        description="proveedor principal",
+        is_active=True,
+    )
+    user = AppUser(
+        name="administrador",
+        email="admin@empresa.com",
+        username="admin",
+        hashed_password="hash",
+        role_id=1,
+        branch_id=branch.id,
+    )
+    type_in = TransactionType(
+        name="compra", description="entrada", direction="IN", is_active=True
+    )
+    type_out = TransactionType(
+        name="venta", description="salida", direction="OUT", is_active=True
+    )
+    db.session.add_all([product, supplier, user, type_in, type_out])
+    db.session.commit()
+
+    return {
+        "company": company,
+        "branch": branch,
+        "product": product,
+        "supplier": supplier,
+        "user": user,
+        "type_in": type_in,
+        "type_out": type_out,
+    }
+
+
+@pytest.fixture
+def transaction_payload(seed):
+    """Construye el cuerpo de una transacción de producto sobre los datos base"""
+
+    def build(transaction_type, quantity=1, **overrides):
+        payload = {
+            "description": "movimiento de prueba",
+            "quantity": quantity,
+            "unit_price": 1000,
+            "transaction_date": "2025-01-01",
+            "product_id": seed["product"].id,
+            "branch_id": seed["branch"].id,
+            "transaction_type_id": transaction_type.id,
+            "app_user_id": seed["user"].id,
+            "supplier_id": seed["supplier"].id,
+        }
+        payload.update(overrides)
+        return payload
+
+    return build
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Ejecuta fn() y devuelve (resultado, sentencias SQL ejecutadas). Con 'match'
+    solo se cuentan las sentencias para las que match(sentencia) es verdadero.
+    """
+
+    def run(fn, match=None):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if match is None or match(statement):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+
+        return result, statements
+
+    return run
+
+
+@pytest.fixture
+def make_product(app):
+    """Crea un producto con valores por defecto; hace commit salvo commit=False"""
+
+    def build(
+        name,
+        size="unidad",
+        price="10",
+        description="producto de prueba",
+        is_active=True,
+        deleted_at=None,
+        commit=True,
+    ):
+        product = Product(
+            name=name,
+            size=size,
+            price=Decimal(price),
+            description=description,
+            is_active=is_active,
+            deleted_at=deleted_at,
+        )
+        db.session.add(product)
+
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+
+        return product
+
+    return build
+
+
+@pytest.fixture
+def client(app):
+    """Cliente HTTP con JWT y las rutas de transacciones registradas"""
+    from app.routes.product_transaction.product_transaction_routes import (
+        product_transaction_bp,
+    )
+
+    JWTManager(app)
+    app.register_blueprint(product_transaction_bp)
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Construye el header Authorization de un usuario con el rol indicado"""
+
+    def build(user_id, role=1, **headers):
+        token = create_access_token(
+            identity=str(user_id), additional_claims={"user_id": user_id, "role": role}
+        )
+        return {"Authorization": f"Bearer {token}", **headers}
+
+    return build
@@ -0,0 +1,89 @@
+from app.database import db
+from app.services.table_version.table_version_service import TableVersionService
+from app.services.inventory_snapshot.inventory_snapshot_service import (
+    InventorySnapshotService,
+)
+from app.services.product.product_service import ProductService
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+from app.utils.conditional_get import conditional_get
+
+
+def test_etag_returns_304_until_the_table_is_written(app, seed, transaction_payload):
+    calls = []
+
+    @app.route("/listado")
+    @conditional_get("inventory", "product")
+    def listado():
+        calls.append(1)
+        return {"ok": True}, 200
+
+    client = app.test_client()
+    product_id = seed["product"].id
+
+    first = client.get("/listado")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    cached = client.get("/listado", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert len(calls) == 1
+
+    ProductService.update_product_by_id(product_id, {"description": "nueva"})
+    after_product = client.get("/listado", headers={"If-None-Match": etag})
+    assert after_product.status_code == 200
+
+    etag = after_product.headers["ETag"]
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 5)
+    )
+    after_inventory = client.get("/listado", headers={"If-None-Match": etag})
+    assert after_inventory.status_code == 200
+    assert after_inventory.headers["ETag"] != etag
+    assert len(calls) == 3
+
+
+def test_inventory_and_reference_writes_bump_their_versions(seed, transaction_payload):
+    before = TableVersionService.get_versions(["inventory", "branch", "transaction_type"])
+
+    ProductTransactionService.create_product_transactions_bulk(
+        [transaction_payload(seed["type_in"], 5), transaction_payload(seed["type_in"], 2)]
+    )
+    seed["branch"].address = "calle 9 # 9-9"
+    seed["type_out"].description = "salida de mercancía"
+    db.session.commit()
+
+    after = TableVersionService.get_versions(["inventory", "branch", "transaction_type"])
+    assert {name: after[name] - before[name] for name in after} == {
+        "inventory": 1,
+        "branch": 1,
+        "transaction_type": 1,
+    }
+
+
+def test_ledger_versions_are_bumped_after_commit(seed, transaction_payload, monkeypatch):
+    tables = ["inventory", "product_transaction", "app_user"]
+    before = TableVersionService.get_versions(tables)
+    inside = {}
+
+    # Lee las versiones dentro de la transacción del ledger, después del INSERT
+    record_backdated = InventorySnapshotService.record_backdated_movements
+
+    def peek(movements):
+        inside.update(TableVersionService.get_versions(tables))
+        record_backdated(movements)
+
+    monkeypatch.setattr(InventorySnapshotService, "record_backdated_movements", peek)
+
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 5)
+    )
+    after = TableVersionService.get_versions(tables)
+
+    assert inside == before
+    assert {name: after[name] - before[name] for name in tables} == {
+        "inventory": 1,
+        "product_transaction": 1,
+        "app_user": 0,
+    }
@@ -0,0 +1,146 @@
+import pytest
+from datetime import date
+from app.database import db
+from app.models import DailyMovement
+from app.services.daily_movement.daily_movement_service import DailyMovementService
+from app.services.product_transaction.product_transaction_service import (
+    BulkTransactionError,
+    ProductTransactionService,
+)
+
+
+def _rollup():
+    return [
+        (
+            movement.movement_date,
+            movement.product_id,
+            movement.branch_id,
+            movement.units_in,
+            movement.units_out,
+            movement.transactions_count,
+        )
+        for movement in DailyMovement.query.order_by(
+            DailyMovement.movement_date, DailyMovement.product_id
+        )
+    ]
+
+
+def test_single_transactions_increment_the_rollup_once(seed, transaction_payload):
+    product_id, branch_id = seed["product"].id, seed["branch"].id
+    create = ProductTransactionService.create_product_transaction_service
+
+    create(transaction_payload(seed["type_in"], 5))
+    create(transaction_payload(seed["type_in"], 3))
+    create(transaction_payload(seed["type_out"], 2))
+
+    assert _rollup() == [(date(2025, 1, 1), product_id, branch_id, 8, 2, 3)]
+
+
+def test_bulk_increments_each_key_once_and_rolls_back_with_the_batch(
+    seed, transaction_payload, make_product
+):
+    product_id, branch_id = seed["product"].id, seed["branch"].id
+    mouse_id = make_product("mouse").id
+
+    ProductTransactionService.create_product_transactions_bulk(
+        [
+            transaction_payload(seed["type_in"], 10),
+            transaction_payload(seed["type_out"], 4),
+            transaction_payload(seed["type_in"], 6, product_id=mouse_id),
+            transaction_payload(seed["type_in"], 1, transaction_date="2025-01-02"),
+        ]
+    )
+
+    expected = [
+        (date(2025, 1, 1), product_id, branch_id, 10, 4, 2),
+        (date(2025, 1, 1), mouse_id, branch_id, 6, 0, 1),
+        (date(2025, 1, 2), product_id, branch_id, 1, 0, 1),
+    ]
+    assert _rollup() == expected
+
+    # Un lote rechazado por falta de stock no deja rastro en el acumulado
+    with pytest.raises(BulkTransactionError):
+        ProductTransactionService.create_product_transactions_bulk(
+            [
+                transaction_payload(seed["type_in"], 2),
+                transaction_payload(seed["type_out"], 100, product_id=mouse_id),
+            ]
+        )
+
+    assert _rollup() == expected
+
+
+def test_rebuild_matches_the_incremental_rollup(
+    seed, transaction_payload, make_product, monkeypatch
+):
+    mouse_id = make_product("mouse").id
+    ProductTransactionService.create_product_transactions_bulk(
+        [
+            transaction_payload(seed["type_in"], 10, transaction_date="2025-01-01"),
+            transaction_payload(seed["type_in"], 7, transaction_date="2025-01-03", product_id=mouse_id),
+            transaction_payload(seed["type_out"], 2, transaction_date="2025-01-03"),
+            transaction_payload(seed["type_out"], 1, transaction_date="2025-01-06"),
+        ]
+    )
+    incremental = _rollup()
+
+    DailyMovement.query.delete()
+    db.session.commit()
+
+    monkeypatch.setattr(DailyMovementService, "REBUILD_WINDOW_DAYS", 2)
+    assert DailyMovementService.rebuild_daily_movements() == 3
+    db.session.expire_all()
+
+    assert _rollup() == incremental
+
+
+def test_summary_route_filters_the_rollup(
+    client, auth_headers, seed, transaction_payload, make_product
+):
+    mouse_id = make_product("mouse").id
+    ProductTransactionService.create_product_transactions_bulk(
+        [
+            transaction_payload(seed["type_in"], 10, transaction_date="2025-01-01"),
+            transaction_payload(seed["type_out"], 3, transaction_date="2025-01-02"),
+            transaction_payload(seed["type_out"], 2, transaction_date="2025-01-02"),
+            transaction_payload(seed["type_in"], 4, transaction_date="2025-01-02", product_id=mouse_id),
+            transaction_payload(seed["type_in"], 1, transaction_date="2025-01-03"),
+        ]
+    )
+    headers = auth_headers(seed["user"].id)
+
+    response = client.get(
+        f"/product-transactions/summary?from=2025-01-02&to=2025-01-02&product_id={seed['product'].id}",
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["summary"] == [
+        {
+            "movement_date": "2025-01-02",
+            "product_id": seed["product"].id,
+            "branch_id": seed["branch"].id,
+            "units_in": 0,
+            "units_out": 5,
+            "transactions_count": 2,
+        }
+    ]
+
+    everything = client.get("/product-transactions/summary", headers=headers).get_json()
+    assert [
+        (row["movement_date"], row["units_in"], row["units_out"])
+        for row in everything["summary"]
+    ] == [
+        ("2025-01-01", 10, 0),
+        ("2025-01-02", 0, 5),
+        ("2025-01-02", 4, 0),
+        ("2025-01-03", 1, 0),
+    ]
+
+    unsupported = client.get(
+        f"/product-transactions/summary?supplier_id={seed['supplier'].id}", headers=headers
+    )
+    assert unsupported.status_code == 400
+
+    employee = auth_headers(seed["user"].id, role=2)
+    assert client.get("/product-transactions/summary", headers=employee).status_code == 403
@@ -0,0 +1,172 @@
+from app.database import db
+from app.models import Branch, Product
+from app.models.inventory_change.inventory_change import InventoryChange
+from app.services.inventory.inventory_service import InventoryService
+from app.services.product.product_service import ProductService
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+from app.utils import delta_sync
+from app.utils.cursor import decode_log_cursor, encode_cursor
+from datetime import datetime, timedelta, timezone
+import pytest
+import time
+
+
+def test_product_changes_return_only_rows_after_the_cursor(seed):
+    product_id = seed["product"].id
+
+    first = ProductService.get_product_changes()
+    assert [product["id"] for product in first["products"]] == [product_id]
+    assert first["has_more"] is False
+
+    unchanged = ProductService.get_product_changes(since=first["next_cursor"])
+    assert unchanged["products"] == []
+    assert unchanged["next_cursor"] == first["next_cursor"]
+
+    # Visible apenas hace commit, sin ventana de espera
+    ProductService.delete_product_by_id(product_id)
+    deleted = ProductService.get_product_changes(since=first["next_cursor"])
+    assert [product["id"] for product in deleted["products"]] == [product_id]
+    assert deleted["products"][0]["deleted_at"] is not None
+
+
+def test_rows_of_one_write_share_a_version_and_page_by_id(seed):
+    ProductService.create_fresh_products(
+        [
+            {"name": f"producto {i}", "size": "unidad", "price": 1, "description": "x"}
+            for i in range(3)
+        ]
+    )
+    db.session.commit()
+
+    first = ProductService.get_product_changes(limit=2)
+    second = ProductService.get_product_changes(since=first["next_cursor"], limit=2)
+
+    assert first["has_more"] is True and second["has_more"] is False
+    assert [product["name"] for product in first["products"] + second["products"]] == [
+        "laptop",
+        "producto 0",
+        "producto 1",
+        "producto 2",
+    ]
+    versions = [
+        product.change_version for product in Product.query.order_by(Product.id)
+    ]
+    assert versions[0] < versions[1] == versions[2] == versions[3]
+
+
+def test_inventory_changes_list_everything_then_follow_the_change_log(
+    seed, transaction_payload
+):
+    create = ProductTransactionService.create_product_transaction_service
+    create(transaction_payload(seed["type_in"], 10))
+
+    # Sin cursor: carga completa y después los cambios desde que empezó
+    listing = InventoryService.get_inventory_changes(limit=10)
+    assert [inventory["quantity"] for inventory in listing["inventories"]] == [10]
+    assert listing["has_more"] is True
+
+    create(transaction_payload(seed["type_out"], 3))
+    create(transaction_payload(seed["type_out"], 2))
+
+    changes = InventoryService.get_inventory_changes(since=listing["next_cursor"])
+    assert [inventory["quantity"] for inventory in changes["inventories"]] == [7, 5]
+    assert changes["inventories"][0]["deleted"] is False
+    assert changes["has_more"] is False
+
+    empty = InventoryService.get_inventory_changes(since=changes["next_cursor"])
+    assert empty["inventories"] == [] and empty["has_more"] is False
+
+
+def _add_change(seed, change_id, quantity, branch_id=None):
+    db.session.add(
+        InventoryChange(
+            id=change_id,
+            product_id=seed["product"].id,
+            branch_id=branch_id or seed["branch"].id,
+            quantity=quantity,
+            changed_at=datetime.now(timezone.utc),
+        )
+    )
+    db.session.commit()
+
+
+def test_inventory_changes_wait_for_ids_that_commit_late(
+    seed, transaction_payload, monkeypatch
+):
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 10)
+    )
+    listing = InventoryService.get_inventory_changes()
+    first_id = InventoryChange.query.one().id
+
+    # El id siguiente sigue en una transacción abierta cuando el lector pasa
+    _add_change(seed, first_id + 2, 30)
+    page = InventoryService.get_inventory_changes(since=listing["next_cursor"])
+    assert [inventory["quantity"] for inventory in page["inventories"]] == [30]
+
+    _add_change(seed, first_id + 1, 20)
+    late = InventoryService.get_inventory_changes(since=page["next_cursor"])
+    assert [inventory["quantity"] for inventory in late["inventories"]] == [20]
+
+    # Un id que nunca aparece (rollback) se deja de esperar pasado el plazo
+    _add_change(seed, first_id + 4, 50)
+    skipped = InventoryService.get_inventory_changes(since=late["next_cursor"])
+    assert [inventory["quantity"] for inventory in skipped["inventories"]] == [50]
+    real_time = time.time
+    monkeypatch.setattr(
+        delta_sync.time, "time", lambda: real_time() + delta_sync.GAP_TIMEOUT_SECONDS
+    )
+    _add_change(seed, first_id + 3, 40)
+    expired = InventoryService.get_inventory_changes(since=skipped["next_cursor"])
+    assert expired["inventories"] == []
+
+
+def test_inventory_changes_of_other_branches_are_not_gaps(
+    seed, transaction_payload
+):
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 10)
+    )
+    branch_id = seed["branch"].id
+    listing = InventoryService.get_inventory_changes(branch_id=branch_id)
+    first_id = InventoryChange.query.one().id
+
+    other_branch = Branch(
+        name="sede sur",
+        phone_number="3000000002",
+        email="sur@empresa.com",
+        address="calle 7 # 8-9",
+        company_id=seed["company"].id,
+        is_active=True,
+    )
+    db.session.add(other_branch)
+    db.session.commit()
+    _add_change(seed, first_id + 1, 4, branch_id=other_branch.id)
+
+    page = InventoryService.get_inventory_changes(
+        since=listing["next_cursor"], branch_id=branch_id
+    )
+    assert page["inventories"] == []
+    assert decode_log_cursor(page["next_cursor"])[:2] == (first_id + 1, {})
+
+
+def test_expired_inventory_cursors_are_rejected(seed, monkeypatch):
+    cursor = InventoryService.get_inventory_changes()["next_cursor"]
+    monkeypatch.setattr(InventoryService, "CHANGE_RETENTION", timedelta(seconds=5))
+
+    with pytest.raises(ValueError):
+        InventoryService.get_inventory_changes(since=cursor)
+
+
+def test_date_cursors_from_the_previous_scheme_are_rejected(seed):
+    with pytest.raises(ValueError):
+        ProductService.get_product_changes(since=encode_cursor(datetime(2025, 1, 1), 1))
+
+
+def test_version_cursors_are_rejected_by_the_inventory_changes(seed):
+    cursor = ProductService.get_product_changes()["next_cursor"]
+
+    with pytest.raises(ValueError):
+        InventoryService.get_inventory_changes(since=cursor)
@@ -0,0 +1,133 @@
+import json
+import threading
+import pytest
+from datetime import datetime
+from app.database import db
+from app.models import AppUser, IdempotencyKey, ProductTransaction
+from app.services.idempotency.idempotency_service import IdempotencyService
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+
+
+@pytest.fixture
+def post(client, auth_headers):
+    def send(payload, user_id, key):
+        return client.post(
+            "/product-transactions/",
+            json=payload,
+            headers=auth_headers(user_id, **{"Idempotency-Key": key}),
+        )
+
+    return send
+
+
+def test_replay_returns_the_original_response_without_a_new_movement(
+    post, seed, transaction_payload
+):
+    payload = transaction_payload(seed["type_in"], 5)
+    user_id = seed["user"].id
+
+    first = post(payload, user_id, "pedido-1")
+    replay = post(payload, user_id, "pedido-1")
+
+    assert first.status_code == replay.status_code == 201
+    assert replay.get_data() == first.get_data()
+    assert ProductTransaction.query.count() == 1
+
+
+def test_same_key_with_a_different_payload_is_rejected(post, seed, transaction_payload):
+    user_id = seed["user"].id
+
+    post(transaction_payload(seed["type_in"], 5), user_id, "pedido-1")
+    mismatch = post(transaction_payload(seed["type_in"], 6), user_id, "pedido-1")
+
+    assert mismatch.status_code == 400
+    assert ProductTransaction.query.count() == 1
+
+
+def test_keys_are_scoped_per_user(post, seed, transaction_payload):
+    other = AppUser(
+        name="vendedor",
+        email="vendedor@empresa.com",
+        username="vendedor",
+        hashed_password="hash",
+        role_id=2,
+        branch_id=seed["branch"].id,
+    )
+    db.session.add(other)
+    db.session.commit()
+
+    payload = transaction_payload(seed["type_in"], 5)
+
+    assert post(payload, seed["user"].id, "pedido-1").status_code == 201
+    assert post(payload, other.id, "pedido-1").status_code == 201
+    assert ProductTransaction.query.count() == 2
+    assert IdempotencyKey.query.count() == 2
+
+
+@pytest.mark.parametrize("key", ["", "   ", "k" * 256])
+def test_invalid_key_length_returns_400(post, seed, transaction_payload, key):
+    response = post(transaction_payload(seed["type_in"], 5), seed["user"].id, key)
+
+    assert response.status_code == 400
+    assert ProductTransaction.query.count() == 0
+
+
+def test_concurrent_requests_with_the_same_key_write_once(
+    client, auth_headers, seed, transaction_payload
+):
+    payload = transaction_payload(seed["type_in"], 5)
+    headers = auth_headers(seed["user"].id, **{"Idempotency-Key": "pedido-concurrente"})
+
+    workers = 4
+    start = threading.Barrier(workers)
+    responses = []
+
+    def post():
+        start.wait()
+        response = client.post("/product-transactions/", json=payload, headers=headers)
+        responses.append((response.status_code, json.loads(response.get_data())))
+
+    threads = [threading.Thread(target=post) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [status for status, _ in responses] == [201] * workers
+    assert len({body["product_transaction"]["id"] for _, body in responses}) == 1
+    assert ProductTransaction.query.count() == 1
+
+
+def test_first_response_and_replay_are_the_same_bytes(post, seed, transaction_payload):
+    # Más decimales que la columna: ambas respuestas muestran el valor guardado
+    payload = transaction_payload(seed["type_in"], 3, unit_price=12.345)
+    user_id = seed["user"].id
+
+    first = post(payload, user_id, "pedido-precio")
+    replay = post(payload, user_id, "pedido-precio")
+
+    assert first.status_code == replay.status_code == 201
+    assert first.get_data() == replay.get_data()
+
+
+def test_expired_key_is_a_miss_and_is_replaced_by_the_new_write(
+    post, seed, transaction_payload
+):
+    payload = transaction_payload(seed["type_in"], 5)
+    user_id = seed["user"].id
+    post(payload, user_id, "pedido-1")
+
+    IdempotencyKey.query.update({"expires_at": datetime(2020, 1, 1)})
+    db.session.commit()
+
+    # La lectura no borra la clave expirada; la escritura la reemplaza
+    assert IdempotencyService.get_stored_response(
+        user_id, "pedido-1", ProductTransactionService.IDEMPOTENCY_ENDPOINT, payload
+    ) is None
+    assert IdempotencyKey.query.count() == 1
+
+    assert post(payload, user_id, "pedido-1").status_code == 201
+    assert ProductTransaction.query.count() == 2
+    assert IdempotencyKey.query.one().expires_at > datetime(2020, 1, 1)
@@ -0,0 +1,117 @@
+import threading
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.database import db
+from app.models import Inventory
+from app.services.inventory.inventory_service import InventoryService
+
+
+def test_concurrent_decrements_never_lose_updates(app, seed):
+    initial_quantity = 100
+    decrement = 3
+    workers = 40
+
+    db.session.add(
+        Inventory(
+            product_id=seed["product"].id,
+            branch_id=seed["branch"].id,
+            quantity=initial_quantity,
+        )
+    )
+    db.session.commit()
+
+    sale = {
+        "product_id": seed["product"].id,
+        "branch_id": seed["branch"].id,
+        "quantity": decrement,
+    }
+    transaction_type = seed["type_out"].to_dict()
+
+    results = []
+    start = threading.Barrier(workers)
+
+    def sell():
+        with app.app_context():
+            start.wait()
+            try:
+                InventoryService.update_inventory(sale, transaction_type)
+                db.session.commit()
+                results.append(True)
+            except ValueError:
+                db.session.rollback()
+                results.append(False)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=sell) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    final_quantity = Inventory.query.one().quantity
+    successes = results.count(True)
+
+    assert len(results) == workers
+    assert successes == initial_quantity // decrement
+    assert final_quantity == initial_quantity - successes * decrement
+
+
+def test_concurrent_first_entries_create_a_single_inventory(app, seed):
+    workers = 20
+    entry = {
+        "product_id": seed["product"].id,
+        "branch_id": seed["branch"].id,
+        "quantity": 2,
+    }
+    transaction_type = seed["type_in"].to_dict()
+    start = threading.Barrier(workers)
+
+    def receive():
+        with app.app_context():
+            start.wait()
+            try:
+                InventoryService.update_inventory(entry, transaction_type)
+                db.session.commit()
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=receive) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db.session.expire_all()
+    assert [inventory.quantity for inventory in Inventory.query.all()] == [workers * 2]
+
+
+def test_entries_restore_a_deleted_inventory_instead_of_duplicating_it(seed):
+    key = (seed["product"].id, seed["branch"].id)
+    db.session.add(
+        Inventory(
+            product_id=key[0],
+            branch_id=key[1],
+            quantity=7,
+            deleted_at=datetime.now(timezone.utc),
+        )
+    )
+    db.session.commit()
+
+    assert InventoryService.apply_inventory_deltas({key: 4}) == {}
+    InventoryService.update_inventory(
+        {"product_id": key[0], "branch_id": key[1], "quantity": 3},
+        seed["type_in"].to_dict(),
+    )
+    db.session.commit()
+
+    db.session.expire_all()
+    inventory = Inventory.query.one()
+    assert (inventory.quantity, inventory.deleted_at) == (7, None)
+
+    db.session.add(Inventory(product_id=key[0], branch_id=key[1], quantity=1))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
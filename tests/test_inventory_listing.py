@@ -0,0 +1,30 @@
+from app.database import db
+from app.models import Inventory
+from app.services.inventory.inventory_service import InventoryService
+
+
+def _insert_inventories(seed, make_product, count):
+    """Un producto distinto por inventario para que to_dict tenga que cargarlos todos"""
+    for i in range(count):
+        product = make_product(f"producto {i}", price="10.50", commit=False)
+        db.session.add(
+            Inventory(product_id=product.id, branch_id=seed["branch"].id, quantity=i)
+        )
+    db.session.commit()
+
+
+def test_listing_uses_one_query_and_keeps_to_dict_format(
+    seed, make_product, count_queries
+):
+    _insert_inventories(seed, make_product, 25)
+    branch_id = seed["branch"].id
+
+    db.session.expire_all()
+    inventories, statements = count_queries(
+        lambda: InventoryService.get_all_inventories(branch_id=branch_id)
+    )
+
+    assert len(statements) == 1
+    assert inventories == [
+        inventory.to_dict() for inventory in Inventory.query.order_by(Inventory.id)
+    ]
@@ -0,0 +1,161 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.database import db
+from app.models.backdated_movement.backdated_movement import BackdatedMovement
+from app.models.inventory_snapshot.inventory_snapshot import InventorySnapshot
+from app.services.inventory_snapshot.inventory_snapshot_service import (
+    InventorySnapshotService,
+)
+from app.services.product_price_history.product_price_history_service import (
+    ProductPriceHistoryService,
+)
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+
+
+def _quantity_as_of(as_of, seed):
+    rows = InventorySnapshotService.get_inventories_as_of(
+        as_of, branch_id=seed["branch"].id, product_id=seed["product"].id
+    )
+    return rows[0]["quantity"] if rows else None
+
+
+def _snapshot_quantities(seed):
+    return [
+        (snapshot.snapshot_date, snapshot.quantity)
+        for snapshot in InventorySnapshot.query.filter_by(
+            product_id=seed["product"].id, branch_id=seed["branch"].id
+        ).order_by(InventorySnapshot.snapshot_date)
+    ]
+
+
+def test_as_of_rebuilds_quantities_from_closings_and_later_movements(
+    seed, transaction_payload
+):
+    create = ProductTransactionService.create_product_transaction_service
+    create(transaction_payload(seed["type_in"], 10, transaction_date="2025-01-01"))
+    create(transaction_payload(seed["type_out"], 3, transaction_date="2025-01-02"))
+
+    assert InventorySnapshotService.take_snapshot(date(2025, 1, 2)) is True
+
+    ProductTransactionService.create_product_transactions_bulk(
+        [
+            transaction_payload(seed["type_in"], 5, transaction_date="2025-01-03"),
+            transaction_payload(seed["type_out"], 1, transaction_date="2025-01-04"),
+        ]
+    )
+    # Registrada después del cierre del día 2 pero con fecha del día 5
+    create(transaction_payload(seed["type_in"], 4, transaction_date="2025-01-05"))
+
+    assert InventorySnapshotService.take_snapshot(date(2025, 1, 4)) is True
+    create(transaction_payload(seed["type_out"], 2, transaction_date="2025-01-06"))
+
+    assert _snapshot_quantities(seed) == [(date(2025, 1, 2), 7), (date(2025, 1, 4), 11)]
+    assert [
+        _quantity_as_of(date(2025, 1, day), seed) for day in range(1, 8)
+    ] == [10, 7, 12, 11, 15, 13, 13]
+
+
+def test_backdated_transaction_is_repaired_by_the_nightly_job(seed, transaction_payload):
+    create = ProductTransactionService.create_product_transaction_service
+    create(transaction_payload(seed["type_in"], 10, transaction_date="2025-01-01"))
+    InventorySnapshotService.take_snapshot(date(2025, 1, 1))
+    InventorySnapshotService.take_snapshot(date(2025, 1, 3))
+
+    create(transaction_payload(seed["type_out"], 4, transaction_date="2025-01-02"))
+
+    # El ledger solo anota la clave; los cierres se corrigen en el job nocturno
+    assert _snapshot_quantities(seed) == [(date(2025, 1, 1), 10), (date(2025, 1, 3), 10)]
+    assert db.session.query(BackdatedMovement).count() == 1
+    assert _quantity_as_of(date(2025, 1, 1), seed) == 10
+    assert _quantity_as_of(date(2025, 1, 3), seed) == 6
+
+    assert InventorySnapshotService.repair_backdated_snapshots() == 1
+    assert _snapshot_quantities(seed) == [(date(2025, 1, 1), 10), (date(2025, 1, 3), 6)]
+    assert db.session.query(BackdatedMovement).count() == 0
+    assert _quantity_as_of(date(2025, 1, 3), seed) == 6
+
+
+def test_backdated_transaction_adds_rows_for_new_inventories(
+    seed, transaction_payload, make_product
+):
+    create = ProductTransactionService.create_product_transaction_service
+    create(transaction_payload(seed["type_in"], 10, transaction_date="2025-01-01"))
+    InventorySnapshotService.take_snapshot(date(2025, 1, 3))
+
+    mouse_id = make_product("mouse").id
+    create(
+        transaction_payload(
+            seed["type_in"], 2, transaction_date="2025-01-02", product_id=mouse_id
+        )
+    )
+
+    (row,) = InventorySnapshotService.get_inventories_as_of(
+        date(2025, 1, 3), product_id=mouse_id
+    )
+    assert row["quantity"] == 2
+
+    # El job nocturno toma el cierre del día y después corrige los atrasados
+    InventorySnapshotService.take_snapshot(date(2025, 1, 4))
+
+    snapshots = InventorySnapshot.query.filter_by(product_id=mouse_id).order_by(
+        InventorySnapshot.snapshot_date
+    )
+    assert [(s.snapshot_date, s.quantity) for s in snapshots] == [
+        (date(2025, 1, 3), 2),
+        (date(2025, 1, 4), 2),
+    ]
+
+
+def test_snapshot_of_today_or_later_is_rejected():
+    with pytest.raises(ValueError):
+        InventorySnapshotService.take_snapshot(date.today())
+
+
+def test_snapshot_is_written_once_per_day(seed, transaction_payload):
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 10, transaction_date="2025-01-01")
+    )
+
+    assert InventorySnapshotService.take_snapshot(date(2025, 1, 1)) is True
+    assert InventorySnapshotService.take_snapshot(date(2025, 1, 1)) is False
+    assert db.session.query(InventorySnapshot).count() == 1
+
+
+def test_as_of_values_stock_with_the_price_of_that_day(seed, transaction_payload):
+    product_id = seed["product"].id
+    ProductPriceHistoryService.record_prices(
+        [(product_id, "0.10")], valid_from=datetime(2025, 1, 1)
+    )
+    ProductPriceHistoryService.record_prices(
+        [(product_id, "19.99")], valid_from=datetime(2025, 1, 3)
+    )
+    db.session.commit()
+
+    create = ProductTransactionService.create_product_transaction_service
+    create(transaction_payload(seed["type_in"], 3, transaction_date="2025-01-01"))
+
+    def valuation(as_of):
+        (row,) = InventorySnapshotService.get_inventories_as_of(
+            as_of, branch_id=seed["branch"].id, product_id=product_id
+        )
+        return row["unit_price"], row["value"]
+
+    # En Decimal: 3 * 0.10 no arrastra el error de coma flotante
+    assert valuation(date(2025, 1, 2)) == (Decimal("0.10"), Decimal("0.30"))
+    assert valuation(date(2025, 1, 3)) == (Decimal("19.99"), Decimal("59.97"))
+    assert isinstance(valuation(date(2025, 1, 3))[1], Decimal)
+
+
+def test_as_of_without_a_price_that_day_has_no_value(seed, transaction_payload):
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 3, transaction_date="2025-01-01")
+    )
+
+    # El historial del producto empieza al crearlo, después de esa fecha
+    (row,) = InventorySnapshotService.get_inventories_as_of(date(2025, 1, 1))
+    assert (row["quantity"], row["unit_price"], row["value"]) == (3, None, None)
@@ -0,0 +1,157 @@
+import json
+import queue
+from datetime import datetime, timezone
+import pytest
+from app.database import db
+from app.models import InventoryChange
+from app.services.inventory_change.inventory_change_service import (
+    InventoryChangeService,
+)
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+
+
+@pytest.fixture
+def no_poller_thread():
+    """Registra suscriptores sin arrancar el hilo lector; restaura el estado al final"""
+    InventoryChangeService._poller = object()
+    yield
+    InventoryChangeService._subscribers.clear()
+    InventoryChangeService._poller = None
+    InventoryChangeService._cursor = None
+    InventoryChangeService._gaps = {}
+
+
+def _add_change(seed, change_id, quantity, branch_id=None):
+    db.session.add(
+        InventoryChange(
+            id=change_id,
+            product_id=seed["product"].id,
+            branch_id=branch_id or seed["branch"].id,
+            quantity=quantity,
+            changed_at=datetime.now(timezone.utc),
+        )
+    )
+    db.session.commit()
+
+
+def _event(change_id, branch_id, quantity=1):
+    return {"id": change_id, "branch_id": branch_id, "quantity": quantity}
+
+
+def test_changes_are_recorded_and_replayed_by_branch(seed, transaction_payload):
+    branch_id = seed["branch"].id
+
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 10)
+    )
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_out"], 4)
+    )
+
+    assert [change.quantity for change in InventoryChange.query.order_by(InventoryChange.id)] == [10, 6]
+
+    first_id = InventoryChange.query.order_by(InventoryChange.id).first().id
+    events, complete = InventoryChangeService.get_changes_since(first_id, branch_id)
+
+    assert complete is True
+    assert len(events) == 1
+    assert events[0]["quantity"] == 6
+    assert events[0]["max_capacity_used"] == 6
+    assert InventoryChangeService.get_changes_since(first_id, branch_id + 1) == ([], True)
+
+    message = InventoryChangeService._format_event(events[0])
+    assert message.startswith(f"id: {events[0]['id']}\nevent: inventory\n")
+    assert json.loads(message.split("data: ")[1]) == events[0]
+
+
+def test_poller_returns_late_lower_ids_once(seed, no_poller_thread, monkeypatch):
+    _add_change(seed, 1, 10)
+    assert InventoryChangeService._fetch_new_changes() == []
+    assert InventoryChangeService._cursor == 1
+
+    # El 3 hace commit antes que el 2: el 2 queda pendiente como hueco
+    _add_change(seed, 3, 30)
+    assert [change.id for change in InventoryChangeService._fetch_new_changes()] == [3]
+    assert set(InventoryChangeService._gaps) == {2}
+
+    _add_change(seed, 2, 20)
+    _add_change(seed, 4, 40)
+    assert [change.id for change in InventoryChangeService._fetch_new_changes()] == [2, 4]
+    assert InventoryChangeService._gaps == {}
+    assert InventoryChangeService._fetch_new_changes() == []
+
+    # Un hueco que nunca aparece se abandona después de GAP_TIMEOUT_SECONDS
+    _add_change(seed, 6, 60)
+    InventoryChangeService._fetch_new_changes()
+    monkeypatch.setattr(InventoryChangeService, "GAP_TIMEOUT_SECONDS", 0)
+    InventoryChangeService._fetch_new_changes()
+    assert InventoryChangeService._gaps == {}
+
+
+def test_publish_fans_out_by_branch_and_drops_slow_subscribers(
+    app, no_poller_thread, monkeypatch
+):
+    monkeypatch.setattr(InventoryChangeService, "SUBSCRIBER_QUEUE_SIZE", 2)
+
+    every_branch = InventoryChangeService.subscribe(app)
+    branch_one = InventoryChangeService.subscribe(app, branch_id=1)
+
+    InventoryChangeService._publish([_event(1, 1), _event(2, 2)])
+
+    assert [every_branch.get_nowait()["id"] for _ in range(2)] == [1, 2]
+    assert branch_one.get_nowait()["id"] == 1
+    assert branch_one.empty()
+
+    # Los eventos de la sede 2 solo llenan la cola de every_branch, que se cierra
+    InventoryChangeService._publish([_event(3, 2), _event(4, 2), _event(5, 2)])
+
+    assert every_branch.get_nowait() is None
+    assert every_branch not in InventoryChangeService._subscribers
+    assert branch_one in InventoryChangeService._subscribers
+    assert branch_one.empty()
+
+
+def _read_stream(stream, events_count):
+    messages = []
+
+    while len([m for m in messages if m.startswith("id:")]) < events_count:
+        messages.append(next(stream))
+
+    return [m for m in messages if m.startswith("id:")]
+
+
+def test_stream_replays_then_delivers_late_lower_ids_without_duplicates(
+    app, seed, no_poller_thread
+):
+    branch_id = seed["branch"].id
+    for change_id in (1, 2, 4):
+        _add_change(seed, change_id, change_id * 10)
+
+    stream = InventoryChangeService.stream_events(app, branch_id, last_event_id=1)
+    replayed = _read_stream(stream, 2)
+    assert [message.split("\n")[0] for message in replayed] == ["id: 2", "id: 4"]
+
+    # El lector entrega 4 (ya repuesto) y después 3, que hizo commit tarde
+    (subscriber,) = InventoryChangeService._subscribers
+    subscriber.put_nowait(_event(4, branch_id))
+    subscriber.put_nowait(_event(3, branch_id))
+    subscriber.put_nowait(None)
+
+    live = [message for message in stream if message.startswith("id:")]
+    assert [message.split("\n")[0] for message in live] == ["id: 3"]
+
+
+def test_stream_sends_resync_when_the_gap_exceeds_the_replay_limit(
+    app, seed, no_poller_thread, monkeypatch
+):
+    monkeypatch.setattr(InventoryChangeService, "REPLAY_LIMIT", 2)
+    for change_id in range(1, 5):
+        _add_change(seed, change_id, change_id)
+
+    stream = InventoryChangeService.stream_events(app, seed["branch"].id, last_event_id=0)
+    (resync,) = _read_stream(stream, 1)
+
+    assert resync.startswith("id: 4\nevent: resync\n")
+    assert next(stream) == ": conectado\n\n"
@@ -0,0 +1,96 @@
+import pytest
+from app.database import db
+from app.models import Branch, Inventory, Log, ProductTransaction
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+    BulkTransactionError,
+)
+
+
+@pytest.fixture
+def transfer_setup(seed, transaction_payload):
+    """Segunda sede y 10 unidades del producto en la sede de origen"""
+    destination = Branch(
+        name="sede sur",
+        phone_number="3000000002",
+        email="sur@empresa.com",
+        address="calle 7 # 8-9",
+        company_id=seed["company"].id,
+        is_active=True,
+    )
+    db.session.add(destination)
+    db.session.commit()
+
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 10)
+    )
+
+    def build(*lines):
+        return {
+            "description": "traslado entre sedes",
+            "transaction_date": "2025-01-02",
+            "from_branch_id": seed["branch"].id,
+            "to_branch_id": destination.id,
+            "out_transaction_type_id": seed["type_out"].id,
+            "in_transaction_type_id": seed["type_in"].id,
+            "app_user_id": seed["user"].id,
+            "lines": [
+                {"product_id": product_id, "quantity": quantity, "unit_price": 1000}
+                for product_id, quantity in lines
+            ],
+        }
+
+    return {"origin_id": seed["branch"].id, "destination_id": destination.id, "build": build}
+
+
+def _quantities():
+    return {
+        inventory.branch_id: inventory.quantity for inventory in Inventory.query.all()
+    }
+
+
+def test_transfer_moves_stock_and_writes_both_ledger_entries(seed, transfer_setup):
+    product_id = seed["product"].id
+
+    transfer = ProductTransactionService.create_inventory_transfer(
+        transfer_setup["build"]((product_id, 4), (product_id, 2))
+    )
+
+    assert len(transfer["product_transactions"]) == 4
+    assert _quantities() == {
+        transfer_setup["origin_id"]: 4,
+        transfer_setup["destination_id"]: 6,
+    }
+
+
+def test_transfer_is_all_or_nothing(seed, transfer_setup):
+    product_id = seed["product"].id
+
+    with pytest.raises(BulkTransactionError) as error:
+        ProductTransactionService.create_inventory_transfer(
+            transfer_setup["build"]((product_id, 4), (product_id, 7))
+        )
+
+    assert {line["index"] for line in error.value.errors} == {0, 1}
+    assert _quantities() == {transfer_setup["origin_id"]: 10}
+    assert ProductTransaction.query.count() == 1
+    # El rechazo se registra con el nombre del traslado, no del lote
+    assert [log.module for log in Log.query.all()] == [
+        "ProductTransactionService.create_inventory_transfer"
+    ]
+
+
+def test_transfer_requires_distinct_branches_and_matching_types(seed, transfer_setup):
+    product_id = seed["product"].id
+
+    same_branch = transfer_setup["build"]((product_id, 1))
+    same_branch["to_branch_id"] = same_branch["from_branch_id"]
+
+    with pytest.raises(ValueError):
+        ProductTransactionService.create_inventory_transfer(same_branch)
+
+    swapped_types = transfer_setup["build"]((product_id, 1))
+    swapped_types["out_transaction_type_id"] = seed["type_in"].id
+
+    with pytest.raises(ValueError):
+        ProductTransactionService.create_inventory_transfer(swapped_types)
@@ -0,0 +1,81 @@
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+from openpyxl import Workbook
+from app.database import db
+from app.models import Product
+from app.services.product_import.product_import_service import ProductImportService
+
+
+def _csv(*lines):
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+def test_import_creates_restores_and_reports_each_row(seed, make_product, monkeypatch):
+    monkeypatch.setattr(ProductImportService, "CHUNK_SIZE", 2)
+
+    deleted_id = make_product(
+        "mouse", description="antes", deleted_at=datetime.now(timezone.utc)
+    ).id
+
+    report = ProductImportService.import_products(
+        _csv(
+            "nombre,tamaño,precio,descripcion",
+            "Teclado , unidad,120000,teclado mecánico",
+            "mouse,UNIDAD,45000.50,mouse inalámbrico",
+            "laptop,15 pulgadas,1,ya existe",
+            "teclado,unidad,1,repetido en el archivo",
+            "",
+            "ab,unidad,1,nombre corto",
+            "monitor,24,abc,precio inválido",
+        ),
+        "catalogo.csv",
+    )
+
+    assert [(row["row"], row["status"]) for row in report["rows"]] == [
+        (2, "created"),
+        (3, "restored"),
+        (4, "error"),
+        (5, "error"),
+        (7, "error"),
+        (8, "error"),
+    ]
+    assert (report["created"], report["restored"], report["error"]) == (1, 1, 4)
+
+    keyboard = Product.query.filter_by(name="teclado").one()
+    assert report["rows"][0]["product_id"] == keyboard.id
+    assert keyboard.price == Decimal("120000")
+
+    restored = db.session.get(Product, deleted_id)
+    assert report["rows"][1]["product_id"] == deleted_id
+    assert restored.deleted_at is None
+    assert restored.price == Decimal("45000.50")
+    assert restored.description == "mouse inalámbrico"
+
+
+def test_import_reads_excel_and_uses_constant_statements_per_chunk(
+    seed, monkeypatch, count_queries
+):
+    monkeypatch.setattr(ProductImportService, "CHUNK_SIZE", 50)
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["name", "size", "price", "description", "is_active"])
+
+    for i in range(100):
+        sheet.append([f"producto {i}", "unidad", 10.5, "importado", "no" if i % 2 else "si"])
+
+    file = io.BytesIO()
+    workbook.save(file)
+    file.seek(0)
+
+    report, statements = count_queries(
+        lambda: ProductImportService.import_products(file, "catalogo.xlsx"),
+        match=lambda statement: "product" in statement and "log" not in statement,
+    )
+
+    assert report["created"] == 100
+    assert Product.query.filter_by(is_active=False).count() == 50
+    # Por bloque: búsqueda de existentes, INSERT por lote, ids de los nuevos e
+    # INSERT de su historial de precios
+    assert len(statements) == 2 * 4
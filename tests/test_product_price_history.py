@@ -0,0 +1,55 @@
+from datetime import date, datetime
+from decimal import Decimal
+from app.database import db
+from app.models import ProductPriceHistory
+from app.services.product.product_service import ProductService
+from app.services.product_price_history.product_price_history_service import (
+    ProductPriceHistoryService,
+)
+
+
+def test_price_changes_are_recorded_on_create_and_update(app):
+    product = ProductService.create_product_service(
+        {"name": "teclado", "size": "unidad", "price": 100, "description": "mecánico"}
+    )
+    product_id = product.id
+
+    ProductService.update_product_by_id(product_id, {"description": "inalámbrico"})
+    ProductService.update_product_by_id(product_id, {"price": 120})
+    ProductService.update_product_by_id(product_id, {"price": "120.00"})
+
+    history = ProductPriceHistory.query.order_by(ProductPriceHistory.id).all()
+
+    assert [entry.price for entry in history] == [Decimal("100"), Decimal("120")]
+    assert {entry.product_id for entry in history} == {product_id}
+
+
+def test_prices_as_of_resolves_many_products_in_one_query(seed, count_queries):
+    product_id = seed["product"].id
+    other = ProductService.create_product_service(
+        {"name": "mouse", "size": "unidad", "price": 50, "description": "óptico"}
+    )
+    other_id = other.id
+
+    ProductPriceHistory.query.delete()
+    ProductPriceHistoryService.record_prices([(product_id, 100)], datetime(2025, 1, 1, 8))
+    ProductPriceHistoryService.record_prices([(product_id, 110)], datetime(2025, 2, 1, 23))
+    ProductPriceHistoryService.record_prices([(other_id, 40)], datetime(2025, 1, 15, 12))
+    db.session.commit()
+
+    prices, statements = count_queries(
+        lambda: ProductPriceHistoryService.get_prices_as_of(
+            date(2025, 2, 1), [product_id, other_id]
+        )
+    )
+
+    assert len(statements) == 1
+    assert [(price["product_id"], price["price"]) for price in prices] == [
+        (product_id, 110.0),
+        (other_id, 40.0),
+    ]
+    # Antes de su primer precio el producto no aparece
+    assert [
+        (price["product_id"], price["price"])
+        for price in ProductPriceHistoryService.get_prices_as_of(date(2025, 1, 10))
+    ] == [(product_id, 100.0)]
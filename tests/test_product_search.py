@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from app.database import db
+from app.services.product.product_service import ProductService
+from app.services.product_search.product_search_service import ProductSearchService
+from app.services.table_version.table_version_service import TableVersionService
+
+
+def _add_products(make_product, *names):
+    for name, description in names:
+        make_product(name, description=description, commit=False)
+    db.session.commit()
+
+
+def test_search_ranks_prefix_before_substring_and_description(seed, make_product):
+    _add_products(
+        make_product,
+        ("cargador laptop", "cargador universal"),
+        ("mouse", "compatible con laptop y escritorio"),
+        ("monitor", "pantalla de 24 pulgadas"),
+    )
+
+    names = [product["name"] for product in ProductSearchService.search_products("lapt")]
+
+    # "laptop" del seed empieza por la consulta, luego la palabra dentro del nombre
+    assert names == ["laptop", "cargador laptop", "mouse"]
+    assert [p["name"] for p in ProductSearchService.search_products("argad")] == [
+        "cargador laptop"
+    ]
+    assert [p["name"] for p in ProductSearchService.search_products("Pantalla 24")] == [
+        "monitor"
+    ]
+    assert ProductSearchService.search_products("teclado") == []
+
+
+def test_index_follows_product_writes(seed):
+    product_id = seed["product"].id
+    assert ProductSearchService.search_products("laptop")
+
+    ProductService.update_product_by_id(product_id, {"name": "portátil"})
+    # Ahora solo coincide por la descripción "laptop de oficina"
+    assert ProductSearchService.search_products("laptop")[0]["score"] == 10
+    assert ProductSearchService.search_products("portatil")[0]["id"] == product_id
+
+    ProductService.delete_product_by_id(product_id)
+    assert ProductSearchService.search_products("portatil") == []
+
+
+def test_inactive_products_are_not_returned(seed, make_product):
+    make_product("laptop gamer", is_active=False)
+    product_id = seed["product"].id
+
+    assert [p["name"] for p in ProductSearchService.search_products("laptop")] == ["laptop"]
+
+    ProductService.update_product_by_id(product_id, {"is_active": False})
+    assert ProductSearchService.search_products("laptop") == []
+
+    ProductService.update_product_by_id(product_id, {"is_active": True})
+    assert [p["id"] for p in ProductSearchService.search_products("laptop")] == [product_id]
+
+
+def test_large_catalog_scores_only_the_trigram_candidates(seed, make_product):
+    names = [f"producto {i} modelo {i % 97}" for i in range(5000)]
+    _add_products(make_product, *[(name, "articulo") for name in names])
+
+    results = ProductSearchService.search_products("modelo 42", limit=100)
+
+    # Solo se puntúan los que tienen una palabra que empieza por "42"
+    expected = {
+        name for name in names if any(word.startswith("42") for word in name.split())
+    }
+    with ProductSearchService._lock:
+        candidates = ProductSearchService._candidate_ids(["modelo", "42"])
+
+    assert len(candidates) == len(expected) < len(names) // 20
+    assert {p["name"] for p in results} <= expected
+    assert results[0]["name"] == "producto 42 modelo 42"
+
+
+def test_other_workers_changes_are_read_by_change_version(seed):
+    product = seed["product"]
+    assert ProductSearchService.search_products("laptop")
+
+    # Escritura de otro worker que confirma tarde: su updated_at queda en el pasado
+    product.name = "tableta"
+    product.updated_at = datetime(2020, 1, 1)
+    product.change_version = TableVersionService.next_version("product")
+    db.session.commit()
+
+    ProductSearchService.expire()
+    assert ProductSearchService.search_products("tableta")[0]["id"] == product.id
+    assert ProductSearchService._synced_change_version == product.change_version
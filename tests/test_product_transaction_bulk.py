@@ -0,0 +1,52 @@
+import pytest
+from app.models import Inventory, ProductTransaction
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+    BulkTransactionError,
+)
+
+
+def test_bulk_applies_aggregated_inventory_delta(seed, transaction_payload):
+    created = ProductTransactionService.create_product_transactions_bulk(
+        [
+            transaction_payload(seed["type_in"], 10),
+            transaction_payload(seed["type_in"], 5),
+            transaction_payload(seed["type_out"], 4),
+        ]
+    )
+
+    inventory = Inventory.query.one()
+    assert len(created) == 3
+    assert inventory.quantity == 11
+
+
+def test_bulk_is_all_or_nothing_with_per_line_errors(seed, transaction_payload):
+    with pytest.raises(BulkTransactionError) as error:
+        ProductTransactionService.create_product_transactions_bulk(
+            [
+                transaction_payload(seed["type_in"], 10),
+                transaction_payload(seed["type_in"], 1, product_id=9999),
+                transaction_payload(seed["type_in"], 1, description="x"),
+            ]
+        )
+
+    assert [line["index"] for line in error.value.errors] == [1, 2]
+    assert ProductTransaction.query.count() == 0
+    assert Inventory.query.count() == 0
+
+
+def test_bulk_rejects_lines_that_overdraw_stock(seed, transaction_payload):
+    ProductTransactionService.create_product_transactions_bulk(
+        [transaction_payload(seed["type_in"], 3)]
+    )
+
+    with pytest.raises(BulkTransactionError) as error:
+        ProductTransactionService.create_product_transactions_bulk(
+            [
+                transaction_payload(seed["type_out"], 2),
+                transaction_payload(seed["type_out"], 2),
+            ]
+        )
+
+    assert [line["index"] for line in error.value.errors] == [0, 1]
+    assert Inventory.query.one().quantity == 3
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.database import db
+from app.models import ProductTransaction
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+
+
+def _insert_transactions(seed, count, start=datetime(2025, 1, 1)):
+    for i in range(count):
+        db.session.add(
+            ProductTransaction(
+                description="movimiento de prueba",
+                quantity=1,
+                unit_price=Decimal("10"),
+                total_price=Decimal("10"),
+                # Varias transacciones comparten fecha para probar el desempate por id
+                transaction_date=start + timedelta(days=i // 3),
+                product_id=seed["product"].id,
+                supplier_id=seed["supplier"].id,
+                branch_id=seed["branch"].id,
+                transaction_type_id=seed["type_in"].id,
+                app_user_id=seed["user"].id,
+            )
+        )
+    db.session.commit()
+
+
+def test_keyset_pages_cover_every_transaction_once(seed):
+    _insert_transactions(seed, 23)
+
+    seen = []
+    cursor = None
+    while True:
+        page = ProductTransactionService.get_products_transactions_page(
+            limit=5, after=cursor
+        )
+        seen.extend(item["id"] for item in page["product_transactions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = [
+        t.id
+        for t in ProductTransaction.query.order_by(
+            ProductTransaction.transaction_date.desc(), ProductTransaction.id.desc()
+        )
+    ]
+    assert seen == expected
+
+
+def test_page_applies_date_filters(seed):
+    _insert_transactions(seed, 9)
+
+    filters = ProductTransactionService.parse_transaction_filters(
+        {"from": "2025-01-02", "to": "2025-01-02"}
+    )
+    page = ProductTransactionService.get_products_transactions_page(filters=filters)
+
+    assert len(page["product_transactions"]) == 3
+    assert page["next_cursor"] is None
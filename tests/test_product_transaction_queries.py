@@ -0,0 +1,187 @@
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from app.database import db
+from app.models import Branch, ProductTransaction, Supplier
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+
+
+def _insert_distinct_transactions(seed, make_product, count):
+    """Cada transacción apunta a un producto y proveedor distinto para forzar cargas"""
+    for i in range(count):
+        product = make_product(f"producto {i}", commit=False)
+        supplier = Supplier(
+            name=f"proveedor {i}",
+            nit=f"{i:09d}",
+            email=f"proveedor{i}@empresa.com",
+            contact_name="contacto",
+            phone_number="3000000000",
+            address="calle 1 # 2-3",
+            city="bogota",
+            description="proveedor de prueba",
+            is_active=True,
+        )
+        db.session.add(supplier)
+        db.session.flush()
+        db.session.add(
+            ProductTransaction(
+                description="movimiento de prueba",
+                quantity=1,
+                unit_price=Decimal("10"),
+                total_price=Decimal("10"),
+                product_id=product.id,
+                supplier_id=supplier.id,
+                branch_id=seed["branch"].id,
+                transaction_type_id=seed["type_in"].id,
+                app_user_id=seed["user"].id,
+            )
+        )
+    db.session.commit()
+
+
+def _count_queries_for_page(count_queries, limit):
+    # Sesión limpia para que el mapa de identidad no oculte cargas perezosas
+    db.session.expire_all()
+    page, statements = count_queries(
+        lambda: ProductTransactionService.get_products_transactions_page(limit=limit)
+    )
+
+    assert len(page["product_transactions"]) == limit
+    return len(statements)
+
+
+def test_page_query_count_is_constant(seed, make_product, count_queries):
+    _insert_distinct_transactions(seed, make_product, 30)
+
+    small_page = _count_queries_for_page(count_queries, 3)
+    large_page = _count_queries_for_page(count_queries, 30)
+
+    assert small_page == large_page
+    assert large_page <= 2
+
+
+@pytest.fixture
+def report_transactions(seed, make_product):
+    """Una transacción base y una más por cada filtro que la distingue"""
+    branch = Branch(
+        name="sede sur",
+        phone_number="3000000002",
+        email="sur@empresa.com",
+        address="calle 7 # 8-9",
+        company_id=seed["company"].id,
+        is_active=True,
+    )
+    supplier = Supplier(
+        name="proveedor dos",
+        nit="900000002",
+        email="proveedor2@empresa.com",
+        contact_name="contacto",
+        phone_number="3000000003",
+        address="calle 4 # 5-6",
+        city="cali",
+        description="proveedor secundario",
+        is_active=True,
+    )
+    db.session.add_all([branch, supplier])
+    product = make_product("mouse", commit=False)
+    db.session.flush()
+
+    base = {
+        "quantity": 2,
+        "unit_price": Decimal("10.50"),
+        "total_price": Decimal("21.00"),
+        "product_id": seed["product"].id,
+        "supplier_id": seed["supplier"].id,
+        "branch_id": seed["branch"].id,
+        "transaction_type_id": seed["type_in"].id,
+        "app_user_id": seed["user"].id,
+    }
+    rows = [
+        ("base", datetime(2025, 1, 1, 10, 0), {}),
+        ("otra sede", datetime(2025, 1, 2, 10, 0), {"branch_id": branch.id}),
+        ("otro producto", datetime(2025, 1, 3, 10, 0), {"product_id": product.id}),
+        (
+            "venta",
+            datetime(2025, 1, 4, 23, 30),
+            {"transaction_type_id": seed["type_out"].id, "supplier_id": supplier.id},
+        ),
+    ]
+
+    for description, transaction_date, overrides in rows:
+        db.session.add(
+            ProductTransaction(
+                description=description,
+                transaction_date=transaction_date,
+                **{**base, **overrides},
+            )
+        )
+    db.session.commit()
+
+    return {"branch": branch, "product": product, "supplier": supplier}
+
+
+def _csv_rows(filters):
+    content = "".join(ProductTransactionService.iter_csv_report(filters))
+    header, *rows = csv.reader(io.StringIO(content.lstrip("\ufeff")))
+
+    assert header == ProductTransactionService.REPORT_HEADERS
+    return rows
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [
+        ({}, ["base", "otra sede", "otro producto", "venta"]),
+        ({"from": "2025-01-03"}, ["otro producto", "venta"]),
+        # 'to' incluye todo el día: la venta es a las 23:30
+        ({"to": "2025-01-04"}, ["base", "otra sede", "otro producto", "venta"]),
+        ({"from": "2025-01-02", "to": "2025-01-03"}, ["otra sede", "otro producto"]),
+        ({"branch_id": "other"}, ["otra sede"]),
+        ({"product_id": "other"}, ["otro producto"]),
+        ({"transaction_type_id": "out"}, ["venta"]),
+        ({"supplier_id": "other"}, ["venta"]),
+        ({"branch_id": "seed", "supplier_id": "seed"}, ["base", "otro producto"]),
+    ],
+)
+def test_csv_report_applies_each_filter(seed, report_transactions, args, expected):
+    ids = {
+        "branch_id": {"seed": seed["branch"].id, "other": report_transactions["branch"].id},
+        "product_id": {"other": report_transactions["product"].id},
+        "transaction_type_id": {"out": seed["type_out"].id},
+        "supplier_id": {
+            "seed": seed["supplier"].id,
+            "other": report_transactions["supplier"].id,
+        },
+    }
+    filters = ProductTransactionService.parse_transaction_filters(
+        {
+            field: str(ids[field][value]) if field in ids else value
+            for field, value in args.items()
+        }
+    )
+
+    assert [row[1] for row in _csv_rows(filters)] == expected
+
+
+def test_csv_report_rows_resolve_related_names(seed, report_transactions):
+    filters = ProductTransactionService.parse_transaction_filters(
+        {"supplier_id": str(report_transactions["supplier"].id)}
+    )
+
+    (row,) = _csv_rows(filters)
+    assert row[1:11] == [
+        "venta",
+        "laptop",
+        "2",
+        "10.5",
+        "21.0",
+        "2025-01-04 23:30:00",
+        "venta",
+        "sede norte",
+        "administrador",
+        "proveedor dos",
+    ]
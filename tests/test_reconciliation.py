@@ -0,0 +1,34 @@
+from sqlalchemy import update
+from app.database import db
+from app.models import Inventory, InventoryDrift
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+from app.services.reconciliation.reconciliation_service import ReconciliationService
+
+
+def test_reconciliation_reports_and_repairs_drift(seed, transaction_payload):
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 10)
+    )
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_out"], 3)
+    )
+
+    assert ReconciliationService.reconcile_inventory()["drift"] == 0
+
+    # Simula una edición directa que deja el inventario desalineado
+    db.session.execute(update(Inventory).values(quantity=2))
+    db.session.commit()
+
+    result = ReconciliationService.reconcile_inventory()
+    assert result["drift"] == 1
+
+    [drift] = ReconciliationService.get_pending_drift()
+    assert (drift["inventory_quantity"], drift["ledger_quantity"]) == (2, 7)
+
+    assert ReconciliationService.repair_drift() == 1
+    assert Inventory.query.one().quantity == 7
+    assert ReconciliationService.get_pending_drift() == []
+    assert ReconciliationService.reconcile_inventory()["drift"] == 0
+    assert InventoryDrift.query.count() == 1
@@ -0,0 +1,64 @@
+import pytest
+from app.database import db
+from app.services.product.product_service import ProductService
+from app.utils.reference_cache import ReferenceCache
+
+
+def test_cached_reads_skip_the_database_until_the_version_changes(
+    seed, monkeypatch, count_queries
+):
+    product_id = seed["product"].id
+    monkeypatch.setattr(ReferenceCache, "CHECK_SECONDS", 0)
+
+    first, _ = count_queries(lambda: ProductService.get_product_data_by_id(product_id))
+    second, statements = count_queries(
+        lambda: ProductService.get_product_data_by_id(product_id)
+    )
+
+    assert second == first
+    # Solo la consulta de versión
+    assert len(statements) == 1
+
+
+def test_own_writes_are_visible_without_waiting_for_the_version_check(
+    seed, count_queries
+):
+    product_id = seed["product"].id
+    assert ReferenceCache.CHECK_SECONDS > 0
+
+    ProductService.get_product_data_by_id(product_id)
+    _, statements = count_queries(lambda: ProductService.get_product_data_by_id(product_id))
+    assert statements == []
+
+    ProductService.update_product_by_id(product_id, {"description": "actualizada"})
+
+    assert ProductService.get_product_data_by_id(product_id)["description"] == "actualizada"
+
+
+def test_rolled_back_writes_keep_the_cache(seed, count_queries):
+    product_id = seed["product"].id
+    ProductService.get_product_data_by_id(product_id)
+
+    seed["branch"].address = "calle 9 # 9-9"
+    db.session.flush()
+    db.session.rollback()
+
+    _, statements = count_queries(lambda: ProductService.get_product_data_by_id(product_id))
+    assert statements == []
+
+
+def test_cache_respects_size_limit_and_returns_read_only_values(seed, monkeypatch):
+    monkeypatch.setattr(ReferenceCache, "MAX_ENTRIES", 2)
+
+    for key in range(3):
+        ReferenceCache.get_or_load("branch", key, lambda: {"id": key})
+
+    assert list(ReferenceCache._entries["branch"]) == [1, 2]
+
+    value = ReferenceCache.get_or_load("branch", 2, lambda: {"id": "nuevo"})
+    with pytest.raises(TypeError):
+        value["id"] = "modificado"
+
+    catalog = ReferenceCache.get_or_load("product", "all", lambda: [{"id": 1}])
+    assert catalog == ({"id": 1},)
+    assert ReferenceCache.get_or_load("product", "all", lambda: None) is catalog
@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timedelta, timezone
+from app.database import db
+from app.models import ReportJob
+from app.services.product.product_service import ProductService
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+from app.services.report_job.report_job_service import ReportJobService
+
+
+class _QueuedExecutor:
+    """Guarda los trabajos encolados para ejecutarlos en el hilo de la prueba"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+
+def _enqueue(app, monkeypatch, tmp_path, filters=None):
+    executor = _QueuedExecutor()
+    monkeypatch.setattr(ReportJobService, "_executor", executor)
+    monkeypatch.setattr(ReportJobService, "REPORTS_DIR", str(tmp_path))
+
+    with app.test_request_context():
+        job = ReportJobService.enqueue_report("csv", filters or {})
+
+    return job.id, executor
+
+
+def _run(executor):
+    for fn, args in executor.submitted:
+        fn(*args)
+
+    # El trabajo corre en su propio contexto y sesión
+    db.session.expire_all()
+
+
+def test_report_job_is_reused_until_a_report_table_changes(
+    app, seed, transaction_payload, monkeypatch, tmp_path
+):
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 5)
+    )
+
+    job_id, executor = _enqueue(app, monkeypatch, tmp_path)
+    _run(executor)
+
+    job = db.session.get(ReportJob, job_id)
+    assert job.status == "DONE" and os.path.exists(job.file_path)
+
+    assert _enqueue(app, monkeypatch, tmp_path)[0] == job_id
+
+    # Cambiar el nombre del producto no agrega filas al ledger pero sí cambia el reporte
+    ProductService.update_product_by_id(seed["product"].id, {"name": "portátil"})
+    renamed_id, _ = _enqueue(app, monkeypatch, tmp_path)
+    assert renamed_id != job_id
+
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_in"], 1)
+    )
+    assert _enqueue(app, monkeypatch, tmp_path)[0] not in (job_id, renamed_id)
+
+
+def test_stale_running_job_is_failed_and_requeued(app, seed, monkeypatch, tmp_path):
+    job_id, executor = _enqueue(app, monkeypatch, tmp_path)
+
+    job = db.session.get(ReportJob, job_id)
+    job.status = "RUNNING"
+    job.started_at = datetime.now(timezone.utc) - timedelta(minutes=30)
+    db.session.commit()
+
+    requeued_id, requeued_executor = _enqueue(app, monkeypatch, tmp_path)
+
+    assert requeued_id != job_id
+    assert db.session.get(ReportJob, job_id).status == "FAILED"
+    assert len(requeued_executor.submitted) == 1
+
+    # El hilo del trabajo viejo ya no lo toma si llega a ejecutarse
+    _run(executor)
+    assert db.session.get(ReportJob, job_id).status == "FAILED"
+
+
+def test_recent_pending_job_is_not_failed(app, seed, monkeypatch, tmp_path):
+    job_id, _ = _enqueue(app, monkeypatch, tmp_path)
+
+    assert ReportJobService.fail_stale_jobs() == 0
+    assert _enqueue(app, monkeypatch, tmp_path)[0] == job_id
@@ -0,0 +1,72 @@
+import pytest
+from datetime import datetime, timezone
+from app.database import db
+from app.models import Product
+from app.services.product.product_service import ProductService
+from app.utils.soft_delete_handler import SoftDeleteHandler
+
+
+def _product_payload(name):
+    return {"name": name, "size": "unidad", "price": 20, "description": "nuevo"}
+
+
+def _is_product_select(statement):
+    return statement.startswith("SELECT") and "FROM product" in statement
+
+
+def test_create_or_restore_resolves_both_states_in_one_query(make_product, count_queries):
+    deleted_id = make_product("mouse", deleted_at=datetime.now(timezone.utc)).id
+    make_product("teclado", deleted_at=datetime.now(timezone.utc))
+    make_product("teclado")
+
+    restored, statements = count_queries(
+        lambda: ProductService.create_product_service(_product_payload("mouse")),
+        match=_is_product_select,
+    )
+
+    assert len(statements) == 1
+    assert restored.id == deleted_id
+    assert restored.deleted_at is None
+
+    # El activo tiene prioridad sobre el eliminado con el mismo nombre y tamaño
+    with pytest.raises(ValueError):
+        ProductService.create_product_service(_product_payload("teclado"))
+
+
+def test_create_or_restore_many_uses_one_lookup_per_chunk(
+    make_product, count_queries, monkeypatch
+):
+    monkeypatch.setattr(SoftDeleteHandler, "CHUNK_SIZE", 3)
+
+    deleted_id = make_product("mouse", deleted_at=datetime.now(timezone.utc)).id
+    active_id = make_product("teclado").id
+
+    records = [
+        {**_product_payload(name), "is_active": True}
+        for name in ("monitor", "mouse", "teclado", "monitor", "parlante")
+    ]
+
+    outcomes, statements = count_queries(
+        lambda: SoftDeleteHandler.create_or_restore_many(
+            model=Product,
+            unique_fields=("name", "size"),
+            records=records,
+            restore_many_fn=ProductService.restore_deleted_products,
+            create_many_fn=ProductService.create_fresh_products,
+        ),
+        match=_is_product_select,
+    )
+    db.session.commit()
+
+    monitor_id = Product.query.filter_by(name="monitor").one().id
+
+    assert outcomes == [
+        {"status": "created", "id": monitor_id},
+        {"status": "restored", "id": deleted_id},
+        {"status": "exists", "id": active_id},
+        {"status": "duplicate", "id": monitor_id},
+        {"status": "created", "id": Product.query.filter_by(name="parlante").one().id},
+    ]
+    # Por bloque: la búsqueda de existentes y la lectura de los ids creados
+    assert len(statements) == 4
+    assert db.session.get(Product, deleted_id).deleted_at is None
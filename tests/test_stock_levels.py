@@ -0,0 +1,170 @@
+import os
+import random
+import time
+import pytest
+from app.database import db
+from app.services.inventory.inventory_service import InventoryService
+from app.services.product_transaction.product_transaction_service import (
+    ProductTransactionService,
+)
+
+
+def _loop_stock_levels(quantities, max_capacities):
+    """Cálculo fila por fila tal como lo hacía get_all_inventories_with_stock_level"""
+    percentages, capacities_used, adjusted_levels = [], [], []
+
+    for quantity, max_capacity in zip(quantities, max_capacities):
+        max_capacity = max(max_capacity, quantity)
+        percentage = InventoryService._calculate_stock_percentage(quantity, max_capacity)
+
+        percentages.append(percentage)
+        capacities_used.append(max_capacity)
+        adjusted_levels.append(
+            InventoryService._get_average_if_low_stock(percentage, quantity)
+        )
+
+    return percentages, capacities_used, adjusted_levels
+
+
+def _random_columns(rows):
+    generator = random.Random(14)
+    quantities = [generator.randint(0, 500) for _ in range(rows)]
+    max_capacities = [generator.randint(0, 600) for _ in range(rows)]
+    return quantities, max_capacities
+
+
+def test_compute_stock_levels_matches_row_by_row_loop():
+    quantities, max_capacities = _random_columns(5000)
+
+    # Bordes: capacidad 0 y 1, cantidades en el umbral y redondeos en .5
+    quantities += [0, 0, 1, 49, 50, 51, 5, 15]
+    max_capacities += [0, 1, 0, 100, 100, 100, 200, 200]
+
+    assert InventoryService.compute_stock_levels(
+        quantities, max_capacities
+    ) == _loop_stock_levels(quantities, max_capacities)
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="Benchmark opcional: RUN_BENCHMARKS=1"
+)
+def test_benchmark_compute_stock_levels_against_row_by_row_loop(capsys):
+    """Informa el costo por fila de ambos cálculos; no compara tiempos"""
+    rows = 100_000
+    quantities, max_capacities = _random_columns(rows)
+    timings = {}
+
+    for name, compute in (
+        ("vectorizado", InventoryService.compute_stock_levels),
+        ("fila por fila", _loop_stock_levels),
+    ):
+        best = None
+
+        for _ in range(3):
+            start = time.perf_counter()
+            result = compute(quantities, max_capacities)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        timings[name] = (best, result)
+
+    with capsys.disabled():
+        for name, (elapsed, _) in timings.items():
+            print(
+                f"\n[benchmark] {name}: {elapsed * 1000:.1f} ms para {rows} filas "
+                f"({elapsed / rows * 1e9:.0f} ns por fila)"
+            )
+
+    assert timings["vectorizado"][1] == timings["fila por fila"][1]
+
+
+def test_compute_stock_levels_returns_expected_levels():
+    quantities = [0, 25, 60, 120, 30, 49]
+    max_capacities = [100, 100, 200, 100, 0, 98]
+
+    percentages, capacities_used, adjusted_levels = (
+        InventoryService.compute_stock_levels(quantities, max_capacities)
+    )
+
+    assert percentages == [0, 25, 30, 100, 100, 50]
+    # La capacidad nunca es menor que la cantidad actual
+    assert capacities_used == [100, 100, 200, 120, 30, 98]
+    # Bajo el umbral de 50 unidades el nivel se promedia con 10
+    assert adjusted_levels == [5, 18, 30, 100, 55, 30]
+
+
+def test_stock_levels_use_the_current_maximum_without_writing(
+    seed, transaction_payload, make_product, count_queries
+):
+    from app.models import Branch
+
+    north = seed["branch"]
+    south = Branch(
+        name="sede sur",
+        phone_number="3000000002",
+        email="sur@empresa.com",
+        address="calle 8 # 9-10",
+        company_id=seed["company"].id,
+        is_active=True,
+    )
+    db.session.add(south)
+    db.session.commit()
+
+    mouse_id = make_product("mouse").id
+    ProductTransactionService.create_product_transactions_bulk(
+        [
+            transaction_payload(seed["type_in"], 40, branch_id=north.id),
+            transaction_payload(seed["type_in"], 200, branch_id=south.id),
+            transaction_payload(seed["type_in"], 80, branch_id=north.id, product_id=mouse_id),
+        ]
+    )
+
+    levels, statements = count_queries(
+        lambda: InventoryService.get_all_inventories_with_stock_level(branch_id=north.id)
+    )
+
+    assert [
+        (item["product_id"], item["max_capacity_used"], item["stock_percentage_real"])
+        for item in sorted(levels, key=lambda item: item["product_id"])
+    ] == [(seed["product"].id, 200, 20), (mouse_id, 80, 100)]
+    assert not [
+        statement
+        for statement in statements
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+    # Bajar el máximo se refleja en la siguiente lectura
+    ProductTransactionService.create_product_transaction_service(
+        transaction_payload(seed["type_out"], 190, branch_id=south.id)
+    )
+
+    assert InventoryService._get_max_quantity_by_product([seed["product"].id]) == {
+        seed["product"].id: 40
+    }
+
+
+def test_unfiltered_levels_reuse_the_max_until_inventory_changes(
+    seed, transaction_payload, count_queries
+):
+    create = ProductTransactionService.create_product_transaction_service
+    create(transaction_payload(seed["type_in"], 40))
+
+    def group_by_statements():
+        levels, statements = count_queries(
+            InventoryService.get_all_inventories_with_stock_level
+        )
+        return levels, [s for s in statements if "GROUP BY" in s.upper()]
+
+    levels, grouped = group_by_statements()
+    assert len(grouped) == 1
+    assert levels[0]["max_capacity_used"] == 40
+
+    # Sin escrituras no se vuelve a recorrer la tabla
+    assert group_by_statements()[1] == []
+
+    # El commit del movimiento incrementa la versión de 'inventory' y la descarta
+    create(transaction_payload(seed["type_in"], 60))
+
+    levels, grouped = group_by_statements()
+    assert len(grouped) == 1
+    assert levels[0]["max_capacity_used"] == 100
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.utils.unit_of_work import UnitOfWork
+
+
+class FakeMySQLError(Exception):
+    pass
+
+
+def _deadlock():
+    return OperationalError(
+        "UPDATE inventory", {}, FakeMySQLError(1213, "Deadlock found")
+    )
+
+
+def test_retries_deadlocks_until_success(app, monkeypatch):
+    monkeypatch.setattr(UnitOfWork, "BASE_DELAY_SECONDS", 0)
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) < 3:
+            raise _deadlock()
+        return "ok"
+
+    assert UnitOfWork.run("test_retry_success", work) == "ok"
+    assert UnitOfWork.get_metrics()["test_retry_success"]["retries"] == 2
+
+
+def test_gives_up_after_max_attempts(app, monkeypatch):
+    monkeypatch.setattr(UnitOfWork, "BASE_DELAY_SECONDS", 0)
+
+    def work():
+        raise _deadlock()
+
+    with pytest.raises(OperationalError):
+        UnitOfWork.run("test_retry_failure", work, max_attempts=2)
+
+    assert UnitOfWork.get_metrics()["test_retry_failure"]["failures"] == 1
+
+
+def test_does_not_retry_other_errors(app):
+    calls = []
+
+    def work():
+        calls.append(1)
+        raise ValueError("No hay suficiente stock en el inventario")
+
+    with pytest.raises(ValueError):
+        UnitOfWork.run("test_no_retry", work)
+
+    assert len(calls) == 1